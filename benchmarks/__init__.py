@@ -0,0 +1 @@
+"""Offline benchmarks run against the stand-in Aerogarden cloud in tests/fake_cloud.py."""
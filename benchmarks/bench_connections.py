@@ -0,0 +1,107 @@
+"""Connection reuse and request latency of the integration's HTTP session.
+
+Every new connection to the real cloud costs a TLS handshake, the stand-in
+serves plain HTTP so only the TCP setup shows in the latency. aiohttp closes
+idle connections after 15 seconds, so an interval above that shows what the
+shared session costs at the regular 30 second poll interval::
+
+    python -m benchmarks.bench_connections --polls 50 --commands 4
+    python -m benchmarks.bench_connections --polls 5 --interval 20
+"""
+
+import argparse
+import asyncio
+import time
+from typing import Any, Callable, Dict
+
+import aiohttp
+
+from custom_components.aerogarden.session import ConnectionStats, async_create_session
+from tests.fake_cloud import FakeAerogardenCloud
+
+from .harness import latency_summary, make_api, report
+
+
+def shared_session(stats: ConnectionStats) -> aiohttp.ClientSession:
+    """A session with aiohttp's defaults, like the one Home Assistant shares."""
+    return aiohttp.ClientSession(trace_configs=[stats.trace_config()])
+
+
+def no_keepalive_session(stats: ConnectionStats) -> aiohttp.ClientSession:
+    """Opens a connection per request, like polls spaced beyond the keep-alive."""
+    return aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(force_close=True),
+        trace_configs=[stats.trace_config()],
+    )
+
+
+SESSIONS: Dict[str, Callable[[ConnectionStats], aiohttp.ClientSession]] = {
+    "integration": async_create_session,
+    "shared": shared_session,
+    "no_keepalive": no_keepalive_session,
+}
+
+
+async def measure(
+    host: str, name: str, polls: int, commands: int, interval: float
+) -> Dict[str, Any]:
+    api = make_api(host)
+    api._session = SESSIONS[name](api.connections)
+    try:
+        assert await api.update()
+        gardens = api.gardens[:commands]
+        request_times = []
+        for _ in range(polls):
+            if interval:
+                await asyncio.sleep(interval)
+            started = time.perf_counter()
+            # A poll, and a burst of commands sent at the same time
+            results = await asyncio.gather(
+                api.update(),
+                api.update_configs({key: {"pumpStat": 1} for key in gardens}),
+            )
+            assert results[0] and not any(results[1].values())
+            request_times.append(time.perf_counter() - started)
+    finally:
+        await api.async_close()
+
+    stats = api.connections.as_dict()
+    return {
+        "session": name,
+        "requests": stats["requests"],
+        "connections": stats["connections_created"],
+        "reused": stats["connections_reused"],
+        "reuse_rate": stats["reuse_rate"],
+        **{
+            f"round_{key}": value
+            for key, value in latency_summary(request_times).items()
+        },
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sessions", nargs="+", choices=SESSIONS, default=list(SESSIONS)
+    )
+    parser.add_argument("--polls", type=int, default=50)
+    parser.add_argument("--commands", type=int, default=4, help="per poll")
+    parser.add_argument("--interval", type=float, default=0.0, help="seconds")
+    parser.add_argument("--latency", type=float, default=0.01, help="seconds")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    cloud = FakeAerogardenCloud(gardens=max(args.commands, 1), latency=args.latency)
+    rows = []
+    with cloud.run_in_thread() as host:
+        for name in args.sessions:
+            rows.append(
+                asyncio.run(
+                    measure(host, name, args.polls, args.commands, args.interval)
+                )
+            )
+    report(rows, args.json)
+
+
+if __name__ == "__main__":
+    main()
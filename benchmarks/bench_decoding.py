@@ -0,0 +1,123 @@
+"""Compare the JSON decoders on QueryUserDevice responses of the stand-in cloud.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_decoding --gardens 100 1000 --padding 500
+"""
+
+import argparse
+import asyncio
+import time
+import timeit
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+import aiohttp
+
+from custom_components.aerogarden.const import STREAM_CHUNK_SIZE
+from custom_components.aerogarden.decoding import DECODERS, StreamingArrayDecoder
+from tests.fake_cloud import USER_ID, FakeAerogardenCloud
+
+from .harness import latency_summary, make_api, report, use_session
+
+
+def decode_streaming(body: bytes) -> Any:
+    decoder = StreamingArrayDecoder()
+    for start in range(0, len(body), STREAM_CHUNK_SIZE):
+        decoder.feed(body[start : start + STREAM_CHUNK_SIZE])
+    return decoder.close()
+
+
+def peak_bytes(function: Callable[[], Any]) -> int:
+    tracemalloc.start()
+    function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+async def fetch_body(host: str) -> bytes:
+    async with aiohttp.ClientSession() as session:
+        async with session.post(
+            f"{host}/api/CustomData/QueryUserDevice", data={"userID": str(USER_ID)}
+        ) as response:
+            return await response.read()
+
+
+async def measure_polls(host: str, stream: bool, polls: int) -> Dict[str, Any]:
+    """Return the poll latency and the peak memory of a poll."""
+    async with aiohttp.ClientSession() as session:
+        with use_session(session):
+            api = make_api(host)
+            api.stream_responses = stream
+            samples = []
+            for _ in range(polls):
+                # Measure decoding and parsing, not the reuse of unchanged gardens
+                api._by_fingerprint = {}
+                started = time.perf_counter()
+                assert await api.update()
+                samples.append(time.perf_counter() - started)
+
+            api._by_fingerprint = {}
+            api._data = {}
+            tracemalloc.start()
+            assert await api.update()
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+    latency = latency_summary(samples)
+    return {
+        "poll_p50_ms": latency["p50_ms"],
+        "poll_p95_ms": latency["p95_ms"],
+        "poll_peak_kb": peak // 1024,
+    }
+
+
+def measure(host: str, gardens: int, number: int, polls: int) -> List[Dict[str, Any]]:
+    body = asyncio.run(fetch_body(host))
+    decoders = {
+        name: (lambda decode=decode: decode(body)) for name, decode in DECODERS.items()
+    }
+    decoders["json (streaming)"] = lambda: decode_streaming(body)
+
+    rows = []
+    for name, decode in decoders.items():
+        row = {
+            "decoder": name,
+            "gardens": gardens,
+            "body_kb": len(body) // 1024,
+            "decode_ms": round(
+                min(timeit.repeat(decode, number=number, repeat=5)) / number * 1000, 3
+            ),
+            "decode_peak_kb": peak_bytes(decode) // 1024,
+            "poll_p50_ms": "",
+            "poll_p95_ms": "",
+            "poll_peak_kb": "",
+        }
+        # The integration polls with the default decoder, or streams
+        if name in ("json (streaming)", next(iter(DECODERS))):
+            row.update(
+                asyncio.run(measure_polls(host, name == "json (streaming)", polls))
+            )
+        rows.append(row)
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--gardens", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--padding", type=int, default=0, help="bytes per garden")
+    parser.add_argument("--number", type=int, default=20)
+    parser.add_argument("--polls", type=int, default=20)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    rows = []
+    for gardens in args.gardens:
+        cloud = FakeAerogardenCloud(gardens=gardens, padding=args.padding)
+        with cloud.run_in_thread() as host:
+            rows.extend(measure(host, gardens, args.number, args.polls))
+    report(rows, args.json)
+
+
+if __name__ == "__main__":
+    main()
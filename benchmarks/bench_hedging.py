@@ -0,0 +1,84 @@
+"""Poll tail latency with and without hedging, against a long-tailed stand-in.
+
+Most responses take ``--latency`` seconds, a ``--tail-rate`` share of them
+take ``--tail-latency``::
+
+    python -m benchmarks.bench_hedging --polls 200 --tail-rate 0.05 --tail-latency 2
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from typing import Any, Callable, Dict
+
+import aiohttp
+
+from custom_components.aerogarden.const import HEDGE_MIN_SAMPLES
+from tests.fake_cloud import FakeAerogardenCloud
+
+from .harness import latency_summary, make_api, report, use_session
+
+
+def long_tail(
+    latency: float, tail_latency: float, tail_rate: float, seed: int
+) -> Callable[[], float]:
+    rng = random.Random(seed)
+    return lambda: tail_latency if rng.random() < tail_rate else latency
+
+
+async def measure(
+    cloud: FakeAerogardenCloud, host: str, hedge: bool, polls: int
+) -> Dict[str, Any]:
+    async with aiohttp.ClientSession() as session:
+        with use_session(session):
+            api = make_api(host)
+            api.hedge_requests = hedge
+            # Give the latency histogram enough samples to hedge from
+            for _ in range(HEDGE_MIN_SAMPLES):
+                assert await api.update()
+
+            requests_before = cloud.requests["status"]
+            poll_times = []
+            for _ in range(polls):
+                started = time.perf_counter()
+                assert await api.update()
+                poll_times.append(time.perf_counter() - started)
+
+    status = api.metrics.endpoints["status"]
+    return {
+        "hedging": "on" if hedge else "off",
+        **{f"poll_{key}": value for key, value in latency_summary(poll_times).items()},
+        "status_requests": cloud.requests["status"] - requests_before,
+        "hedges": status.hedges,
+        "hedge_wins": status.hedge_wins,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--polls", type=int, default=200)
+    parser.add_argument("--gardens", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds")
+    parser.add_argument("--tail-latency", type=float, default=2.0, help="seconds")
+    parser.add_argument("--tail-rate", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    rows = []
+    for hedge in (False, True):
+        # The same latency sequence for both runs
+        cloud = FakeAerogardenCloud(
+            gardens=args.gardens,
+            latency=long_tail(
+                args.latency, args.tail_latency, args.tail_rate, args.seed
+            ),
+        )
+        with cloud.run_in_thread() as host:
+            rows.append(asyncio.run(measure(cloud, host, hedge, args.polls)))
+    report(rows, args.json)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""Memory, parse and attribute access cost of GardenState against raw garden dicts.
+
+``reuse_ms`` is what a poll of unchanged gardens costs: the fingerprint
+lookup that finds the GardenState of the previous poll instead of parsing.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_models --gardens 100 1000
+"""
+
+import argparse
+import base64
+import timeit
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+from homeassistant.helpers.entity import DeviceInfo
+
+from custom_components.aerogarden.const import DOMAIN, MANUFACTURER
+from custom_components.aerogarden.models import GardenState, fingerprint
+from tests.fake_cloud import make_garden
+
+from .harness import report
+
+
+def parse_dicts(raw_gardens: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """The parsing done before GardenState: one dict copy per garden."""
+    data = {}
+    for garden in raw_gardens:
+        garden = {
+            **garden,
+            "plantedName": base64.b64decode(garden["plantedName"]).decode("utf-8"),
+        }
+        data[f"{garden['airGuid']}-{garden['configID']}"] = garden
+    return data
+
+
+def parse_states(raw_gardens: List[Dict[str, Any]]) -> Dict[str, GardenState]:
+    data = {}
+    for raw in raw_gardens:
+        garden = GardenState.from_cloud(raw)
+        data[garden.key] = garden
+    return data
+
+
+def reuse_states(
+    raw_gardens: List[Dict[str, Any]], by_fingerprint: Dict[Any, GardenState]
+) -> Dict[str, GardenState]:
+    """What AerogardenAPI does with gardens that did not change."""
+    data = {}
+    for raw in raw_gardens:
+        garden = by_fingerprint[fingerprint(raw)]
+        data[garden.key] = garden
+    return data
+
+
+def dict_name(data, key):
+    choose = data.get(key, {}).get("chooseGarden")
+    if choose is None:
+        return data.get(key, {}).get("plantedName")
+    side = "left" if choose == 0 else "right"
+    return f"{data.get(key, {}).get('plantedName')}_{side}"
+
+
+def dict_device_info(data, key):
+    return DeviceInfo(
+        identifiers={(DOMAIN, key)},
+        name=dict_name(data, key),
+        manufacturer=MANUFACTURER,
+        model="Aerogarden",
+    )
+
+
+def retained_bytes(parse: Callable, raw_gardens: List[Dict[str, Any]]) -> int:
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    data = parse(raw_gardens)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del data
+    return after - before
+
+
+def per_call_ns(function: Callable[[], Any], number: int) -> float:
+    return round(
+        min(timeit.repeat(function, number=number, repeat=5)) / number * 1e9, 1
+    )
+
+
+def per_poll_ms(function: Callable[[], Any]) -> float:
+    return round(min(timeit.repeat(function, number=10, repeat=5)) / 10 * 1000, 3)
+
+
+def measure(gardens: int, number: int) -> List[Dict[str, Any]]:
+    raw_gardens = [make_garden(index) for index in range(gardens)]
+    dicts = parse_dicts(raw_gardens)
+    states = parse_states(raw_gardens)
+    key = next(iter(states))
+    by_fingerprint = {
+        fingerprint(raw): states[garden] for raw, garden in zip(raw_gardens, states)
+    }
+
+    return [
+        {
+            "model": "dict",
+            "gardens": gardens,
+            "bytes_per_garden": retained_bytes(parse_dicts, raw_gardens) // gardens,
+            "parse_ms": per_poll_ms(lambda: parse_dicts(raw_gardens)),
+            "reuse_ms": "",
+            "property_ns": per_call_ns(
+                lambda: dicts.get(key, {}).get("pumpStat"), number
+            ),
+            "name_ns": per_call_ns(lambda: dict_name(dicts, key), number),
+            "device_info_ns": per_call_ns(lambda: dict_device_info(dicts, key), number),
+        },
+        {
+            "model": "GardenState",
+            "gardens": gardens,
+            "bytes_per_garden": retained_bytes(parse_states, raw_gardens) // gardens,
+            "parse_ms": per_poll_ms(lambda: parse_states(raw_gardens)),
+            "reuse_ms": per_poll_ms(lambda: reuse_states(raw_gardens, by_fingerprint)),
+            "property_ns": per_call_ns(lambda: states[key].get("pumpStat"), number),
+            "name_ns": per_call_ns(lambda: states[key].name, number),
+            "device_info_ns": per_call_ns(lambda: states[key].device_info, number),
+        },
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--gardens", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--number", type=int, default=100000)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    rows = []
+    for gardens in args.gardens:
+        rows.extend(measure(gardens, args.number))
+    report(rows, args.json)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Poll latency, CPU time, memory per garden and command round trips.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_poll --gardens 1 10 100 1000 --latency 0.02
+"""
+
+import argparse
+import asyncio
+import time
+import tracemalloc
+from typing import Any, Dict
+
+import aiohttp
+
+from tests.fake_cloud import FakeAerogardenCloud
+
+from .harness import latency_summary, make_api, report, use_session
+
+
+async def measure_memory_per_garden(host: str, gardens: int) -> float:
+    """Bytes retained by the parsed state of one garden after a poll."""
+    async with aiohttp.ClientSession() as session:
+        with use_session(session):
+            api = make_api(host)
+            await api.update()  # Warm up imports and the connection
+            api = make_api(host)
+            tracemalloc.start()
+            before = tracemalloc.get_traced_memory()[0]
+            await api.update()
+            after = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+    return (after - before) / gardens
+
+
+async def measure(host: str, gardens: int, polls: int, commands: int) -> Dict[str, Any]:
+    memory = await measure_memory_per_garden(host, gardens)
+
+    async with aiohttp.ClientSession() as session:
+        with use_session(session):
+            api = make_api(host)
+            await api.update()
+
+            poll_times = []
+            cpu_started = time.thread_time()
+            for _ in range(polls):
+                started = time.perf_counter()
+                assert await api.update()
+                poll_times.append(time.perf_counter() - started)
+            cpu_per_poll = (time.thread_time() - cpu_started) / polls
+
+            garden = api.gardens[0]
+            command_times = []
+            for _ in range(commands):
+                started = time.perf_counter()
+                assert await api.light_toggle(garden)
+                assert await api.update()
+                command_times.append(time.perf_counter() - started)
+
+    return {
+        "gardens": gardens,
+        **{f"poll_{key}": value for key, value in latency_summary(poll_times).items()},
+        "cpu_ms_per_poll": round(cpu_per_poll * 1000, 3),
+        "bytes_per_garden": round(memory),
+        "command_rtt_p50_ms": latency_summary(command_times)["p50_ms"],
+        "command_rtt_p95_ms": latency_summary(command_times)["p95_ms"],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--gardens", type=int, nargs="+", default=[1, 10, 100, 1000])
+    parser.add_argument("--polls", type=int, default=50)
+    parser.add_argument("--commands", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--padding", type=int, default=0, help="bytes per garden")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    rows = []
+    for gardens in args.gardens:
+        cloud = FakeAerogardenCloud(
+            gardens=gardens,
+            latency=args.latency,
+            error_rate=args.error_rate,
+            padding=args.padding,
+        )
+        with cloud.run_in_thread() as host:
+            rows.append(asyncio.run(measure(host, gardens, args.polls, args.commands)))
+    report(rows, args.json)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""Time config entry setup, with and without a stored snapshot.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_startup --gardens 10 100 --latency 0.5
+"""
+
+import argparse
+import asyncio
+import copy
+import time
+from typing import Any, Dict, Optional
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import aiohttp
+from homeassistant.const import CONF_EMAIL, CONF_PASSWORD
+
+from custom_components.aerogarden import async_setup_entry
+from custom_components.aerogarden.const import DOMAIN
+from tests.fake_cloud import EMAIL, PASSWORD, FakeAerogardenCloud
+
+from .harness import make_hass, report, use_session
+
+
+class MemoryStore:
+    """Stands in for homeassistant.helpers.storage.Store, written immediately."""
+
+    saved: Dict[str, Any] = {}
+
+    def __init__(self, hass, version, key, private=False) -> None:
+        self.key = key
+
+    async def async_load(self) -> Optional[Dict[str, Any]]:
+        return copy.deepcopy(self.saved.get(self.key))
+
+    def async_delay_save(self, data_func, delay) -> None:
+        self.saved[self.key] = copy.deepcopy(data_func())
+
+    async def async_remove(self) -> None:
+        self.saved.pop(self.key, None)
+
+
+async def setup_entry(host: str) -> Dict[str, Any]:
+    """Set up one entry, returning when its garden entities and live data were ready."""
+    hass = make_hass(host)
+    hass.loop = asyncio.get_running_loop()
+    hass.is_stopping = False
+    hass.bus = MagicMock()
+    started = time.perf_counter()
+    timings: Dict[str, Any] = {"setup_ms": "", "entities_ms": "", "live_data_ms": ""}
+    background = []
+
+    def elapsed_ms() -> float:
+        return round((time.perf_counter() - started) * 1000, 1)
+
+    async def forward_entry_setups(entry, platforms):
+        # What the platforms do: add the entities of every known or new garden
+        coordinator = hass.data[DOMAIN][entry.entry_id]
+        coordinator.async_add_garden_listener(
+            lambda gardens: timings["entities_ms"]
+            or timings.update(entities_ms=elapsed_ms())
+        )
+
+    def create_background_task(hass, target, name):
+        task = hass.loop.create_task(target)
+        background.append(task)
+        return task
+
+    hass.config_entries.async_forward_entry_setups = AsyncMock(
+        side_effect=forward_entry_setups
+    )
+    entry = MagicMock(
+        entry_id="benchmark",
+        data={CONF_EMAIL: EMAIL, CONF_PASSWORD: PASSWORD},
+        options={},
+    )
+    entry.async_create_background_task = create_background_task
+
+    async with aiohttp.ClientSession() as session:
+        with use_session(session), patch(
+            "custom_components.aerogarden.DEFAULT_HOST", host
+        ), patch("custom_components.aerogarden.storage.Store", MemoryStore):
+            await async_setup_entry(hass, entry)
+            timings["setup_ms"] = elapsed_ms()
+            await asyncio.gather(*background)
+
+            coordinator = hass.data[DOMAIN][entry.entry_id]
+            if coordinator.last_update_success:
+                timings["live_data_ms"] = elapsed_ms()
+            for name, phase in coordinator.startup_timer.phases.items():
+                timings[f"{name}_ms"] = round(phase.duration * 1000, 1)
+            await coordinator.async_shutdown()
+            await coordinator.api.async_close()
+    return timings
+
+
+def measure(gardens: int, latency: float) -> list:
+    cloud = FakeAerogardenCloud(gardens=gardens, latency=latency)
+    rows = []
+    with cloud.run_in_thread() as host:
+        MemoryStore.saved.clear()
+        for scenario in ("cold start", "warm start", "warm, cloud down"):
+            if scenario == "warm, cloud down":
+                cloud.error_rate = 1.0
+            rows.append(
+                {
+                    "scenario": scenario,
+                    "gardens": gardens,
+                    **asyncio.run(setup_entry(host)),
+                }
+            )
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--gardens", type=int, nargs="+", default=[10, 100])
+    parser.add_argument("--latency", type=float, default=0.5, help="seconds")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    rows = []
+    for gardens in args.gardens:
+        rows.extend(measure(gardens, args.latency))
+    report(rows, args.json)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Shared helpers for the benchmarks."""
+
+from contextlib import contextmanager
+import json
+import math
+from typing import Any, Dict, Iterator, List, Sequence
+from unittest.mock import MagicMock, patch
+
+import aiohttp
+from homeassistant.core import HomeAssistant
+
+from custom_components.aerogarden.api import AerogardenAPI
+from custom_components.aerogarden.scheduler import DATA_SCHEDULERS, RequestScheduler
+from tests.fake_cloud import EMAIL, PASSWORD, USER_ID
+
+
+def make_hass(host: str) -> HomeAssistant:
+    """Return a bare hass stand-in whose request scheduler does not throttle."""
+    hass = MagicMock(spec=HomeAssistant)
+    hass.data = {
+        DATA_SCHEDULERS: {host: RequestScheduler(rate=1e6, burst=1e6, startup_jitter=0)}
+    }
+    return hass
+
+
+def make_api(host: str, logged_in: bool = True, **kwargs: Any) -> AerogardenAPI:
+    api = AerogardenAPI(make_hass(host), EMAIL, PASSWORD, host, **kwargs)
+    if logged_in:
+        api._userid = str(USER_ID)
+    return api
+
+
+@contextmanager
+def use_session(session: aiohttp.ClientSession) -> Iterator[None]:
+    """Make the integration send its requests through ``session``."""
+    with patch(
+        "custom_components.aerogarden.api.async_get_clientsession",
+        return_value=session,
+    ):
+        yield
+
+
+def percentile(samples: Sequence[float], pct: float) -> float:
+    ordered = sorted(samples)
+    if not ordered:
+        return math.nan
+    index = min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def latency_summary(samples: Sequence[float]) -> Dict[str, float]:
+    """Return p50/p95/p99/max of ``samples`` (seconds) in milliseconds."""
+    return {
+        f"{name}_ms": round(value * 1000, 2)
+        for name, value in (
+            ("p50", percentile(samples, 50)),
+            ("p95", percentile(samples, 95)),
+            ("p99", percentile(samples, 99)),
+            ("max", max(samples) if samples else math.nan),
+        )
+    }
+
+
+def print_table(rows: List[Dict[str, Any]]) -> None:
+    if not rows:
+        return
+    columns = list(rows[0])
+    widths = {
+        column: max(len(column), *(len(str(row.get(column, ""))) for row in rows))
+        for column in columns
+    }
+    print("  ".join(column.rjust(widths[column]) for column in columns))
+    for row in rows:
+        print(
+            "  ".join(
+                str(row.get(column, "")).rjust(widths[column]) for column in columns
+            )
+        )
+
+
+def report(rows: List[Dict[str, Any]], as_json: bool) -> None:
+    if as_json:
+        print(json.dumps(rows, indent=2))
+    else:
+        print_table(rows)
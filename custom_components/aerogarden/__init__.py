@@ -1,53 +1,151 @@
 import logging
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import CONF_EMAIL, CONF_PASSWORD, Platform
-from homeassistant.core import HomeAssistant
+from homeassistant.const import (
+    CONF_EMAIL,
+    CONF_PASSWORD,
+    EVENT_HOMEASSISTANT_CLOSE,
+    EVENT_HOMEASSISTANT_FINAL_WRITE,
+    Platform,
+)
+from homeassistant.core import Event, HomeAssistant
+import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers.typing import ConfigType
 
 from .api import AerogardenAPI
-from .const import DEFAULT_HOST, DOMAIN
+from .capture import PayloadCapture
+from .const import (
+    CONF_CAPTURE_PAYLOADS,
+    CONF_HEDGE_REQUESTS,
+    CONF_MAX_STALENESS,
+    CONF_RETRY_ATTEMPTS,
+    CONF_STREAM_RESPONSES,
+    CONF_USERID,
+    DEFAULT_HOST,
+    DOMAIN,
+    MAX_STALENESS,
+    RETRY_ATTEMPTS,
+)
+from .coordinator import AerogardenDataUpdateCoordinator
+from .resilience import RetryPolicy
+from .services import async_setup_services
+from .storage import AerogardenStore
+from .timing import PhaseTimer
 
 _LOGGER = logging.getLogger(__name__)
 
 PLATFORMS = [Platform.SENSOR, Platform.BINARY_SENSOR, Platform.LIGHT]
 
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Register the services of the integration."""
+    async_setup_services(hass)
+    return True
+
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
-    """Setup the aerogarden platform"""
+    """Set up Aerogarden from a config entry.
 
-    """Set up Aerogarden from a config entry."""
+    Only a first login blocks the setup. The first refresh runs in the
+    background while the platforms are set up: their entities come from the
+    snapshot stored by the last run, or are added once the refresh returns.
+    """
     hass.data.setdefault(DOMAIN, {})
+    timer = PhaseTimer()
 
     email = entry.data[CONF_EMAIL]
     password = entry.data[CONF_PASSWORD]
 
-    # Use the username and password to set up aerogarden
-
-    # If the setup is successful:
-    hass.data[DOMAIN][entry.entry_id] = {
-        "email": email,
-        "password": password,
-    }
-
-    ag = AerogardenAPI(hass, email, password, DEFAULT_HOST)
-    await ag.login()
-    if not ag.is_valid_login():
-        _LOGGER.error("Invalid login: %s" % ag.error)
-        return False
-
-    _ = await ag.update()
+    # Reuse the userID and gardens of the last run, or the userID of the login
+    # that created the entry. The first poll validates them.
+    store = AerogardenStore(hass, entry.entry_id)
+    with timer.phase("storage"):
+        await store.async_load()
 
-    # store the aerogarden API object into hass data system
-    hass.data[DOMAIN] = ag
-    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    # Use the username and password to set up aerogarden
+    ag = AerogardenAPI(
+        hass,
+        email,
+        password,
+        DEFAULT_HOST,
+        userid=store.userid or entry.data.get(CONF_USERID),
+        retry_policy=RetryPolicy(
+            attempts=entry.options.get(CONF_RETRY_ATTEMPTS, RETRY_ATTEMPTS)
+        ),
+    )
+    ag.async_open_session()
+    if entry.options.get(CONF_CAPTURE_PAYLOADS):
+        ag.payload_capture = PayloadCapture()
+    ag.stream_responses = entry.options.get(CONF_STREAM_RESPONSES, False)
+    ag.hedge_requests = entry.options.get(CONF_HEDGE_REQUESTS, False)
+
+    # One coordinator per account fetches every garden and pushes to the entities
+    coordinator = AerogardenDataUpdateCoordinator(hass, ag, store=store)
+    coordinator.startup_timer = timer
+    coordinator.max_staleness = (
+        entry.options.get(CONF_MAX_STALENESS, MAX_STALENESS) * 60
+    )
+    if not coordinator.async_restore() and not ag.is_valid_login():
+        # Validate the credentials of a new entry before creating anything
+        with timer.phase("login"):
+            await ag.login()
+        if not ag.is_valid_login():
+            _LOGGER.error("Invalid login: %s" % ag.error)
+            await ag.async_close()
+            return False
+
+    hass.data[DOMAIN][entry.entry_id] = coordinator
+    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
+
+    async def async_close_session(_event: Event) -> None:
+        # Entries are not unloaded when Home Assistant stops
+        await ag.async_close()
+
+    async def async_save_last_success(_event: Event) -> None:
+        await store.async_save_last_success()
+
+    entry.async_on_unload(
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_CLOSE, async_close_session)
+    )
+    entry.async_on_unload(
+        hass.bus.async_listen_once(
+            EVENT_HOMEASSISTANT_FINAL_WRITE, async_save_last_success
+        )
+    )
+    entry.async_create_background_task(
+        hass, _async_first_refresh(coordinator), f"{DOMAIN} first refresh"
+    )
+    with timer.phase("entity_creation"):
+        await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
     _LOGGER.debug("Done adding components.")
-    await hass.config_entries.async_forward_entry_setups(entry, ["sensor"])
     return True
 
 
+async def _async_first_refresh(coordinator: AerogardenDataUpdateCoordinator) -> None:
+    timer = coordinator.startup_timer
+    with timer.phase("first_fetch"):
+        await coordinator.async_refresh()
+    if (parse := coordinator.api.last_parse) is not None:
+        timer.record("parse", parse.start, parse.duration)
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     if unload_ok := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
-        hass.data[DOMAIN].pop(entry.entry_id)
+        coordinator = hass.data[DOMAIN].pop(entry.entry_id)
+        await coordinator.api.async_close()
+        await coordinator.store.async_save_last_success()
     return unload_ok
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Forget the stored account state when the entry is removed."""
+    await AerogardenStore(hass, entry.entry_id).async_remove()
+
+
+async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Reload the config entry when its options change."""
+    await hass.config_entries.async_reload(entry.entry_id)
@@ -1,39 +1,172 @@
 import asyncio
-import base64
 import json
 import logging
-from typing import Any, Dict, Optional
+import time
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
 
 import aiohttp
 import async_timeout
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
-from homeassistant.util import Throttle
 
-from .const import MIN_TIME_BETWEEN_UPDATES
+from .capture import PayloadCapture
+from .commands import ConfigWriteBuffer
+from .const import (
+    COMMAND_CONCURRENCY,
+    DEFAULT_TIMEOUT,
+    ENDPOINT_DEADLINES,
+    ENDPOINT_TIMEOUTS,
+    HEDGE_MIN_SAMPLES,
+    STREAM_CHUNK_SIZE,
+)
+from .decoding import StreamingArrayDecoder, json_loads
+from .metrics import (
+    ERROR_CANCELLED,
+    ERROR_CIRCUIT_OPEN,
+    ERROR_CLIENT,
+    ERROR_DECODE,
+    ERROR_TIMEOUT,
+    RequestMetrics,
+    http_error,
+)
+from .models import GardenState, fingerprint, garden_key
+from .resilience import RetryPolicy, async_get_circuit_breaker
+from .scheduler import PRIORITY_COMMAND, PRIORITY_POLL, async_get_request_scheduler
+from .session import ConnectionStats, async_create_session
+from .timing import Phase, PhaseTimer
 
 _LOGGER = logging.getLogger(__name__)
 
 
+class _TransientRequestError(Exception):
+    """A request failed in a way that may succeed when retried."""
+
+
+class _GardenParser:
+    """Parse garden records, reusing the gardens of the last poll that did not change.
+
+    Records can be parsed in batches as they are decoded, ``seconds`` is the
+    time spent parsing them.
+    """
+
+    def __init__(
+        self,
+        previous: Dict[str, GardenState],
+        by_fingerprint: Dict[Hashable, GardenState],
+    ) -> None:
+        self._previous = previous
+        self._previous_by_fingerprint = by_fingerprint
+        self.data: Dict[str, GardenState] = {}
+        # Parsed gardens by the fingerprint of their raw record, reused as is
+        # when the next poll reports an identical record
+        self.by_fingerprint: Dict[Hashable, GardenState] = {}
+        self.reused = 0
+        self.started: Optional[float] = None
+        self.seconds = 0.0
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def parse(self, records: List[Dict[str, Any]]) -> None:
+        started = time.perf_counter()
+        if self.started is None:
+            self.started = started
+        for raw in records:
+            garden_fingerprint = fingerprint(raw)
+            garden = self._previous_by_fingerprint.get(garden_fingerprint)
+            if garden is None:
+                # Responses can be shared between callers, parsing never modifies them
+                garden = GardenState.from_cloud(
+                    raw, self._previous.get(garden_key(raw))
+                )
+            else:
+                self.reused += 1
+            if garden_fingerprint is not None:
+                self.by_fingerprint[garden_fingerprint] = garden
+            self.data[garden.key] = garden
+        self.seconds += time.perf_counter() - started
+
+
 class AerogardenAPI:
-    def __init__(self, hass: HomeAssistant, email: str, password: str, host: str):
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        email: str,
+        password: str,
+        host: str,
+        userid: Optional[str] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+    ):
         self._hass = hass
         self._email = email
         self._password = password
         self._host = host
-        self._userid: Optional[str] = None
+        # A userID restored from storage is trusted until the cloud rejects it
+        self._userid: Optional[str] = userid
+        self._login_task: Optional[asyncio.Task] = None
+        self._update_task: Optional[asyncio.Task[bool]] = None
+        # Identical idempotent requests in flight share one response
+        self._inflight: Dict[Tuple[str, Tuple], asyncio.Task] = {}
+        self.coalescing = {
+            "requests": 0,
+            "coalesced_requests": 0,
+            "updates": 0,
+            "coalesced_updates": 0,
+        }
         self._error_msg: Optional[str] = None
-        self._data: Dict[str, Any] = {}
+        self._data: Dict[str, GardenState] = {}
+        # Parsed gardens by the fingerprint of their raw record, see _GardenParser
+        self._by_fingerprint: Dict[Hashable, GardenState] = {}
+        self.parsing = {"last_reused": 0, "last_parsed": 0, "reused": 0, "parsed": 0}
+        self.last_parse: Optional[Phase] = None
+        # Network, decode and parse phases of the last update
+        self.last_update_phases: Optional[PhaseTimer] = None
+        self._scheduler = async_get_request_scheduler(hass, host)
+        self._breaker = async_get_circuit_breaker(hass, host)
+        self._retry_policy = retry_policy or RetryPolicy()
+        # Raw responses are only kept when payload capture has been enabled
+        self.payload_capture: Optional[PayloadCapture] = None
+        # Decode and parse the gardens while the status response is received
+        self.stream_responses = False
+        self.config_writes = ConfigWriteBuffer(self._send_configs)
+        # Requests use the shared session until the integration opens its own
+        self._session: Optional[aiohttp.ClientSession] = None
+        self.connections = ConnectionStats()
 
         self._login_url = f"{self._host}/api/Admin/Login"
         self._status_url = f"{self._host}/api/CustomData/QueryUserDevice"
         self._update_url = f"{self._host}/api/Custom/UpdateDeviceConfig"
+        self._endpoints = {
+            self._login_url: "login",
+            self._status_url: "status",
+            self._update_url: "update",
+        }
+        self.metrics = RequestMetrics(self._endpoints)
+        # Seconds per attempt, and for all attempts, by endpoint name
+        self.timeouts: Dict[str, float] = dict(ENDPOINT_TIMEOUTS)
+        self.deadlines: Dict[str, float] = dict(ENDPOINT_DEADLINES)
+        # Send a second poll when the first one is slower than usual
+        self.hedge_requests = False
+        # While the cloud is down, polls are single attempts that only check
+        # whether it is back
+        self.probe_only = False
 
         self._headers = {
             "User-Agent": "HA-Aerogarden/0.1",
             "Content-Type": "application/x-www-form-urlencoded",
         }
 
+    def async_open_session(self) -> None:
+        """Send the requests through a session tuned for the cloud, see session.py."""
+        if self._session is None:
+            self._session = async_create_session(self.connections)
+
+    async def async_close(self) -> None:
+        """Close the session opened by async_open_session, if any."""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
     @property
     def error(self) -> Optional[str]:
         return self._error_msg
@@ -66,104 +199,468 @@ class AerogardenAPI:
     def is_valid_login(self) -> bool:
         return self._userid is not None
 
+    @property
+    def userid(self) -> Optional[str]:
+        return self._userid
+
+    def garden(self, macaddr: str) -> Optional[GardenState]:
+        return self._data.get(macaddr)
+
     def garden_name(self, macaddr: str) -> Optional[str]:
-        multi_garden = self.garden_property(macaddr, "chooseGarden")
-        if multi_garden is None:
-            return self.garden_property(macaddr, "plantedName")
-        multi_garden_label = "left" if multi_garden == 0 else "right"
-        return f"{self.garden_property(macaddr, 'plantedName')}_{multi_garden_label}"
+        garden = self._data.get(macaddr)
+        return None if garden is None else garden.name
 
     def garden_property(self, macaddr: str, field: str) -> Any:
-        return self._data.get(macaddr, {}).get(field)
+        garden = self._data.get(macaddr)
+        return None if garden is None else garden.get(field)
 
     async def light_toggle(self, macaddr: str) -> bool:
-        if macaddr not in self._data:
-            _LOGGER.debug(f"light_toggle called for unknown macaddr: {macaddr}")
+        return await self.update_config(
+            macaddr, {"lightTemp": self.garden_property(macaddr, "lightTemp")}
+        )
+
+    async def update_config(self, macaddr: str, config: Dict[str, Any]) -> bool:
+        """Send ``config`` as the plantConfig of a garden.
+
+        Updates of the same garden made within CONFIG_WRITE_WINDOW are sent
+        as one request, see ConfigWriteBuffer for how they are merged.
+        """
+        if (error := await self.config_writes.async_write(macaddr, config)) is not None:
+            self._error_msg = error
             return False
+        return True
 
-        post_data = {
-            "airGuid": macaddr,
-            "chooseGarden": self.garden_property(macaddr, "chooseGarden"),
-            "userID": self._userid,
-            "plantConfig": f'{{ "lightTemp" : {self.garden_property(macaddr, "lightTemp")} }}',
-        }
+    async def update_configs(
+        self, configs: Dict[str, Dict[str, Any]]
+    ) -> Dict[str, Optional[str]]:
+        """Send the plantConfig of many gardens.
+
+        Returns the error of every garden, None for those that succeeded.
+        Nothing is refreshed, the caller confirms the whole batch at once.
+        """
+        errors = await asyncio.gather(
+            *(
+                self.config_writes.async_write(macaddr, config)
+                for macaddr, config in configs.items()
+            )
+        )
+        return dict(zip(configs, errors))
+
+    async def _send_configs(
+        self,
+        configs: Dict[str, Dict[str, Any]],
+        concurrency: int = COMMAND_CONCURRENCY,
+    ) -> Dict[str, Optional[str]]:
+        """Send one request per garden, ``concurrency`` at a time."""
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def send(macaddr: str, config: Dict[str, Any]) -> Optional[str]:
+            async with semaphore:
+                return await self._update_config(macaddr, config)
+
+        errors = await asyncio.gather(
+            *(send(macaddr, config) for macaddr, config in configs.items())
+        )
+        return dict(zip(configs, errors))
+
+    async def _update_config(
+        self, macaddr: str, config: Dict[str, Any]
+    ) -> Optional[str]:
+        """Send an UpdateDeviceConfig request, returning the error if it failed."""
+        if macaddr not in self._data:
+            _LOGGER.debug(f"Config update for unknown macaddr: {macaddr}")
+            return f"Unknown garden {macaddr}"
+
+        def post_data(userid: str) -> dict:
+            return {
+                "airGuid": macaddr,
+                "chooseGarden": self.garden_property(macaddr, "chooseGarden"),
+                "userID": userid,
+                "plantConfig": json.dumps(config),
+            }
 
-        results = await self._post_request(self._update_url, post_data)
+        results = await self._post_authenticated(
+            self._update_url, post_data, priority=PRIORITY_COMMAND, idempotent=False
+        )
         if not results:
-            return False
+            return f"No response from the Aerogarden cloud updating {macaddr}"
 
         if results.get("code") == 1:
-            await self.update()
-            return True
+            return None
 
-        self._error_msg = (
-            f"Didn't get code 1 from update API call: {results.get('msg')}"
-        )
-        return False
+        return f"Didn't get code 1 from update API call: {results.get('msg')}"
+
+    def restore(self, snapshot: Dict[str, Dict[str, Any]]) -> None:
+        """Load gardens saved by a previous run, until the next update."""
+        self._data = {
+            key: GardenState.from_snapshot(key, data) for key, data in snapshot.items()
+        }
 
     @property
     def gardens(self):
         return list(self._data.keys())
 
+    @property
+    def data(self) -> Dict[str, GardenState]:
+        return self._data
+
     async def update(self) -> bool:
-        if not self.is_valid_login():
-            if not await self.login():
-                return False
+        """Refresh every garden, joining the refresh already in flight if any."""
+        self.coalescing["updates"] += 1
+        if self._update_task is None:
+            self._update_task = asyncio.get_running_loop().create_task(
+                self._async_update()
+            )
+            self._update_task.add_done_callback(self._clear_update_task)
+        else:
+            self.coalescing["coalesced_updates"] += 1
+        return await asyncio.shield(self._update_task)
 
-        post_data = {"userID": self._userid}
-        garden_data = await self._post_request(self._status_url, post_data)
+    def _clear_update_task(self, _task: asyncio.Task) -> None:
+        self._update_task = None
 
-        if not garden_data:
-            return False
+    async def _async_update(self) -> bool:
+        timer = PhaseTimer()
+        status_metrics = self.metrics.endpoint(self._status_url)
+        status_metrics.last_decode = 0.0
+        garden_data = await self._post_authenticated(
+            self._status_url, lambda userid: {"userID": userid}
+        )
+        # A streamed response is decoded and parsed while it is received, the
+        # network phase is the rest of the request time
+        fetched = time.perf_counter()
+        decode = status_metrics.last_decode
+        streamed_parse = (
+            garden_data.seconds if isinstance(garden_data, _GardenParser) else 0.0
+        )
+        timer.record(
+            "network",
+            timer.started,
+            fetched - timer.started - decode - streamed_parse,
+        )
+        timer.record("decode", fetched - decode - streamed_parse, decode)
+        self.last_update_phases = timer
 
-        if "Message" in garden_data:
-            self._error_msg = f"Couldn't get data for garden: {garden_data['Message']}"
-            _LOGGER.error(self._error_msg)
+        if not garden_data:
             return False
 
-        new_data = {}
-        # Debug message
-        _LOGGER.info(json.dumps(garden_data, indent=2))
-        for garden in garden_data:
-            if "plantedName" in garden:
-                garden["plantedName"] = str(
-                    base64.b64decode(garden["plantedName"]).decode("utf-8")
+        if isinstance(garden_data, _GardenParser):
+            parser = garden_data
+        else:
+            if "Message" in garden_data:
+                self._error_msg = (
+                    f"Couldn't get data for garden: {garden_data['Message']}"
                 )
-            garden_id = None
-            if "configID" in garden:
-                garden_id = garden["configID"]
-            garden_mac = (
-                f"{garden['airGuid']}-{'' if garden_id is None else str(garden_id)}"
-            )
-            new_data[garden_mac] = garden
+                _LOGGER.error(self._error_msg)
+                return False
+            parser = self._garden_parser()
+            parser.parse(garden_data)
 
-        self._data = new_data
+        reused = parser.reused
+        parsed = len(parser.data) - reused
+        self.parsing["last_reused"] = reused
+        self.parsing["last_parsed"] = parsed
+        self.parsing["reused"] += reused
+        self.parsing["parsed"] += parsed
+        _LOGGER.debug(f"Parsed {parsed} gardens, reused {reused} unchanged ones")
+        self._data = parser.data
+        self._by_fingerprint = parser.by_fingerprint
+        self.last_parse = Phase(parser.started, parser.seconds)
+        timer.record("parse", *self.last_parse)
         return True
 
-    @Throttle(MIN_TIME_BETWEEN_UPDATES)
-    async def throttled_update(self) -> bool:
-        # Call the update method
-        return await self.update()
+    def _garden_parser(self) -> _GardenParser:
+        return _GardenParser(self._data, self._by_fingerprint)
+
+    @staticmethod
+    def _is_auth_failure(response: Any) -> bool:
+        """The cloud answers an unknown userID with an error message object."""
+        return isinstance(response, dict) and "Message" in response
+
+    async def _reauthenticate(self, stale_userid: Optional[str]) -> bool:
+        """Log in again, sharing a single in-flight login between all callers.
+
+        Nothing is sent when another caller already replaced ``stale_userid``.
+        """
+        if self._userid is not None and self._userid != stale_userid:
+            return True
+        if self._login_task is None:
+            self._userid = None
+            self._login_task = asyncio.get_running_loop().create_task(self.login())
+            self._login_task.add_done_callback(self._clear_login_task)
+        return await asyncio.shield(self._login_task)
+
+    def _clear_login_task(self, _task: asyncio.Task) -> None:
+        self._login_task = None
+
+    async def _post_authenticated(
+        self,
+        url: str,
+        post_data: Callable[[str], dict],
+        priority: int = PRIORITY_POLL,
+        idempotent: bool = True,
+    ) -> Optional[Any]:
+        """Post a request carrying the userID, logging in again if it is rejected.
+
+        ``post_data`` builds the payload for a userID, so the request can be
+        retried once with the userID of the new login.
+        """
+        if not self.is_valid_login() and not await self._reauthenticate(None):
+            return None
+
+        userid = self._userid
+        response = await self._post_request(
+            url, post_data(userid), priority, idempotent
+        )
+        if not self._is_auth_failure(response):
+            return response
+
+        _LOGGER.debug("userID was rejected, logging in again")
+        if not await self._reauthenticate(userid):
+            return None
+        return await self._post_request(
+            url, post_data(self._userid), priority, idempotent
+        )
+
+    @property
+    def scheduler(self):
+        return self._scheduler
+
+    @property
+    def breaker(self):
+        return self._breaker
 
     async def _post_request(
-        self, url: str, post_data: dict
-    ) -> Optional[dict[str, Any]]:
-        session = async_get_clientsession(self._hass)
+        self,
+        url: str,
+        post_data: dict,
+        priority: int = PRIORITY_POLL,
+        idempotent: bool = True,
+    ) -> Optional[Any]:
+        """Post a request, sharing the response of an identical one in flight.
+
+        Commands are not idempotent and must pass ``idempotent=False``, they
+        are neither coalesced nor retried.
+        """
+        self.coalescing["requests"] += 1
+        if not idempotent:
+            return await self._send_request(url, post_data, priority, idempotent)
+
+        key = (url, tuple(sorted(post_data.items())))
+        if (task := self._inflight.get(key)) is None:
+            task = asyncio.get_running_loop().create_task(
+                self._send_request(url, post_data, priority, idempotent)
+            )
+            self._inflight[key] = task
+            task.add_done_callback(lambda _task: self._inflight.pop(key, None))
+        else:
+            self.coalescing["coalesced_requests"] += 1
+        return await asyncio.shield(task)
+
+    async def _send_request(
+        self, url: str, post_data: dict, priority: int, idempotent: bool
+    ) -> Optional[Any]:
+        """Send a request through the circuit breaker, retrying transient failures.
+
+        Only idempotent requests are retried: a command that timed out may
+        still have been applied by the cloud.
+        """
+        metrics = self.metrics.endpoint(url)
+        if not self._breaker.allow_request():
+            _LOGGER.debug(f"Aerogarden cloud is unavailable, not requesting {url}")
+            metrics.record(None, 0, ERROR_CIRCUIT_OPEN)
+            return None
+
+        attempts = self._retry_policy.attempts
+        probe = self.probe_only and priority == PRIORITY_POLL
+        if not idempotent or self._breaker.probing or probe:
+            attempts = 1
+        endpoint = self._endpoints.get(url)
+        attempt_timeout = self.timeouts.get(endpoint, DEFAULT_TIMEOUT)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.deadlines.get(endpoint, DEFAULT_TIMEOUT)
+        try:
+            for attempt in range(1, attempts + 1):
+                try:
+                    if self.hedge_requests and url == self._status_url and not probe:
+                        response = await self._send_hedged(
+                            url, post_data, priority, attempt_timeout, deadline
+                        )
+                    else:
+                        response = await self._send_once(
+                            url, post_data, priority, attempt_timeout, deadline
+                        )
+                except _TransientRequestError as err:
+                    delay = self._retry_policy.delay(attempt)
+                    if attempt == attempts or loop.time() + delay >= deadline:
+                        _LOGGER.error(err)
+                        self._breaker.record_failure()
+                        return None
+                    _LOGGER.debug(f"{err}, retrying ({attempt}/{attempts})")
+                    metrics.retries += 1
+                    await asyncio.sleep(delay)
+                else:
+                    self._breaker.record_success()
+                    return response
+        except asyncio.CancelledError:
+            self._breaker.release_probe()
+            raise
+        return None
+
+    async def _send_hedged(
+        self, url: str, post_data: dict, priority: int, timeout: float, deadline: float
+    ) -> Optional[Any]:
+        """Send a request, and a second one if the first is slower than usual.
+
+        The second request is sent once the first took the p95 latency of the
+        endpoint, and the first response wins, the other request is cancelled.
+        Only for idempotent requests, a command must never be sent twice.
+        """
+        metrics = self.metrics.endpoint(url)
+        hedge_after = metrics.answered_latency.percentile(95)
+        loop = asyncio.get_running_loop()
+        if (
+            metrics.answered_latency.count < HEDGE_MIN_SAMPLES
+            or hedge_after is None
+            or hedge_after >= min(timeout, deadline - loop.time())
+        ):
+            return await self._send_once(url, post_data, priority, timeout, deadline)
+
+        first = loop.create_task(
+            self._send_once(url, post_data, priority, timeout, deadline)
+        )
+        pending = {first}
         try:
-            async with async_timeout.timeout(10):
-                async with session.post(
+            done, pending = await asyncio.wait(pending, timeout=hedge_after)
+            if not done:
+                metrics.hedges += 1
+                pending.add(
+                    loop.create_task(
+                        self._send_once(
+                            url, post_data, priority, timeout - hedge_after, deadline
+                        )
+                    )
+                )
+            error: Optional[BaseException] = None
+            while True:
+                for task in done:
+                    if (error := task.exception()) is None:
+                        if task is not first:
+                            metrics.hedge_wins += 1
+                        return task.result()
+                if not pending:
+                    # Both failed, report the last failure
+                    raise error
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _send_once(
+        self,
+        url: str,
+        post_data: dict,
+        priority: int,
+        timeout: float = DEFAULT_TIMEOUT,
+        deadline: Optional[float] = None,
+    ) -> Optional[Any]:
+        """Send a single request, raising _TransientRequestError if worth retrying.
+
+        ``timeout`` bounds the request once the scheduler granted it a slot,
+        ``deadline``, in loop time, also bounds the wait for the slot.
+        """
+        session = self._session or async_get_clientsession(self._hass)
+        started: Optional[float] = None
+        size = 0
+        error: Optional[str] = None
+        try:
+            # The deadline also bounds the wait for a slot, the timeout does not
+            slot = self._scheduler.slot(priority)
+            async with async_timeout.timeout_at(deadline), slot:
+                started = time.perf_counter()
+                async with async_timeout.timeout(timeout), session.post(
                     url, data=post_data, headers=self._headers
                 ) as response:
+                    if self.stream_responses and response.status == 200:
+                        document, size = await self._read_streaming(url, response)
+                        return document
+                    body = await response.read()
+                    size = len(body)
+                    if self.payload_capture is not None:
+                        self.payload_capture.record(url, response.status, body)
+                    if response.status >= 500:
+                        error = http_error(response.status)
+                        raise _TransientRequestError(
+                            f"HTTP error {response.status} while requesting {url}"
+                        )
                     if response.status != 200:
+                        error = http_error(response.status)
                         _LOGGER.error(
                             f"HTTP error {response.status} while requesting {url}"
                         )
                         return None
-                    return await response.json()
+                    decode_started = time.perf_counter()
+                    document = json_loads(body)
+                    self.metrics.endpoint(url).record_decode(
+                        time.perf_counter() - decode_started
+                    )
+                    return document
         except aiohttp.ClientError as err:
-            _LOGGER.error(f"Error requesting data from {url}: {err}")
-        except json.JSONDecodeError:
+            error = ERROR_CLIENT
+            raise _TransientRequestError(
+                f"Error requesting data from {url}: {err}"
+            ) from err
+        except ValueError:
+            # Raised by every decoder, including for invalid UTF-8
+            error = ERROR_DECODE
             _LOGGER.error(f"Error decoding response from {url}")
-        except asyncio.TimeoutError:
-            _LOGGER.error(f"Timeout while requesting data from {url}")
+        except asyncio.TimeoutError as err:
+            error = ERROR_TIMEOUT
+            raise _TransientRequestError(
+                f"Timeout while requesting data from {url}"
+            ) from err
+        except asyncio.CancelledError:
+            error = ERROR_CANCELLED
+            raise
+        finally:
+            self.metrics.endpoint(url).record(
+                None if started is None else time.perf_counter() - started, size, error
+            )
         return None
+
+    async def _read_streaming(
+        self, url: str, response: aiohttp.ClientResponse
+    ) -> Tuple[Any, int]:
+        """Decode a response while it is received, one array element at a time.
+
+        The gardens of a status response are parsed as they are decoded, the
+        document returned is then the _GardenParser holding them. Returns the
+        document and the size of the body.
+        """
+        parser = self._garden_parser() if url == self._status_url else None
+        decoder = StreamingArrayDecoder(keep=parser is None)
+        chunks = []
+        size = 0
+        decode = 0.0
+        async for chunk in response.content.iter_chunked(STREAM_CHUNK_SIZE):
+            size += len(chunk)
+            decode_started = time.perf_counter()
+            records = decoder.feed(chunk)
+            decode += time.perf_counter() - decode_started
+            if parser is not None and records:
+                parser.parse(records)
+            if self.payload_capture is not None:
+                chunks.append(chunk)
+        if self.payload_capture is not None:
+            self.payload_capture.record(url, response.status, b"".join(chunks))
+        decode_started = time.perf_counter()
+        document = decoder.close()
+        self.metrics.endpoint(url).record_decode(
+            decode + time.perf_counter() - decode_started
+        )
+        if parser is not None and isinstance(document, list):
+            parser.parse(document)
+            document = parser
+        return document, size
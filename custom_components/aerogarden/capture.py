@@ -0,0 +1,51 @@
+"""Opt-in capture of raw responses from the Aerogarden cloud."""
+
+from collections import deque
+import json
+import time
+from typing import Any, Deque, Dict, List, NamedTuple
+
+from .const import PAYLOAD_CAPTURE_SIZE
+
+
+class CapturedPayload(NamedTuple):
+    timestamp: float
+    url: str
+    status: int
+    body: bytes
+
+
+class PayloadCapture:
+    """Keep the last raw responses, untouched until they are requested.
+
+    Recording only stores a reference to the body that was already read from
+    the wire, so the polling path does no formatting or copying.
+    """
+
+    def __init__(self, size: int = PAYLOAD_CAPTURE_SIZE) -> None:
+        self._payloads: Deque[CapturedPayload] = deque(maxlen=size)
+
+    def __len__(self) -> int:
+        return len(self._payloads)
+
+    def record(self, url: str, status: int, body: bytes) -> None:
+        self._payloads.append(CapturedPayload(time.time(), url, status, body))
+
+    def as_dict(self) -> List[Dict[str, Any]]:
+        """Decode the captured payloads, oldest first."""
+        captured = []
+        for payload in self._payloads:
+            try:
+                body: Any = json.loads(payload.body)
+            except ValueError:
+                body = payload.body.decode("utf-8", errors="replace")
+            captured.append(
+                {
+                    "timestamp": payload.timestamp,
+                    "url": payload.url,
+                    "status": payload.status,
+                    "size": len(payload.body),
+                    "body": body,
+                }
+            )
+        return captured
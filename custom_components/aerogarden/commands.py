@@ -0,0 +1,110 @@
+"""Coalescing of the config updates sent to gardens."""
+
+import asyncio
+import itertools
+import logging
+from typing import Any, Awaitable, Callable, Dict, FrozenSet, List, Optional
+
+from .const import CONFIG_WRITE_WINDOW
+
+_LOGGER = logging.getLogger(__name__)
+
+Sender = Callable[[Dict[str, Dict[str, Any]]], Awaitable[Dict[str, Optional[str]]]]
+
+# The cloud toggles the light whenever lightTemp is sent, whatever its value
+TOGGLE_FIELDS: FrozenSet[str] = frozenset({"lightTemp"})
+
+
+class _PendingWrite:
+    """The merged config of one request to a garden, and who waits for it."""
+
+    __slots__ = ("config", "waiters")
+
+    def __init__(self) -> None:
+        self.config: Dict[str, Any] = {}
+        self.waiters: List[asyncio.Future] = []
+
+
+class ConfigWriteBuffer:
+    """Merge the config updates of each garden into one request per window.
+
+    Updates are held for ``window`` seconds, then every garden with pending
+    updates gets a single request carrying all of them, sent as one batch.
+    Within a request:
+
+    - updates are applied in the order they were made, so a field set twice
+      keeps the last value, and fields set once are all sent;
+    - a toggle field is never merged with itself: sending it once would
+      toggle once, so a second toggle waits for the next request to the
+      garden, which is sent after the first one completed.
+
+    Every update resolves to the error of the request that carried it, None
+    if that request succeeded, also when sending the batch raised. Updates
+    are only cancelled when the buffer itself is.
+    """
+
+    def __init__(self, send: Sender, window: float = CONFIG_WRITE_WINDOW) -> None:
+        self._send = send
+        self._window = window
+        # The requests waiting for each garden, oldest first
+        self._pending: Dict[str, List[_PendingWrite]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.writes = 0
+        self.requests = 0
+
+    async def async_write(self, macaddr: str, config: Dict[str, Any]) -> Optional[str]:
+        """Queue ``config`` for a garden and wait for the request carrying it."""
+        queue = self._pending.setdefault(macaddr, [])
+        if not queue or TOGGLE_FIELDS.intersection(queue[-1].config, config):
+            queue.append(_PendingWrite())
+        write = queue[-1]
+        write.config.update(config)
+        future = asyncio.get_running_loop().create_future()
+        write.waiters.append(future)
+        self.writes += 1
+
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._async_flush())
+        return await asyncio.shield(future)
+
+    async def _async_flush(self) -> None:
+        """Send one request per garden each window until nothing is pending."""
+        writes: Dict[str, _PendingWrite] = {}
+        try:
+            while self._pending:
+                await asyncio.sleep(self._window)
+                writes = {
+                    macaddr: queue.pop(0) for macaddr, queue in self._pending.items()
+                }
+                self._pending = {
+                    macaddr: queue for macaddr, queue in self._pending.items() if queue
+                }
+                self.requests += len(writes)
+                try:
+                    errors = await self._send(
+                        {macaddr: write.config for macaddr, write in writes.items()}
+                    )
+                except Exception as err:
+                    _LOGGER.exception("Error sending config updates")
+                    errors = dict.fromkeys(
+                        writes, f"Error sending the config update: {err}"
+                    )
+                for macaddr, write in writes.items():
+                    for future in write.waiters:
+                        future.set_result(errors.get(macaddr))
+                writes = {}
+        finally:
+            self._task = None
+            # Writes are only left over when the flush was cancelled
+            for write in itertools.chain(writes.values(), *self._pending.values()):
+                for future in write.waiters:
+                    if not future.done():
+                        future.cancel()
+            self._pending.clear()
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "writes": self.writes,
+            "requests": self.requests,
+            "pending": sum(len(queue) for queue in self._pending.values()),
+        }
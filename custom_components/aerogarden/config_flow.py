@@ -3,13 +3,23 @@ from typing import Any, Dict, Optional
 
 from homeassistant import config_entries
 from homeassistant.const import CONF_EMAIL, CONF_PASSWORD
-from homeassistant.core import HomeAssistant
+from homeassistant.core import callback
 from homeassistant.data_entry_flow import FlowResult
-from homeassistant.exceptions import ConfigEntryNotReady
 import voluptuous as vol
 
 from .api import AerogardenAPI
-from .const import DEFAULT_HOST, DOMAIN
+from .const import (
+    CONF_CAPTURE_PAYLOADS,
+    CONF_HEDGE_REQUESTS,
+    CONF_MAX_STALENESS,
+    CONF_RETRY_ATTEMPTS,
+    CONF_STREAM_RESPONSES,
+    CONF_USERID,
+    DEFAULT_HOST,
+    DOMAIN,
+    MAX_STALENESS,
+    RETRY_ATTEMPTS,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -40,8 +50,10 @@ class AerogardenConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                     await self.async_set_unique_id(email)
                     self._abort_if_unique_id_configured()
 
+                    # Setup starts from this login instead of logging in again
                     return self.async_create_entry(
-                        title=f"Aerogarden ({email})", data=user_input
+                        title=f"Aerogarden ({email})",
+                        data={**user_input, CONF_USERID: ag.userid},
                     )
                 else:
                     errors["base"] = "invalid_auth"
@@ -55,43 +67,49 @@ class AerogardenConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             errors=errors,
         )
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(
+        config_entry: config_entries.ConfigEntry,
+    ) -> config_entries.OptionsFlow:
+        return AerogardenOptionsFlow(config_entry)
 
-async def async_setup_entry(
-    hass: HomeAssistant, entry: config_entries.ConfigEntry
-) -> bool:
-    """Set up Aerogarden from a config entry."""
-    email = entry.data[CONF_EMAIL]
-    password = entry.data[CONF_PASSWORD]
-
-    ag = AerogardenAPI(hass, email, password, DEFAULT_HOST)
-
-    try:
-        is_valid = await ag.login()
-        if not is_valid:
-            raise ConfigEntryNotReady("Invalid login credentials")
-
-        await ag.update()
-    except Exception as e:
-        _LOGGER.error("Error setting up Aerogarden integration: %s", str(e))
-        raise ConfigEntryNotReady from e
-
-    hass.data.setdefault(DOMAIN, {})[entry.entry_id] = ag
-
-    await hass.config_entries.async_forward_entry_setups(
-        entry, ["sensor", "binary_sensor", "light"]
-    )
 
-    return True
+class AerogardenOptionsFlow(config_entries.OptionsFlow):
+    def __init__(self, config_entry: config_entries.ConfigEntry) -> None:
+        self._entry = config_entry
 
+    async def async_step_init(
+        self, user_input: Optional[Dict[str, Any]] = None
+    ) -> FlowResult:
+        if user_input is not None:
+            return self.async_create_entry(title="", data=user_input)
 
-async def async_unload_entry(
-    hass: HomeAssistant, entry: config_entries.ConfigEntry
-) -> bool:
-    """Unload a config entry."""
-    unload_ok = await hass.config_entries.async_unload_platforms(
-        entry, ["sensor", "binary_sensor", "light"]
-    )
-    if unload_ok:
-        hass.data[DOMAIN].pop(entry.entry_id)
-
-    return unload_ok
+        options = self._entry.options
+        return self.async_show_form(
+            step_id="init",
+            data_schema=vol.Schema(
+                {
+                    vol.Optional(
+                        CONF_CAPTURE_PAYLOADS,
+                        default=options.get(CONF_CAPTURE_PAYLOADS, False),
+                    ): bool,
+                    vol.Optional(
+                        CONF_RETRY_ATTEMPTS,
+                        default=options.get(CONF_RETRY_ATTEMPTS, RETRY_ATTEMPTS),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=1, max=5)),
+                    vol.Optional(
+                        CONF_STREAM_RESPONSES,
+                        default=options.get(CONF_STREAM_RESPONSES, False),
+                    ): bool,
+                    vol.Optional(
+                        CONF_HEDGE_REQUESTS,
+                        default=options.get(CONF_HEDGE_REQUESTS, False),
+                    ): bool,
+                    vol.Optional(
+                        CONF_MAX_STALENESS,
+                        default=options.get(CONF_MAX_STALENESS, MAX_STALENESS),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=1, max=1440)),
+                }
+            ),
+        )
@@ -1,10 +1,82 @@
 """Constants for the Aerogarden integration."""
 
-from datetime import timedelta
 from typing import Final
 
 DEFAULT_HOST: Final = "https://app4.aerogarden.com"
-MIN_TIME_BETWEEN_UPDATES = timedelta(seconds=30)
 DOMAIN: Final = "aerogarden"
 MANUFACTURER: Final = "Aerogarden"
 UPDATE_INTERVAL: float = 30.0
+# Poll faster for a while after a command, slower once nothing changes
+FAST_UPDATE_INTERVAL: float = 5.0
+FAST_POLL_WINDOW: float = 60.0
+IDLE_UPDATE_INTERVAL: float = 120.0
+IDLE_AFTER: float = 600.0
+MAX_BACKOFF_INTERVAL: float = 900.0
+# Light requests are merged for this long before a toggle is sent
+LIGHT_TOGGLE_DEBOUNCE: float = 1.0
+LIGHT_CONFIRM_TIMEOUT: float = FAST_POLL_WINDOW
+# Config updates of a batch sent at the same time, the scheduler limits the rest
+COMMAND_CONCURRENCY: Final = 4
+# Config updates made within this window are merged into one request per garden
+CONFIG_WRITE_WINDOW: float = 0.1
+
+# Shared by every request to the Aerogarden host, across config entries
+REQUEST_RATE: float = 2.0
+REQUEST_BURST: Final = 5
+MAX_CONCURRENT_REQUESTS: Final = 4
+# Connections of the integration's session are kept open between polls
+CONNECTION_LIMIT_PER_HOST: Final = 8
+KEEPALIVE_TIMEOUT: float = 2.5 * UPDATE_INTERVAL
+DNS_CACHE_TTL: Final = 300
+STARTUP_POLL_JITTER: float = 5.0
+STARTUP_WINDOW: float = 60.0
+
+# Transient failures of idempotent requests are retried with backoff
+RETRY_ATTEMPTS: Final = 3
+RETRY_BASE_DELAY: float = 1.0
+RETRY_MAX_DELAY: float = 10.0
+# Per attempt timeout and deadline across all attempts of each endpoint.
+# Commands get longer, they may still be applied after timing out
+ENDPOINT_TIMEOUTS: Final = {"login": 10.0, "status": 8.0, "update": 15.0}
+ENDPOINT_DEADLINES: Final = {"login": 30.0, "status": 20.0, "update": 15.0}
+DEFAULT_TIMEOUT: float = 10.0
+# A hedged poll is sent once the first one took longer than the p95 latency
+# of the last polls, after at least this many of them
+HEDGE_MIN_SAMPLES: Final = 20
+# While the cloud fails, entities keep the last good data for this long, in
+# minutes, before they become unavailable
+MAX_STALENESS: Final = 60
+# Fail fast after this many failed requests, probe again after the timeout
+BREAKER_FAILURE_THRESHOLD: Final = 5
+BREAKER_RESET_TIMEOUT: float = 60.0
+
+# Derived garden metrics cover this window, trends keep one sample per interval
+TELEMETRY_WINDOW: float = 86400.0
+TELEMETRY_SAMPLE_INTERVAL: float = 600.0
+TELEMETRY_MAX_SEGMENTS: Final = 1440
+# nutriRemindDay only changes once a day, its trend needs a longer window
+NUTRIENT_TREND_WINDOW: float = 7 * 86400.0
+NUTRIENT_SAMPLE_INTERVAL: float = 3600.0
+
+# Upper bounds, in seconds, of the request latency histogram buckets
+LATENCY_BUCKETS: Final = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Phase timings of the last refreshes kept for diagnostics
+REFRESH_HISTORY: Final = 50
+# The profile service runs at most this many refreshes and reports the top
+# functions and allocation sites
+PROFILE_MAX_POLLS: Final = 20
+PROFILE_TOP_ENTRIES: Final = 40
+
+STORAGE_VERSION: Final = 1
+STORAGE_SAVE_DELAY: float = 10.0
+
+CONF_CAPTURE_PAYLOADS: Final = "capture_payloads"
+CONF_HEDGE_REQUESTS: Final = "hedge_requests"
+CONF_MAX_STALENESS: Final = "max_staleness"
+CONF_RETRY_ATTEMPTS: Final = "retry_attempts"
+CONF_STREAM_RESPONSES: Final = "stream_responses"
+# The userID of the login that validated a new entry, until it is stored
+CONF_USERID: Final = "userid"
+PAYLOAD_CAPTURE_SIZE: Final = 10
+STREAM_CHUNK_SIZE: Final = 65536
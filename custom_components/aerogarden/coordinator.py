@@ -0,0 +1,310 @@
+"""Data update coordinator for the Aerogarden integration."""
+
+from collections import deque
+from contextlib import nullcontext
+from datetime import datetime, timedelta
+import itertools
+import logging
+import time
+from typing import Any, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.util import dt as dt_util
+
+from .api import AerogardenAPI
+from .const import DOMAIN, MAX_STALENESS, REFRESH_HISTORY, UPDATE_INTERVAL
+from .models import GardenState
+from .polling import AdaptivePollPolicy
+from .storage import AerogardenStore
+from .telemetry import TelemetryEngine
+from .timing import PhaseTimer
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def diff_gardens(
+    previous: Dict[str, GardenState], current: Dict[str, GardenState]
+) -> Set[Tuple[str, str]]:
+    """Return the (garden, field) pairs that differ between two snapshots."""
+    changed: Set[Tuple[str, str]] = set()
+    for macaddr, garden in current.items():
+        old = previous.get(macaddr)
+        if old is garden:
+            # Unchanged records are reused from the previous poll
+            continue
+        if old is None:
+            changed.update((macaddr, field) for field in garden.keys())
+        elif old != garden:
+            changed.update(
+                (macaddr, field)
+                for field in {*garden.keys(), *old.keys()}
+                if garden.get(field) != old.get(field)
+            )
+    for macaddr in previous.keys() - current.keys():
+        changed.update((macaddr, field) for field in previous[macaddr].keys())
+    return changed
+
+
+class AerogardenDataUpdateCoordinator(DataUpdateCoordinator[Dict[str, GardenState]]):
+    """Fetch every garden of an account once per interval and fan the result out."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        api: AerogardenAPI,
+        poll_policy: Optional[AdaptivePollPolicy] = None,
+        store: Optional[AerogardenStore] = None,
+    ) -> None:
+        """Initialize the coordinator."""
+        super().__init__(
+            hass,
+            _LOGGER,
+            name=DOMAIN,
+            update_interval=timedelta(seconds=UPDATE_INTERVAL),
+        )
+        self.api = api
+        self.poll_policy = poll_policy or AdaptivePollPolicy()
+        self.store = store
+        # True while the data is the snapshot restored from storage
+        self.restored = False
+        # When the cloud last answered a poll, and how long its data is
+        # served while polls fail, in seconds
+        self.last_successful_update: Optional[datetime] = None
+        self.max_staleness: float = MAX_STALENESS * 60
+        # Notifies the entities when the served data becomes too old
+        self._unsub_staleness: Optional[CALLBACK_TYPE] = None
+        self.startup_timer = PhaseTimer()
+        # Phase timings of the last refreshes, and of the one running
+        self.refresh_history: Deque[Dict[str, Any]] = deque(maxlen=REFRESH_HISTORY)
+        self._refresh_timer: Optional[PhaseTimer] = None
+        self.telemetry = TelemetryEngine()
+        # (garden, metric) pairs whose telemetry changed with the last refresh
+        self._telemetry_changed: Set[Tuple[str, str]] = set()
+        # (garden, field) pairs that changed in the last dispatched snapshot
+        self.changed_fields: Set[Tuple[str, str]] = set()
+        self._dispatched_data: Dict[str, GardenState] = {}
+        self._dispatched_success = True
+        self._dispatched_available = True
+        # Listeners by (garden, field) context, and those without a context,
+        # keyed by their remove callback like DataUpdateCoordinator._listeners
+        self._listeners_by_context: Dict[Any, Dict[CALLBACK_TYPE, CALLBACK_TYPE]] = {}
+        self._contextless_listeners: Dict[CALLBACK_TYPE, CALLBACK_TYPE] = {}
+
+    async def _async_update_data(self) -> Dict[str, GardenState]:
+        """Run a single QueryUserDevice call for the whole account."""
+        updated = await self.api.update()
+        if self._refresh_timer is not None and self.api.last_update_phases is not None:
+            self._refresh_timer.merge(self.api.last_update_phases)
+        if not updated:
+            # Keep serving the last data, and only probe until the cloud is back
+            self.api.probe_only = True
+            self._set_interval(self.poll_policy.record_failure())
+            raise UpdateFailed(self.api.error or "Error fetching Aerogarden data")
+        self.api.probe_only = False
+        self.last_successful_update = dt_util.utcnow()
+        changed = self.api.data != self.data
+        self._set_interval(self.poll_policy.record_success(changed))
+        self.restored = False
+        self._telemetry_changed = self.telemetry.update(self.api.data)
+        if self.store is not None:
+            self.store.async_set_userid(self.api.userid)
+            self.store.async_set_last_success(self.last_successful_update)
+            if changed:
+                self.store.async_set_gardens(self.api.data)
+        return self.api.data
+
+    async def _async_refresh(self, *args: Any, **kwargs: Any) -> None:
+        """Refresh and record how long each phase of the refresh took.
+
+        The network, decode and parse phases come from the API, the entity
+        writes phase covers the listener callbacks.
+        """
+        timer = self._refresh_timer = PhaseTimer()
+        started = dt_util.utcnow()
+        try:
+            await super()._async_refresh(*args, **kwargs)
+        finally:
+            self._refresh_timer = None
+            self.refresh_history.append(
+                {
+                    "started": started.isoformat(),
+                    "duration": round(time.perf_counter() - timer.started, 4),
+                    "success": self.last_update_success,
+                    "phases": timer.as_dict(),
+                }
+            )
+
+    @property
+    def degraded(self) -> bool:
+        """Return True while polls fail and the last good data is served."""
+        return not self.last_update_success and self.data is not None
+
+    @property
+    def staleness(self) -> Optional[float]:
+        """Return the age of the data in seconds, None if it is unknown."""
+        if self.last_successful_update is None:
+            return None
+        return (dt_util.utcnow() - self.last_successful_update).total_seconds()
+
+    @property
+    def available(self) -> bool:
+        """Return True while the data is no older than ``max_staleness``."""
+        if self.last_update_success:
+            return True
+        if self.data is None or (staleness := self.staleness) is None:
+            return False
+        return staleness <= self.max_staleness
+
+    async def async_shutdown(self) -> None:
+        """Cancel refresh and staleness timers."""
+        await super().async_shutdown()
+        self._cancel_staleness_timer()
+
+    @callback
+    def _async_track_staleness(self) -> None:
+        """Notify the listeners once when the served data becomes too old.
+
+        Failed polls do not notify the listeners while stale data is served,
+        the entities only need to know when it makes them unavailable.
+        """
+        if not self.degraded or not self._dispatched_available:
+            self._cancel_staleness_timer()
+            return
+        if self._unsub_staleness is not None or (staleness := self.staleness) is None:
+            return
+        self._unsub_staleness = async_call_later(
+            self.hass,
+            max(self.max_staleness - staleness, 0),
+            self._async_staleness_expired,
+        )
+
+    @callback
+    def _async_staleness_expired(self, _now: datetime) -> None:
+        self._unsub_staleness = None
+        self.async_update_listeners()
+
+    def _cancel_staleness_timer(self) -> None:
+        if self._unsub_staleness is not None:
+            self._unsub_staleness()
+            self._unsub_staleness = None
+
+    @callback
+    def async_restore(self) -> bool:
+        """Serve the snapshot saved by the last run until the first live refresh.
+
+        Nothing has been dispatched yet, so the first refresh notifies every
+        listener and clears the stale marker of every entity.
+        """
+        if self.store is None or not self.store.gardens:
+            return False
+        self.api.restore(self.store.gardens)
+        self.data = self.api.data
+        self.restored = True
+        # Stores saved before the poll time was kept only know the snapshot time
+        self.last_successful_update = self.store.last_success or self.store.updated
+        return True
+
+    @callback
+    def async_add_garden_listener(
+        self, add_gardens: Callable[[List[str]], None]
+    ) -> CALLBACK_TYPE:
+        """Call ``add_gardens`` with the gardens known now and every new one.
+
+        Platforms use it to create the entities of gardens that only appear
+        with a later refresh, such as the first one of a cold start.
+        """
+        added: Set[str] = set()
+
+        @callback
+        def add_new_gardens() -> None:
+            if new := [key for key in self.data or {} if key not in added]:
+                added.update(new)
+                add_gardens(new)
+
+        add_new_gardens()
+        return self.async_add_listener(add_new_gardens)
+
+    @callback
+    def async_note_command(self) -> None:
+        """Switch to fast polling after a command was sent to a garden."""
+        self._set_interval(self.poll_policy.note_command())
+        if self._listeners:
+            self._schedule_refresh()
+
+    async def async_apply_configs(
+        self, configs: Dict[str, Dict[str, Any]]
+    ) -> Dict[str, Optional[str]]:
+        """Send the config updates of many gardens, then refresh once to confirm them.
+
+        Returns the error of every garden, None for those that succeeded.
+        """
+        errors = await self.api.update_configs(configs)
+        if any(error is None for error in errors.values()):
+            self._set_interval(self.poll_policy.note_command())
+            await self.async_request_refresh()
+        return errors
+
+    def _set_interval(self, seconds: float) -> None:
+        self.update_interval = timedelta(seconds=seconds)
+
+    @callback
+    def async_add_listener(
+        self, update_callback: CALLBACK_TYPE, context: Any = None
+    ) -> Callable[[], None]:
+        """Listen for data updates, indexed by the (garden, field) context."""
+        remove_listener = super().async_add_listener(update_callback, context)
+        if context is None:
+            listeners = self._contextless_listeners
+        else:
+            listeners = self._listeners_by_context.setdefault(context, {})
+        listeners[remove_listener] = update_callback
+
+        @callback
+        def remove_indexed_listener() -> None:
+            remove_listener()
+            listeners.pop(remove_listener)
+            if context is not None and not listeners:
+                del self._listeners_by_context[context]
+
+        return remove_indexed_listener
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Notify only the listeners whose (garden, field or metric) context changed.
+
+        Listeners registered without a context are always called, and every
+        listener is called when the availability of the data changes: when
+        polls start or stop failing, and when the stale data served meanwhile
+        becomes too old. Otherwise the cost depends on the changed fields, not
+        on the number of entities.
+        """
+        data = self.data or {}
+        self.changed_fields = diff_gardens(self._dispatched_data, data)
+        telemetry_changed, self._telemetry_changed = self._telemetry_changed, set()
+        available = self.available
+        availability_changed = (
+            self.last_update_success != self._dispatched_success
+            or available != self._dispatched_available
+        )
+        self._dispatched_data = data
+        self._dispatched_success = self.last_update_success
+        self._dispatched_available = available
+
+        if availability_changed:
+            update_callbacks = [
+                update_callback
+                for update_callback, _context in self._listeners.values()
+            ]
+        else:
+            update_callbacks = list(self._contextless_listeners.values())
+            for context in itertools.chain(self.changed_fields, telemetry_changed):
+                if listeners := self._listeners_by_context.get(context):
+                    update_callbacks.extend(listeners.values())
+
+        timer = self._refresh_timer
+        with nullcontext() if timer is None else timer.phase("entity_writes"):
+            for update_callback in update_callbacks:
+                update_callback()
+        self._async_track_staleness()
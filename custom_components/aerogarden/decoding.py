@@ -0,0 +1,132 @@
+"""JSON decoding of Aerogarden cloud responses."""
+
+import codecs
+import json
+from typing import Any, Callable, Dict, List, Optional
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+Decoder = Callable[[bytes], Any]
+
+# Available decoders, fastest first. Every decoder raises a ValueError on
+# invalid input.
+DECODERS: Dict[str, Decoder] = {}
+if orjson is not None:
+    DECODERS["orjson"] = orjson.loads
+if ujson is not None:
+    DECODERS["ujson"] = ujson.loads
+DECODERS["json"] = json.loads
+
+DEFAULT_DECODER = next(iter(DECODERS))
+json_loads: Decoder = DECODERS[DEFAULT_DECODER]
+
+
+def get_decoder(name: Optional[str] = None) -> Decoder:
+    """Return the decoder called ``name``, or the fastest one available."""
+    return DECODERS[name or DEFAULT_DECODER]
+
+
+_START = 0
+_VALUE = 1
+_SEPARATOR = 2
+_DONE = 3
+_WHOLE = 4
+
+_WHITESPACE = " \t\n\r\ufeff"
+
+
+class StreamingArrayDecoder:
+    """Decode a JSON array chunk by chunk, one element at a time.
+
+    ``feed`` returns the elements completed by a chunk, so they can be
+    processed while the rest of the response is still being received, and
+    the buffer never holds more than one undecoded element. A document that
+    is not an array, such as an error object, is buffered and decoded by
+    ``close``.
+
+    With ``keep=False`` the elements are not kept once returned, and
+    ``close`` only returns those it completed itself.
+    """
+
+    def __init__(self, keep: bool = True) -> None:
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._state = _START
+        self._document: Any = None
+        self._keep = keep
+        self._count = 0
+        self.items: List[Any] = []
+
+    def feed(self, chunk: bytes) -> List[Any]:
+        self._buffer += self._text.decode(chunk)
+        return self._decode()
+
+    def close(self) -> Any:
+        """Return the decoded document, raising ValueError if it is incomplete."""
+        self._buffer += self._text.decode(b"", final=True)
+        decoded = self._decode()
+        if self._state == _WHOLE:
+            return json.loads(self._buffer)
+        if self._state != _DONE or self._buffer.strip(_WHITESPACE):
+            raise ValueError("Truncated or invalid JSON array")
+        return self.items if self._keep else decoded
+
+    def _decode(self) -> List[Any]:
+        buffer = self._buffer
+        position = 0
+        decoded: List[Any] = []
+        while self._state not in (_DONE, _WHOLE):
+            position = _skip_whitespace(buffer, position)
+            if position == len(buffer):
+                break
+            if self._state == _START:
+                if buffer[position] != "[":
+                    self._state = _WHOLE
+                    break
+                position += 1
+                self._state = _VALUE
+            elif self._state == _VALUE:
+                if buffer[position] == "]" and not self._count and not decoded:
+                    position += 1
+                    self._state = _DONE
+                    break
+                try:
+                    item, end = self._decoder.raw_decode(buffer, position)
+                except json.JSONDecodeError:
+                    break  # Wait for the rest of the element
+                # A number is only complete once the character after it arrived
+                if _skip_whitespace(buffer, end) == len(buffer):
+                    break
+                decoded.append(item)
+                position = end
+                self._state = _SEPARATOR
+            else:
+                if buffer[position] == ",":
+                    self._state = _VALUE
+                elif buffer[position] == "]":
+                    self._state = _DONE
+                else:
+                    raise ValueError(f"Unexpected {buffer[position]!r} in JSON array")
+                position += 1
+
+        if self._state != _WHOLE:
+            self._buffer = buffer[position:]
+        self._count += len(decoded)
+        if self._keep:
+            self.items.extend(decoded)
+        return decoded
+
+
+def _skip_whitespace(text: str, position: int) -> int:
+    while position < len(text) and text[position] in _WHITESPACE:
+        position += 1
+    return position
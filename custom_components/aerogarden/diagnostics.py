@@ -0,0 +1,77 @@
+"""Diagnostics support for the Aerogarden integration."""
+
+from typing import Any, Dict
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_EMAIL, CONF_PASSWORD
+from homeassistant.core import HomeAssistant
+
+from .const import CONF_USERID, DOMAIN
+
+TO_REDACT = {
+    CONF_EMAIL,
+    CONF_PASSWORD,
+    CONF_USERID,
+    "deviceID",
+    "deviceIP",
+    "mail",
+    "title",
+    "unique_id",
+    "userID",
+    "userPwd",
+}
+# A successful login answers with the userID as its code
+LOGIN_PATH = "/api/Admin/Login"
+LOGIN_TO_REDACT = TO_REDACT | {"code"}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> Dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    api = coordinator.api
+
+    capture = api.payload_capture
+    return {
+        "entry": async_redact_data(entry.as_dict(), TO_REDACT),
+        "gardens": async_redact_data(
+            {key: garden.as_dict() for key, garden in api.data.items()}, TO_REDACT
+        ),
+        "startup": coordinator.startup_timer.as_dict(),
+        "refreshes": list(coordinator.refresh_history),
+        "polling": coordinator.poll_policy.as_dict(),
+        "freshness": {
+            "last_successful_update": (
+                None
+                if coordinator.last_successful_update is None
+                else coordinator.last_successful_update.isoformat()
+            ),
+            "staleness": coordinator.staleness,
+            "degraded": coordinator.degraded,
+            "available": coordinator.available,
+        },
+        "parsing": api.parsing,
+        "requests": api.metrics.as_dict(),
+        "request_scheduler": api.scheduler.as_dict(),
+        "connections": api.connections.as_dict(),
+        "coalescing": api.coalescing,
+        "config_writes": api.config_writes.as_dict(),
+        "circuit_breaker": api.breaker.as_dict(),
+        "payload_capture": (
+            None
+            if capture is None
+            else [
+                async_redact_data(
+                    payload,
+                    (
+                        LOGIN_TO_REDACT
+                        if payload["url"].endswith(LOGIN_PATH)
+                        else TO_REDACT
+                    ),
+                )
+                for payload in capture.as_dict()
+            ]
+        ),
+    }
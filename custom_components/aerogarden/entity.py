@@ -0,0 +1,103 @@
+"""Base entity for the Aerogarden integration."""
+
+from typing import Any, Dict, Optional, Tuple
+
+from homeassistant.core import callback
+from homeassistant.helpers.device_registry import DeviceEntryType
+from homeassistant.helpers.entity import DeviceInfo, EntityCategory
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+from .const import DOMAIN, MANUFACTURER
+from .coordinator import AerogardenDataUpdateCoordinator
+
+
+class AerogardenEntity(CoordinatorEntity[AerogardenDataUpdateCoordinator]):
+    """An entity that reads one field of one garden from the coordinator.
+
+    The (garden, field) pair is the listener context, so the entity only
+    writes its state when that field changes.
+    """
+
+    def __init__(
+        self, coordinator: AerogardenDataUpdateCoordinator, macaddr: str, field: str
+    ) -> None:
+        """Initialize the entity."""
+        super().__init__(coordinator, context=(macaddr, field))
+        self._aerogarden = coordinator.api
+        self._macaddr = macaddr
+        self._field = field
+
+    @property
+    def available(self) -> bool:
+        """Stay available on the last good data until it is too old."""
+        return self.coordinator.available
+
+    @property
+    def extra_state_attributes(self) -> Optional[Dict[str, Any]]:
+        """Mark states the cloud has not confirmed, restored or served while it fails."""
+        coordinator = self.coordinator
+        if not coordinator.restored and not coordinator.degraded:
+            return None
+        attributes: Dict[str, Any] = {"stale": True}
+        if coordinator.last_successful_update is not None:
+            attributes["last_successful_update"] = (
+                coordinator.last_successful_update.isoformat()
+            )
+        return attributes
+
+    @property
+    def device_info(self) -> DeviceInfo:
+        """Return device information about this Aerogarden device."""
+        if (garden := self._aerogarden.garden(self._macaddr)) is not None:
+            return garden.device_info
+        return DeviceInfo(
+            identifiers={(DOMAIN, self._macaddr)},
+            manufacturer=MANUFACTURER,
+            model="Aerogarden",
+        )
+
+
+class AerogardenAccountEntity(CoordinatorEntity[AerogardenDataUpdateCoordinator]):
+    """A diagnostic entity describing the account connection itself.
+
+    It listens to every refresh, but only writes its state when the state or
+    its attributes changed, so an unchanged poll writes nothing. Counters
+    that change with every request belong in the diagnostics download.
+    """
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+
+    def __init__(
+        self, coordinator: AerogardenDataUpdateCoordinator, label: str
+    ) -> None:
+        """Initialize the entity."""
+        super().__init__(coordinator)
+        self._aerogarden = coordinator.api
+        entry = coordinator.config_entry
+        self._entry_id = entry.entry_id if entry else DOMAIN
+        self._title = entry.title if entry else MANUFACTURER
+        self._attr_name = f"{self._title} {label}"
+        self._attr_unique_id = f"{self._entry_id}_{label}"
+        self._written: Optional[Tuple[Any, Any]] = None
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write the state only when it changed since the last write."""
+        if (state := (self.state, self.extra_state_attributes)) != self._written:
+            self._written = state
+            self.async_write_ha_state()
+
+    @property
+    def available(self) -> bool:
+        """Diagnostics stay available while the cloud is failing."""
+        return True
+
+    @property
+    def device_info(self) -> DeviceInfo:
+        """Return the service device that groups the account diagnostics."""
+        return DeviceInfo(
+            identifiers={(DOMAIN, self._entry_id)},
+            name=self._title,
+            manufacturer=MANUFACTURER,
+            entry_type=DeviceEntryType.SERVICE,
+        )
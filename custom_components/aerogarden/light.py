@@ -1,12 +1,15 @@
 import logging
+from typing import List, Optional
 
 from homeassistant.components.light import LightEntity
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers.entity import DeviceInfo
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.debounce import Debouncer
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.event import async_call_later
 
-from .const import DOMAIN
+from .const import DOMAIN, LIGHT_CONFIRM_TIMEOUT, LIGHT_TOGGLE_DEBOUNCE
+from .entity import AerogardenEntity
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -15,50 +18,122 @@ async def async_setup_entry(
     hass: HomeAssistant, entry: ConfigEntry, async_add_entities: AddEntitiesCallback
 ) -> None:
     """Set up the Aerogarden light platform."""
-    aerogarden_api = hass.data[DOMAIN][entry.entry_id]
-    lights = []
+    coordinator = hass.data[DOMAIN][entry.entry_id]
 
-    for garden in aerogarden_api.gardens:
-        lights.append(AerogardenLight(garden, aerogarden_api))
+    @callback
+    def async_add_gardens(gardens: List[str]) -> None:
+        async_add_entities([AerogardenLight(coordinator, garden) for garden in gardens])
 
-    async_add_entities(lights, True)
+    entry.async_on_unload(coordinator.async_add_garden_listener(async_add_gardens))
 
 
-class AerogardenLight(LightEntity):
-    """Representation of an Aerogarden light."""
+class AerogardenLight(AerogardenEntity, LightEntity):
+    """Representation of an Aerogarden light.
 
-    def __init__(self, macaddr, aerogarden_api, field="lightStat", label="light"):
+    The cloud only offers a toggle, so turn on/off requests update the state
+    optimistically and are debounced: once a burst of requests settles, the
+    light is toggled only if the requested state differs from the state it is
+    expected to be in. The regular (fast) poll confirms the change.
+    """
+
+    def __init__(self, coordinator, macaddr, field="lightStat", label="light"):
         """Initialize the light."""
-        self._aerogarden = aerogarden_api
-        self._macaddr = macaddr
-        self._field = field
+        super().__init__(coordinator, macaddr, field)
         self._attr_name = f"{DOMAIN} {self._aerogarden.garden_property(self._macaddr, 'plantedName')} {label}"
         self._attr_unique_id = f"{self._macaddr}_{label}"
-        self._attr_is_on = False
+        # State requested by the user, shown until the cloud confirms it
+        self._target: Optional[bool] = None
+        # State the light should be in after the toggles already sent
+        self._expected: Optional[bool] = None
+        self._unsub_confirm_timeout: Optional[CALLBACK_TYPE] = None
+        self._toggle_debouncer = Debouncer(
+            coordinator.hass,
+            _LOGGER,
+            cooldown=LIGHT_TOGGLE_DEBOUNCE,
+            immediate=False,
+            function=self._async_apply_target,
+        )
 
     @property
-    def device_info(self) -> DeviceInfo:
-        """Return device information about this Aerogarden device."""
-        return DeviceInfo(
-            identifiers={(DOMAIN, self._macaddr)},
-            name=self._aerogarden.garden_property(self._macaddr, "plantedName"),
-            manufacturer="Aerogarden",
-            model="Aerogarden",  # You might want to get the actual model if available
-        )
+    def is_on(self) -> bool:
+        """Return true if the light is on."""
+        if self._target is not None:
+            return self._target
+        return self._confirmed_is_on()
+
+    def _confirmed_is_on(self) -> bool:
+        return self._aerogarden.garden_property(self._macaddr, self._field) == 1
 
     async def async_turn_on(self, **kwargs):
         """Turn the light on."""
-        await self._aerogarden.light_toggle(self._macaddr)
-        self._attr_is_on = True
+        await self._async_request(True)
 
     async def async_turn_off(self, **kwargs):
         """Turn the light off."""
-        await self._aerogarden.light_toggle(self._macaddr)
-        self._attr_is_on = False
-
-    async def async_update(self) -> None:
-        """Fetch new state data for the light."""
-        await self._aerogarden.throttled_update()
-        self._attr_is_on = (
-            self._aerogarden.garden_property(self._macaddr, self._field) == 1
+        await self._async_request(False)
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Cancel pending toggles and confirmation timers."""
+        await super().async_will_remove_from_hass()
+        self._toggle_debouncer.async_shutdown()
+        self._cancel_confirm_timeout()
+
+    async def _async_request(self, is_on: bool) -> None:
+        self._target = is_on
+        self.async_write_ha_state()
+        await self._toggle_debouncer.async_call()
+
+    async def _async_apply_target(self) -> None:
+        """Send the toggle needed to reach the last requested state, if any."""
+        target = self._target
+        if target is None:
+            return
+
+        current = (
+            self._expected if self._expected is not None else self._confirmed_is_on()
+        )
+        if target == current:
+            if self._expected is None:
+                self._target = None
+            return
+
+        if not await self._aerogarden.light_toggle(self._macaddr):
+            _LOGGER.error(
+                "Failed to toggle light %s: %s", self._macaddr, self._aerogarden.error
+            )
+            self._target = None
+            self._expected = None
+            self.async_write_ha_state()
+            return
+
+        self._expected = target
+        self._cancel_confirm_timeout()
+        self._unsub_confirm_timeout = async_call_later(
+            self.hass, LIGHT_CONFIRM_TIMEOUT, self._async_confirm_timeout
         )
+        # The next regular refresh, now on the fast interval, confirms the toggle
+        self.coordinator.async_note_command()
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Drop the optimistic state once the cloud reports it."""
+        confirmed = self._confirmed_is_on()
+        if self._expected is not None and confirmed == self._expected:
+            self._expected = None
+            self._cancel_confirm_timeout()
+            if self._target == confirmed:
+                self._target = None
+        super()._handle_coordinator_update()
+
+    @callback
+    def _async_confirm_timeout(self, _now) -> None:
+        """Fall back to the reported state when a toggle was never confirmed."""
+        self._unsub_confirm_timeout = None
+        self._expected = None
+        self._target = None
+        self.async_write_ha_state()
+
+    def _cancel_confirm_timeout(self) -> None:
+        if self._unsub_confirm_timeout is not None:
+            self._unsub_confirm_timeout()
+            self._unsub_confirm_timeout = None
@@ -0,0 +1,159 @@
+"""Counters, latency histograms and response sizes of cloud requests."""
+
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional, Sequence
+
+from .const import LATENCY_BUCKETS
+
+ERROR_CANCELLED = "cancelled"
+ERROR_CIRCUIT_OPEN = "circuit_open"
+ERROR_CLIENT = "client_error"
+ERROR_DECODE = "decode"
+ERROR_TIMEOUT = "timeout"
+
+
+def http_error(status: int) -> str:
+    return f"http_{status}"
+
+
+class LatencyHistogram:
+    """Count latencies into fixed buckets, in seconds.
+
+    Recording is a bisect and a few additions, percentiles are estimated from
+    the bucket bounds when they are read.
+    """
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS) -> None:
+        self._buckets = tuple(buckets)
+        self.counts: List[int] = [0] * (len(self._buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float) -> None:
+        self.counts[bisect_left(self._buckets, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """Return the upper bound of the bucket holding the ``pct`` percentile."""
+        if not self.count:
+            return None
+        rank = pct / 100 * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                return self._buckets[index] if index < len(self._buckets) else self.max
+        return self.max
+
+    def as_dict(self) -> Dict[str, Any]:
+        bounds = [f"le_{bucket:g}" for bucket in self._buckets] + ["le_inf"]
+        return {
+            "count": self.count,
+            "mean": round(self.total / self.count, 4) if self.count else None,
+            "max": round(self.max, 4),
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "buckets": dict(zip(bounds, self.counts)),
+        }
+
+
+class EndpointMetrics:
+    """What happened to the requests sent to one endpoint."""
+
+    def __init__(self) -> None:
+        self.requests = 0
+        self.failures: Dict[str, int] = {}
+        self.retries = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.latency = LatencyHistogram()
+        self.answered_latency = LatencyHistogram()
+        self.response_bytes = 0
+        self.last_response_bytes = 0
+        self.max_response_bytes = 0
+        self.decode_seconds = 0.0
+        self.last_decode = 0.0
+
+    def record(
+        self, latency: Optional[float], size: int, error: Optional[str] = None
+    ) -> None:
+        """Record one attempt. ``latency`` is None if it was never sent.
+
+        Timed out attempts count in the latency at the time they gave up,
+        cancelled ones were cut short by a hedge or a shutdown and do not.
+        Hedges are timed from ``answered_latency``, which leaves the timed
+        out attempts out too: waiting for them is what hedging avoids.
+        """
+        self.requests += 1
+        if latency is not None and error != ERROR_CANCELLED:
+            self.latency.record(latency)
+            if error != ERROR_TIMEOUT:
+                self.answered_latency.record(latency)
+        if size:
+            self.response_bytes += size
+            self.last_response_bytes = size
+            if size > self.max_response_bytes:
+                self.max_response_bytes = size
+        if error is not None:
+            self.failures[error] = self.failures.get(error, 0) + 1
+
+    def record_decode(self, seconds: float) -> None:
+        """Record the time spent decoding a response body."""
+        self.decode_seconds += seconds
+        self.last_decode = seconds
+
+    @property
+    def failed(self) -> int:
+        """Return the failed requests, not counting the cancelled ones.
+
+        Requests are cancelled when a hedged request answered first, or on
+        shutdown, neither says anything about the cloud.
+        """
+        return sum(
+            count for error, count in self.failures.items() if error != ERROR_CANCELLED
+        )
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "failed": self.failed,
+            "failures": dict(self.failures),
+            "retries": self.retries,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "latency": self.latency.as_dict(),
+            "answered_latency": self.answered_latency.as_dict(),
+            "response_bytes": self.response_bytes,
+            "last_response_bytes": self.last_response_bytes,
+            "max_response_bytes": self.max_response_bytes,
+            "decode_seconds": round(self.decode_seconds, 4),
+            "last_decode": round(self.last_decode, 4),
+        }
+
+
+class RequestMetrics:
+    """Request metrics of one account, by endpoint name."""
+
+    def __init__(self, endpoints: Dict[str, str]) -> None:
+        """``endpoints`` maps each URL to the name it is reported under."""
+        self._endpoints = endpoints
+        self.endpoints: Dict[str, EndpointMetrics] = {
+            name: EndpointMetrics() for name in endpoints.values()
+        }
+
+    def endpoint(self, url: str) -> EndpointMetrics:
+        name = self._endpoints.get(url, "other")
+        if (metrics := self.endpoints.get(name)) is None:
+            metrics = self.endpoints[name] = EndpointMetrics()
+        return metrics
+
+    @property
+    def failed(self) -> int:
+        return sum(metrics.failed for metrics in self.endpoints.values())
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {name: metrics.as_dict() for name, metrics in self.endpoints.items()}
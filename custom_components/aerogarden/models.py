@@ -0,0 +1,162 @@
+"""Parsed state of the gardens reported by the Aerogarden cloud."""
+
+import base64
+from dataclasses import dataclass, field, fields
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from homeassistant.helpers.entity import DeviceInfo
+
+from .const import DOMAIN, MANUFACTURER
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+_UNSET: Any = object()
+
+
+def fingerprint(raw: Dict[str, Any]) -> Optional[Hashable]:
+    """Return a key equal only for identical raw records, None if there is none.
+
+    The cloud reports fields in a stable order, so a record that did not
+    change between polls has the same key. Unlike Python's hash, which is
+    equal for -1 and -2 or for 1, 1.0 and True, the key tells them apart: it
+    is the JSON of the record, or its items with the type of each value.
+    """
+    try:
+        if orjson is not None:
+            return orjson.dumps(raw)
+        key = tuple([(name, value.__class__, value) for name, value in raw.items()])
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+def garden_key(raw: Dict[str, Any]) -> str:
+    """Return the ``airGuid-configID`` key identifying a garden."""
+    config_id = raw.get("configID")
+    return f"{raw['airGuid']}-{'' if config_id is None else str(config_id)}"
+
+
+@dataclass(slots=True)
+class GardenState:
+    """One garden as reported by QueryUserDevice, parsed once per poll.
+
+    Fields the cloud did not report are None; fields this model does not know
+    about are kept in ``extra``. The display name and device info are built on
+    first use and carried over to the next poll while their inputs are equal.
+    """
+
+    key: str
+    configID: Optional[int] = None
+    airGuid: Optional[str] = None
+    chooseGarden: Optional[int] = None
+    plantedName: Optional[str] = None
+    plantedType: Optional[int] = None
+    plantedDay: Optional[int] = None
+    plantedDate: Optional[str] = None
+    oldPlantedDay: Optional[int] = None
+    totalDay: Optional[int] = None
+    lightStat: Optional[int] = None
+    lightTemp: Optional[int] = None
+    lcTemp: Optional[int] = None
+    clock: Optional[int] = None
+    pumpStat: Optional[int] = None
+    pumpHydro: Optional[int] = None
+    pumpLevel: Optional[int] = None
+    nutriStatus: Optional[int] = None
+    nutriRemindDay: Optional[int] = None
+    nutrientDate: Optional[str] = None
+    alarmAllow: Optional[int] = None
+    updateDate: Optional[str] = None
+    createDate: Optional[str] = None
+    swVersion: Optional[str] = None
+    hwVersion: Optional[str] = None
+    bwVersion: Optional[str] = None
+    deviceID: Optional[str] = None
+    deviceIP: Optional[str] = None
+    extra: Optional[Dict[str, Any]] = None
+    _name: Any = field(default=_UNSET, init=False, repr=False, compare=False)
+    _device_info: Any = field(default=_UNSET, init=False, repr=False, compare=False)
+
+    @classmethod
+    def from_cloud(
+        cls, raw: Dict[str, Any], previous: Optional["GardenState"] = None
+    ) -> "GardenState":
+        """Parse a raw QueryUserDevice record without modifying it."""
+        known, extra = _split_fields(raw)
+        if (planted_name := known.get("plantedName")) is not None:
+            known["plantedName"] = base64.b64decode(planted_name).decode("utf-8")
+
+        state = cls(key=garden_key(raw), extra=extra or None, **known)
+        if (
+            previous is not None
+            and previous.key == state.key
+            and previous.plantedName == state.plantedName
+            and previous.chooseGarden == state.chooseGarden
+        ):
+            state._name = previous._name
+            state._device_info = previous._device_info
+        return state
+
+    @classmethod
+    def from_snapshot(cls, key: str, data: Dict[str, Any]) -> "GardenState":
+        """Rebuild a garden saved with ``as_dict``."""
+        known, extra = _split_fields(data)
+        return cls(key=key, extra=extra or None, **known)
+
+    def get(self, name: str, default: Any = None) -> Any:
+        """Return a cloud field by name, like ``dict.get`` on the raw record."""
+        if name in CLOUD_FIELDS:
+            value = getattr(self, name)
+            return default if value is None else value
+        if self.extra is not None:
+            return self.extra.get(name, default)
+        return default
+
+    def keys(self) -> Tuple[str, ...]:
+        return CLOUD_FIELD_NAMES + (tuple(self.extra) if self.extra else ())
+
+    def as_dict(self) -> Dict[str, Any]:
+        data = {name: getattr(self, name) for name in CLOUD_FIELD_NAMES}
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    @property
+    def name(self) -> Optional[str]:
+        """Return the display name, suffixed with the side of a dual garden."""
+        if self._name is _UNSET:
+            if self.chooseGarden is None:
+                self._name = self.plantedName
+            else:
+                side = "left" if self.chooseGarden == 0 else "right"
+                self._name = f"{self.plantedName}_{side}"
+        return self._name
+
+    @property
+    def device_info(self) -> DeviceInfo:
+        if self._device_info is _UNSET:
+            self._device_info = DeviceInfo(
+                identifiers={(DOMAIN, self.key)},
+                name=self.name,
+                manufacturer=MANUFACTURER,
+                model="Aerogarden",  # You might want to get the actual model if available
+            )
+        return self._device_info
+
+
+def _split_fields(data: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    known: Dict[str, Any] = {}
+    extra: Dict[str, Any] = {}
+    for name, value in data.items():
+        (known if name in CLOUD_FIELDS else extra)[name] = value
+    return known, extra
+
+
+CLOUD_FIELD_NAMES: Tuple[str, ...] = tuple(
+    f.name for f in fields(GardenState) if f.name not in ("key", "extra") and f.init
+)
+CLOUD_FIELDS = frozenset(CLOUD_FIELD_NAMES)
@@ -0,0 +1,102 @@
+"""Adaptive poll interval for the Aerogarden cloud."""
+
+import random
+import time
+from typing import Any, Callable, Dict
+
+from .const import (
+    FAST_POLL_WINDOW,
+    FAST_UPDATE_INTERVAL,
+    IDLE_AFTER,
+    IDLE_UPDATE_INTERVAL,
+    MAX_BACKOFF_INTERVAL,
+    UPDATE_INTERVAL,
+)
+
+MODE_NORMAL = "normal"
+MODE_FAST = "fast"
+MODE_IDLE = "idle"
+MODE_BACKOFF = "backoff"
+
+
+class AdaptivePollPolicy:
+    """Pick the delay until the next poll from what the last polls saw.
+
+    Polls run every ``fast`` seconds for ``fast_window`` seconds after a
+    command, slow down to ``idle`` once nothing has changed for ``idle_after``
+    seconds, and back off exponentially (with jitter) while polls fail.
+    """
+
+    def __init__(
+        self,
+        base: float = UPDATE_INTERVAL,
+        fast: float = FAST_UPDATE_INTERVAL,
+        idle: float = IDLE_UPDATE_INTERVAL,
+        fast_window: float = FAST_POLL_WINDOW,
+        idle_after: float = IDLE_AFTER,
+        max_backoff: float = MAX_BACKOFF_INTERVAL,
+        jitter: float = 0.1,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._base = base
+        self._fast = fast
+        self._idle = idle
+        self._fast_window = fast_window
+        self._idle_after = idle_after
+        self._max_backoff = max_backoff
+        self._jitter = jitter
+        self._clock = clock
+
+        self._fast_until = 0.0
+        self._last_change = clock()
+        self.consecutive_failures = 0
+        self.poll_count = 0
+        self.failed_polls = 0
+        self.mode = MODE_NORMAL
+        self.interval = base
+
+    def note_command(self) -> float:
+        """Poll quickly for a while so the result of a command shows up soon."""
+        self._fast_until = self._clock() + self._fast_window
+        return self._next_interval()
+
+    def record_success(self, changed: bool) -> float:
+        self.poll_count += 1
+        self.consecutive_failures = 0
+        if changed:
+            self._last_change = self._clock()
+        return self._next_interval()
+
+    def record_failure(self) -> float:
+        self.poll_count += 1
+        self.failed_polls += 1
+        self.consecutive_failures += 1
+        return self._next_interval()
+
+    def _next_interval(self) -> float:
+        now = self._clock()
+        if self.consecutive_failures:
+            self.mode = MODE_BACKOFF
+            backoff = self._base * 2 ** (self.consecutive_failures - 1)
+            interval = min(backoff, self._max_backoff)
+            interval *= random.uniform(1 - self._jitter, 1 + self._jitter)
+        elif now < self._fast_until:
+            self.mode = MODE_FAST
+            interval = self._fast
+        elif now - self._last_change >= self._idle_after:
+            self.mode = MODE_IDLE
+            interval = self._idle
+        else:
+            self.mode = MODE_NORMAL
+            interval = self._base
+        self.interval = interval
+        return interval
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "interval": round(self.interval, 1),
+            "poll_count": self.poll_count,
+            "failed_polls": self.failed_polls,
+            "consecutive_failures": self.consecutive_failures,
+        }
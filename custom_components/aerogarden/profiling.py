@@ -0,0 +1,79 @@
+"""On-demand CPU and memory profiling of coordinator refreshes."""
+
+import cProfile
+from contextlib import contextmanager
+import io
+import pstats
+import tracemalloc
+from typing import Any, Dict, Iterator, List, Optional
+
+from .const import PROFILE_TOP_ENTRIES
+
+
+class RefreshProfiler:
+    """Profile refreshes with cProfile and tracemalloc, and report on them.
+
+    cProfile only sees the thread it was enabled in, the event loop, so the
+    report covers everything the loop ran while a refresh was profiled.
+    tracemalloc is started by the first profiled refresh unless something
+    else is already tracing, and stopped by ``report``.
+    """
+
+    def __init__(self, top: int = PROFILE_TOP_ENTRIES) -> None:
+        self._top = top
+        self._profile = cProfile.Profile()
+        self._started_tracemalloc = False
+        self._baseline: Optional[tracemalloc.Snapshot] = None
+        self.refreshes: List[Dict[str, Any]] = []
+
+    @contextmanager
+    def profile(self) -> Iterator[None]:
+        if self._baseline is None:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracemalloc = True
+            self._baseline = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        self._profile.enable()
+        try:
+            yield
+        finally:
+            self._profile.disable()
+
+    def add_refresh(self, name: str, refresh: Dict[str, Any]) -> None:
+        """Add the phase timings of a profiled refresh to the report."""
+        self.refreshes.append(
+            {"name": name, **refresh, "peak_bytes": tracemalloc.get_traced_memory()[1]}
+        )
+
+    def report(self) -> str:
+        """Return the report, stopping tracemalloc if it was started here.
+
+        Taking the memory snapshot is slow, call this from an executor.
+        """
+        out = io.StringIO()
+        out.write(f"Aerogarden refresh profile, {len(self.refreshes)} refreshes\n\n")
+        out.write("Phases (seconds)\n")
+        for refresh in self.refreshes:
+            phases = ", ".join(
+                f"{name} {phase['duration']}"
+                for name, phase in refresh["phases"].items()
+            )
+            out.write(
+                f"  {refresh['name']} {refresh['started']}: {refresh['duration']}"
+                f" total, success {refresh['success']},"
+                f" peak {refresh['peak_bytes']} bytes traced; {phases}\n"
+            )
+
+        out.write(f"\nTop {self._top} functions by cumulative time\n")
+        stats = pstats.Stats(self._profile, stream=out)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(self._top)
+
+        if self._baseline is not None and tracemalloc.is_tracing():
+            snapshot = tracemalloc.take_snapshot()
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+            out.write(f"Top {self._top} allocation sites still held after profiling\n")
+            for stat in snapshot.compare_to(self._baseline, "lineno")[: self._top]:
+                out.write(f"  {stat}\n")
+        return out.getvalue()
@@ -0,0 +1,116 @@
+"""Retry policy and circuit breaker for requests to the Aerogarden cloud."""
+
+from dataclasses import dataclass
+import random
+import time
+from typing import Any, Callable, Dict, Optional
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import (
+    BREAKER_FAILURE_THRESHOLD,
+    BREAKER_RESET_TIMEOUT,
+    DOMAIN,
+    RETRY_ATTEMPTS,
+    RETRY_BASE_DELAY,
+    RETRY_MAX_DELAY,
+)
+
+BREAKER_CLOSED = "closed"
+BREAKER_OPEN = "open"
+BREAKER_HALF_OPEN = "half_open"
+BREAKER_STATES = [BREAKER_CLOSED, BREAKER_OPEN, BREAKER_HALF_OPEN]
+
+DATA_BREAKERS = f"{DOMAIN}_circuit_breakers"
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """How often, and after how long, a transient failure is retried."""
+
+    attempts: int = RETRY_ATTEMPTS
+    base_delay: float = RETRY_BASE_DELAY
+    max_delay: float = RETRY_MAX_DELAY
+    jitter: float = 0.5
+
+    def delay(self, attempt: int) -> float:
+        """Return the pause after the failed ``attempt`` (starting at 1)."""
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        return delay * random.uniform(1 - self.jitter, 1)
+
+
+@callback
+def async_get_circuit_breaker(hass: HomeAssistant, host: str) -> "CircuitBreaker":
+    """Return the breaker shared by every config entry talking to ``host``."""
+    breakers = hass.data.setdefault(DATA_BREAKERS, {})
+    if (breaker := breakers.get(host)) is None:
+        breaker = breakers[host] = CircuitBreaker()
+    return breaker
+
+
+class CircuitBreaker:
+    """Fail fast while the cloud is down.
+
+    After ``failure_threshold`` consecutive failed requests the breaker opens
+    and rejects requests for ``reset_timeout`` seconds. It then lets a single
+    probe through (half open): success closes it, failure opens it again.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+        reset_timeout: float = BREAKER_RESET_TIMEOUT,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._clock = clock
+        self._opened_at: Optional[float] = None
+        self._probe_in_flight = False
+        self.state = BREAKER_CLOSED
+        self.failures = 0
+        self.rejected = 0
+        self.times_opened = 0
+
+    def allow_request(self) -> bool:
+        if self.state == BREAKER_OPEN and (
+            self._clock() - self._opened_at >= self._reset_timeout
+        ):
+            self.state = BREAKER_HALF_OPEN
+        if self.state == BREAKER_HALF_OPEN and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+        if self.state == BREAKER_CLOSED:
+            return True
+        self.rejected += 1
+        return False
+
+    @property
+    def probing(self) -> bool:
+        return self.state == BREAKER_HALF_OPEN
+
+    def record_success(self) -> None:
+        self.state = BREAKER_CLOSED
+        self.failures = 0
+        self._probe_in_flight = False
+
+    def release_probe(self) -> None:
+        """Let another probe through when the current one was abandoned."""
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state == BREAKER_HALF_OPEN or self.failures >= self._failure_threshold:
+            if self.state != BREAKER_OPEN:
+                self.times_opened += 1
+            self.state = BREAKER_OPEN
+            self._opened_at = self._clock()
+        self._probe_in_flight = False
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "rejected_requests": self.rejected,
+            "times_opened": self.times_opened,
+        }
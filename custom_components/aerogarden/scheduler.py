@@ -0,0 +1,166 @@
+"""Process-wide request scheduling for the Aerogarden cloud."""
+
+import asyncio
+from contextlib import asynccontextmanager
+import heapq
+import itertools
+import random
+import time
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import (
+    DOMAIN,
+    MAX_CONCURRENT_REQUESTS,
+    REQUEST_BURST,
+    REQUEST_RATE,
+    STARTUP_POLL_JITTER,
+    STARTUP_WINDOW,
+)
+
+PRIORITY_COMMAND = 0
+PRIORITY_POLL = 1
+
+DATA_SCHEDULERS = f"{DOMAIN}_request_schedulers"
+
+
+@callback
+def async_get_request_scheduler(hass: HomeAssistant, host: str) -> "RequestScheduler":
+    """Return the scheduler shared by every config entry talking to ``host``."""
+    schedulers = hass.data.setdefault(DATA_SCHEDULERS, {})
+    if (scheduler := schedulers.get(host)) is None:
+        scheduler = schedulers[host] = RequestScheduler()
+    return scheduler
+
+
+class RequestScheduler:
+    """A token bucket plus a concurrency cap for the requests to one host.
+
+    Requests wait in a priority queue, so commands are sent before polls
+    that were queued earlier. While the scheduler is young and already busy,
+    polls are delayed by a random jitter so that accounts restarting together
+    do not all hit the cloud in the same second.
+    """
+
+    def __init__(
+        self,
+        rate: float = REQUEST_RATE,
+        burst: int = REQUEST_BURST,
+        max_concurrent: int = MAX_CONCURRENT_REQUESTS,
+        startup_jitter: float = STARTUP_POLL_JITTER,
+        startup_window: float = STARTUP_WINDOW,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._rate = rate
+        self._burst = burst
+        self._max_concurrent = max_concurrent
+        self._startup_jitter = startup_jitter
+        self._clock = clock
+        self._startup_until = clock() + startup_window
+
+        self._tokens = float(burst)
+        self._refilled_at = clock()
+        self._active = 0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._wakeup: Optional[asyncio.TimerHandle] = None
+
+        self.queue_depth = 0
+        self.requests = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    @asynccontextmanager
+    async def slot(self, priority: int = PRIORITY_POLL) -> AsyncIterator[None]:
+        """Wait for permission to send one request and hold it while sending."""
+        if (
+            priority != PRIORITY_COMMAND
+            and self._startup_jitter
+            and (self._active or self.queue_depth)
+            and self._clock() < self._startup_until
+        ):
+            await asyncio.sleep(random.uniform(0, self._startup_jitter))
+
+        started = self._clock()
+        await self._acquire(priority)
+        waited = self._clock() - started
+        self.requests += 1
+        self.total_wait += waited
+        self.max_wait = max(self.max_wait, waited)
+        try:
+            yield
+        finally:
+            self._release()
+
+    async def _acquire(self, priority: int) -> None:
+        if not self.queue_depth and self._try_grant():
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), future))
+        self.queue_depth += 1
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was granted just as the waiter was cancelled
+                self._release()
+            else:
+                future.cancel()
+                self.queue_depth -= 1
+            raise
+
+    def _release(self) -> None:
+        self._active -= 1
+        self._dispatch()
+
+    def _try_grant(self) -> bool:
+        if self._active >= self._max_concurrent:
+            return False
+        self._refill()
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        self._active += 1
+        return True
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(
+            self._burst, self._tokens + (now - self._refilled_at) * self._rate
+        )
+        self._refilled_at = now
+
+    def _dispatch(self) -> None:
+        if self._wakeup is not None:
+            self._wakeup.cancel()
+            self._wakeup = None
+
+        while self._waiters:
+            future = self._waiters[0][2]
+            if future.done():
+                heapq.heappop(self._waiters)
+                continue
+            if not self._try_grant():
+                break
+            heapq.heappop(self._waiters)
+            self.queue_depth -= 1
+            future.set_result(None)
+
+        if self.queue_depth and self._active < self._max_concurrent:
+            # Only tokens are missing: wake up when the next one is available
+            delay = (1 - self._tokens) / self._rate
+            self._wakeup = asyncio.get_running_loop().call_later(delay, self._dispatch)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "queue_depth": self.queue_depth,
+            "active_requests": self._active,
+            "requests": self.requests,
+            "average_wait": (
+                round(self.total_wait / self.requests, 3) if self.requests else 0.0
+            ),
+            "max_wait": round(self.max_wait, 3),
+        }
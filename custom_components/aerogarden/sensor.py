@@ -1,11 +1,26 @@
 import logging
+from typing import List
 
-from homeassistant.components.sensor import SensorEntity
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntity,
+    SensorStateClass,
+)
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.const import PERCENTAGE, UnitOfTime
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
 from .const import DOMAIN
+from .entity import AerogardenAccountEntity, AerogardenEntity
+from .metrics import ERROR_CANCELLED
+from .resilience import BREAKER_STATES
+from .telemetry import (
+    METRIC_LIGHT_HOURS,
+    METRIC_NUTRIENT_DAYS_LEFT,
+    METRIC_PUMP_DUTY_CYCLE,
+    METRIC_PUMP_LEVEL_TREND,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -23,32 +38,214 @@ SENSOR_FIELDS = {
     },
 }
 
+# Derived by the coordinator's telemetry engine over the last day
+TELEMETRY_SENSORS = {
+    METRIC_PUMP_DUTY_CYCLE: {
+        "label": "pump duty cycle",
+        "icon": "mdi:water-pump",
+        "unit": PERCENTAGE,
+    },
+    METRIC_PUMP_LEVEL_TREND: {
+        "label": "pump level trend",
+        "icon": "mdi:trending-down",
+        "unit": "Fill Level/d",
+    },
+    METRIC_NUTRIENT_DAYS_LEFT: {
+        "label": "predicted nutrient days",
+        "icon": "mdi:calendar-clock",
+        "unit": UnitOfTime.DAYS,
+    },
+    METRIC_LIGHT_HOURS: {
+        "label": "light hours",
+        "icon": "mdi:lightbulb-on-outline",
+        "unit": UnitOfTime.HOURS,
+    },
+}
+
 
 async def async_setup_entry(
     hass: HomeAssistant, entry: ConfigEntry, async_add_entities: AddEntitiesCallback
 ) -> None:
     """Set up the Aerogarden sensor platform."""
-    aerogarden_api = hass.data[DOMAIN][entry.entry_id]
-    sensors = []
-
-    for garden in aerogarden_api.gardens:
-        for field, attributes in SENSOR_FIELDS.items():
-            sensors.append(
-                AerogardenSensor(
-                    garden,
-                    aerogarden_api,
-                    field,
-                    attributes["label"],
-                    attributes["icon"],
-                    attributes["unit"],
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+
+    @callback
+    def async_add_gardens(gardens: List[str]) -> None:
+        sensors = []
+        for garden in gardens:
+            for field, attributes in SENSOR_FIELDS.items():
+                sensors.append(
+                    AerogardenSensor(
+                        coordinator,
+                        garden,
+                        field,
+                        attributes["label"],
+                        attributes["icon"],
+                        attributes["unit"],
+                    )
+                )
+            for metric, attributes in TELEMETRY_SENSORS.items():
+                sensors.append(
+                    AerogardenTelemetrySensor(
+                        coordinator,
+                        garden,
+                        metric,
+                        attributes["label"],
+                        attributes["icon"],
+                        attributes["unit"],
+                    )
                 )
-            )
+        async_add_entities(sensors)
 
-    async_add_entities(sensors, True)
+    async_add_entities(
+        [
+            AerogardenPollingSensor(coordinator),
+            AerogardenRequestQueueSensor(coordinator),
+            AerogardenCircuitBreakerSensor(coordinator),
+            AerogardenRequestErrorsSensor(coordinator),
+            *(
+                AerogardenRequestLatencySensor(coordinator, endpoint)
+                for endpoint in coordinator.api.metrics.endpoints
+            ),
+        ]
+    )
+    entry.async_on_unload(coordinator.async_add_garden_listener(async_add_gardens))
 
 
-class AerogardenSensor(SensorEntity):
+class AerogardenSensor(AerogardenEntity, SensorEntity):
     """Representation of an Aerogarden sensor."""
 
-    def __init__(self, macaddr, aerogarden_api, field, label, icon, unit):
+    def __init__(self, coordinator, macaddr, field, label, icon, unit):
+        """Initialize the sensor."""
+        super().__init__(coordinator, macaddr, field)
+        self._attr_name = f"{self._aerogarden.garden_name(self._macaddr)} {label}"
+        self._attr_unique_id = f"{self._macaddr}_{label}"
+        self._attr_icon = icon
+        self._attr_native_unit_of_measurement = unit
+
+    @property
+    def native_value(self):
+        """Return the value reported by the garden."""
+        return self._aerogarden.garden_property(self._macaddr, self._field)
+
+
+class AerogardenTelemetrySensor(AerogardenSensor):
+    """A metric derived from the recent snapshots of a garden."""
+
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    @property
+    def native_value(self):
+        """Return the metric, None until there are enough samples."""
+        return self.coordinator.telemetry.value(self._macaddr, self._field)
+
+
+class AerogardenPollingSensor(AerogardenAccountEntity, SensorEntity):
+    """The current poll interval of the account, with the poll counters."""
+
+    _attr_icon = "mdi:timer-sync-outline"
+    _attr_device_class = SensorDeviceClass.DURATION
+    _attr_native_unit_of_measurement = UnitOfTime.SECONDS
+
+    def __init__(self, coordinator):
+        """Initialize the sensor."""
+        super().__init__(coordinator, "poll interval")
+
+    @property
+    def native_value(self):
+        """Return the delay until the next poll."""
+        return round(self.coordinator.poll_policy.interval, 1)
+
+    @property
+    def extra_state_attributes(self):
+        """Return the polling mode, the counters are in the diagnostics."""
+        return {
+            "mode": self.coordinator.poll_policy.mode,
+            "probe_only": self._aerogarden.probe_only,
+        }
+
+
+class AerogardenRequestQueueSensor(AerogardenAccountEntity, SensorEntity):
+    """Requests waiting for the shared Aerogarden request scheduler."""
+
+    _attr_icon = "mdi:tray-full"
+
+    def __init__(self, coordinator):
+        """Initialize the sensor."""
+        super().__init__(coordinator, "request queue")
+
+    @property
+    def native_value(self):
+        """Return the number of queued requests."""
+        return self._aerogarden.scheduler.queue_depth
+
+
+class AerogardenCircuitBreakerSensor(AerogardenAccountEntity, SensorEntity):
+    """State of the circuit breaker guarding requests to the Aerogarden cloud."""
+
+    _attr_icon = "mdi:electric-switch"
+    _attr_device_class = SensorDeviceClass.ENUM
+    _attr_options = BREAKER_STATES
+
+    def __init__(self, coordinator):
+        """Initialize the sensor."""
+        super().__init__(coordinator, "cloud circuit breaker")
+
+    @property
+    def native_value(self):
+        """Return closed, open or half_open."""
+        return self._aerogarden.breaker.state
+
+    @property
+    def extra_state_attributes(self):
+        """Return how often the breaker opened, the counters are in the diagnostics."""
+        return {"times_opened": self._aerogarden.breaker.times_opened}
+
+
+class AerogardenRequestLatencySensor(AerogardenAccountEntity, SensorEntity):
+    """Latency of the requests to one cloud endpoint.
+
+    The histogram and the request counters are in the diagnostics.
+    """
+
+    _attr_icon = "mdi:timer-outline"
+    _attr_device_class = SensorDeviceClass.DURATION
+    _attr_native_unit_of_measurement = UnitOfTime.SECONDS
+
+    def __init__(self, coordinator, endpoint):
+        """Initialize the sensor."""
+        super().__init__(coordinator, f"{endpoint} request latency")
+        self._endpoint = endpoint
+
+    @property
+    def native_value(self):
+        """Return the 95th percentile latency, as a histogram bucket bound."""
+        return self._aerogarden.metrics.endpoints[self._endpoint].latency.percentile(95)
+
+
+class AerogardenRequestErrorsSensor(AerogardenAccountEntity, SensorEntity):
+    """Failed requests to the Aerogarden cloud, by endpoint and type."""
+
+    _attr_icon = "mdi:cloud-alert"
+    _attr_state_class = SensorStateClass.TOTAL_INCREASING
+
+    def __init__(self, coordinator):
         """Initialize the sensor."""
+        super().__init__(coordinator, "request errors")
+
+    @property
+    def native_value(self):
+        """Return the number of failed requests since startup."""
+        return self._aerogarden.metrics.failed
+
+    @property
+    def extra_state_attributes(self):
+        """Return the failures of each endpoint by type, as counted in the state."""
+        return {
+            endpoint: {
+                error: count
+                for error, count in metrics.failures.items()
+                if error != ERROR_CANCELLED
+            }
+            for endpoint, metrics in self._aerogarden.metrics.endpoints.items()
+        }
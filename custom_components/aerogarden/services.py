@@ -0,0 +1,204 @@
+"""Services of the Aerogarden integration."""
+
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional
+
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+)
+from homeassistant.exceptions import HomeAssistantError
+import homeassistant.helpers.config_validation as cv
+from homeassistant.util import dt as dt_util
+import voluptuous as vol
+
+from .const import DOMAIN, PROFILE_MAX_POLLS
+from .coordinator import AerogardenDataUpdateCoordinator
+from .profiling import RefreshProfiler
+
+_LOGGER = logging.getLogger(__name__)
+
+DATA_PROFILE_LOCK = f"{DOMAIN}_profile_lock"
+
+ATTR_CONFIG = "config"
+ATTR_CONFIG_ENTRY_ID = "config_entry_id"
+ATTR_GARDENS = "gardens"
+ATTR_LIGHT = "light"
+ATTR_POLLS = "polls"
+
+SERVICE_PROFILE = "profile"
+PROFILE_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_CONFIG_ENTRY_ID): cv.string,
+        vol.Optional(ATTR_POLLS, default=1): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=PROFILE_MAX_POLLS)
+        ),
+    }
+)
+
+SERVICE_APPLY_CONFIG = "apply_config"
+APPLY_CONFIG_SCHEMA = vol.All(
+    vol.Schema(
+        {
+            vol.Optional(ATTR_CONFIG_ENTRY_ID): cv.string,
+            vol.Optional(ATTR_GARDENS): vol.All(cv.ensure_list, [cv.string]),
+            vol.Optional(ATTR_CONFIG): vol.All(dict, vol.Length(min=1)),
+            vol.Optional(ATTR_LIGHT): cv.boolean,
+        }
+    ),
+    cv.has_at_least_one_key(ATTR_CONFIG, ATTR_LIGHT),
+)
+
+# Sending this field toggles the light, whatever its value
+LIGHT_TOGGLE_FIELD = "lightTemp"
+
+
+def _coordinators(
+    hass: HomeAssistant, call: ServiceCall
+) -> Dict[str, AerogardenDataUpdateCoordinator]:
+    """Return the coordinators a service call targets, by config entry."""
+    coordinators = hass.data.get(DOMAIN, {})
+    if (entry_id := call.data.get(ATTR_CONFIG_ENTRY_ID)) is None:
+        return dict(coordinators)
+    if entry_id not in coordinators:
+        raise HomeAssistantError(f"No loaded Aerogarden config entry {entry_id}")
+    return {entry_id: coordinators[entry_id]}
+
+
+def _select_gardens(
+    coordinator: AerogardenDataUpdateCoordinator, gardens: List[str]
+) -> List[str]:
+    """Return the keys of the gardens named by key or by display name."""
+    return [
+        key
+        for key, garden in coordinator.api.data.items()
+        if key in gardens or garden.name in gardens
+    ]
+
+
+def _garden_config(
+    coordinator: AerogardenDataUpdateCoordinator,
+    key: str,
+    config: Dict[str, Any],
+    light: Optional[bool],
+) -> Dict[str, Any]:
+    """Return the config to send to a garden, toggling its light if it differs."""
+    api = coordinator.api
+    if light is None or (api.garden_property(key, "lightStat") == 1) == light:
+        return config
+    return {**config, LIGHT_TOGGLE_FIELD: api.garden_property(key, LIGHT_TOGGLE_FIELD)}
+
+
+async def _async_apply_config(
+    hass: HomeAssistant, call: ServiceCall
+) -> ServiceResponse:
+    """Send a config to many gardens, account by account in parallel.
+
+    Gardens whose light is already in the requested state and that have no
+    other field to set are not sent anything.
+    """
+    coordinators = _coordinators(hass, call)
+    config: Dict[str, Any] = call.data.get(ATTR_CONFIG, {})
+    light: Optional[bool] = call.data.get(ATTR_LIGHT)
+    if light is not None and LIGHT_TOGGLE_FIELD in config:
+        raise HomeAssistantError(
+            f"{LIGHT_TOGGLE_FIELD} toggles the light, set it with {ATTR_LIGHT} instead"
+        )
+    selected = {
+        entry_id: (
+            list(coordinator.api.data)
+            if (gardens := call.data.get(ATTR_GARDENS)) is None
+            else _select_gardens(coordinator, gardens)
+        )
+        for entry_id, coordinator in coordinators.items()
+    }
+    if not any(selected.values()):
+        raise HomeAssistantError("No Aerogarden garden matches the service call")
+
+    configs = {
+        entry_id: {
+            key: _garden_config(coordinators[entry_id], key, config, light)
+            for key in keys
+        }
+        for entry_id, keys in selected.items()
+    }
+    account_errors = await asyncio.gather(
+        *(
+            coordinators[entry_id].async_apply_configs(
+                {key: garden for key, garden in gardens.items() if garden}
+            )
+            for entry_id, gardens in configs.items()
+            if any(gardens.values())
+        )
+    )
+    errors = {
+        key: error for account in account_errors for key, error in account.items()
+    }
+    return {
+        "results": {
+            key: {"success": errors.get(key) is None, "error": errors.get(key)}
+            for gardens in configs.values()
+            for key in gardens
+        }
+    }
+
+
+async def _async_profile(hass: HomeAssistant, call: ServiceCall) -> ServiceResponse:
+    """Run refreshes under the profiler and write the report to the config dir."""
+    lock = hass.data.setdefault(DATA_PROFILE_LOCK, asyncio.Lock())
+    if lock.locked():
+        raise HomeAssistantError("Aerogarden refreshes are already being profiled")
+
+    async with lock:
+        coordinators = _coordinators(hass, call)
+        profiler = RefreshProfiler()
+        for _poll in range(call.data[ATTR_POLLS]):
+            for entry_id, coordinator in coordinators.items():
+                with profiler.profile():
+                    await coordinator.async_refresh()
+                profiler.add_refresh(entry_id, coordinator.refresh_history[-1])
+
+        path = hass.config.path(
+            f"{DOMAIN}_profile_{dt_util.now().strftime('%Y%m%d_%H%M%S')}.txt"
+        )
+        await hass.async_add_executor_job(_write_report, profiler, path)
+
+    _LOGGER.info(
+        "Wrote the profile of %d refreshes to %s", len(profiler.refreshes), path
+    )
+    return {"path": path, "refreshes": profiler.refreshes}
+
+
+def _write_report(profiler: RefreshProfiler, path: str) -> None:
+    report = profiler.report()
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(report)
+
+
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the services shared by every config entry."""
+
+    async def async_apply_config(call: ServiceCall) -> ServiceResponse:
+        return await _async_apply_config(hass, call)
+
+    async def async_profile(call: ServiceCall) -> ServiceResponse:
+        return await _async_profile(hass, call)
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_APPLY_CONFIG,
+        async_apply_config,
+        schema=APPLY_CONFIG_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_PROFILE,
+        async_profile,
+        schema=PROFILE_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
@@ -0,0 +1,84 @@
+"""The HTTP session the integration keeps for the Aerogarden cloud."""
+
+from typing import Any, Dict, Optional
+
+import aiohttp
+from homeassistant.util.ssl import get_default_context
+
+from .const import CONNECTION_LIMIT_PER_HOST, DNS_CACHE_TTL, KEEPALIVE_TIMEOUT
+
+
+class ConnectionStats:
+    """Count new and reused connections and DNS lookups through a TraceConfig.
+
+    Every new connection to an https host costs a TLS handshake, so
+    ``connections_created`` is also the number of handshakes.
+    """
+
+    def __init__(self) -> None:
+        self.requests = 0
+        self.connections_created = 0
+        self.connections_reused = 0
+        self.dns_lookups = 0
+        self.dns_cache_hits = 0
+
+    def trace_config(self) -> aiohttp.TraceConfig:
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_request_start.append(self._on_request_start)
+        trace_config.on_connection_create_end.append(self._on_connection_create_end)
+        trace_config.on_connection_reuseconn.append(self._on_connection_reuseconn)
+        trace_config.on_dns_resolvehost_end.append(self._on_dns_resolvehost_end)
+        trace_config.on_dns_cache_hit.append(self._on_dns_cache_hit)
+        return trace_config
+
+    async def _on_request_start(self, *_args: Any) -> None:
+        self.requests += 1
+
+    async def _on_connection_create_end(self, *_args: Any) -> None:
+        self.connections_created += 1
+
+    async def _on_connection_reuseconn(self, *_args: Any) -> None:
+        self.connections_reused += 1
+
+    async def _on_dns_resolvehost_end(self, *_args: Any) -> None:
+        self.dns_lookups += 1
+
+    async def _on_dns_cache_hit(self, *_args: Any) -> None:
+        self.dns_cache_hits += 1
+
+    @property
+    def reuse_rate(self) -> Optional[float]:
+        """Return the share of requests sent on an open connection."""
+        connections = self.connections_created + self.connections_reused
+        return self.connections_reused / connections if connections else None
+
+    def as_dict(self) -> Dict[str, Any]:
+        reuse_rate = self.reuse_rate
+        return {
+            "requests": self.requests,
+            "connections_created": self.connections_created,
+            "connections_reused": self.connections_reused,
+            "reuse_rate": None if reuse_rate is None else round(reuse_rate, 4),
+            "dns_lookups": self.dns_lookups,
+            "dns_cache_hits": self.dns_cache_hits,
+        }
+
+
+def async_create_session(stats: ConnectionStats) -> aiohttp.ClientSession:
+    """Return a session whose connections outlive the poll interval.
+
+    aiohttp closes idle connections after 15 seconds and caches DNS answers
+    for 10, so with the shared session every poll would resolve the host and
+    handshake again. Responses are compressed when the cloud supports it.
+    """
+    connector = aiohttp.TCPConnector(
+        limit_per_host=CONNECTION_LIMIT_PER_HOST,
+        keepalive_timeout=KEEPALIVE_TIMEOUT,
+        ttl_dns_cache=DNS_CACHE_TTL,
+        ssl=get_default_context(),
+    )
+    return aiohttp.ClientSession(
+        connector=connector,
+        trace_configs=[stats.trace_config()],
+        auto_decompress=True,
+    )
@@ -0,0 +1,97 @@
+"""Persistent per config entry state for the Aerogarden integration."""
+
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN, STORAGE_SAVE_DELAY, STORAGE_VERSION
+from .models import GardenState
+
+
+class AerogardenStore:
+    """Account state kept in HA storage so restarts can skip the cloud."""
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        self._store: Store[Dict[str, Any]] = Store(
+            hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}", private=True
+        )
+        self._data: Dict[str, Any] = {}
+        self._gardens: Optional[Dict[str, GardenState]] = None
+        # True while the last success is newer than the written data
+        self._unsaved = False
+
+    async def async_load(self) -> None:
+        self._data = await self._store.async_load() or {}
+
+    async def async_remove(self) -> None:
+        await self._store.async_remove()
+
+    @property
+    def userid(self) -> Optional[str]:
+        return self._data.get("userid")
+
+    @callback
+    def async_set_userid(self, userid: Optional[str]) -> None:
+        """Remember the userID returned by the last successful login."""
+        if userid is None or userid == self.userid:
+            return
+        self._data["userid"] = userid
+        self._store.async_delay_save(self._data_to_save, STORAGE_SAVE_DELAY)
+
+    @property
+    def gardens(self) -> Optional[Dict[str, Dict[str, Any]]]:
+        """Return the garden snapshot saved by the last successful poll."""
+        return self._data.get("gardens")
+
+    @property
+    def updated(self) -> Optional[datetime]:
+        """Return when the cloud reported the saved snapshot.
+
+        Polls that did not change the gardens are not saved, so the cloud may
+        have confirmed the snapshot more recently, see ``last_success``.
+        """
+        if (updated := self._data.get("updated")) is None:
+            return None
+        return dt_util.parse_datetime(updated)
+
+    @property
+    def last_success(self) -> Optional[datetime]:
+        """Return when the cloud last answered a poll, changed or not."""
+        if (last_success := self._data.get("last_success")) is None:
+            return None
+        return dt_util.parse_datetime(last_success)
+
+    @callback
+    def async_set_last_success(self, when: datetime) -> None:
+        """Remember a successful poll, without writing the store.
+
+        Most polls change nothing, so the time is written with the next
+        snapshot, or by ``async_save_last_success`` on unload and shutdown.
+        """
+        self._data["last_success"] = when.isoformat()
+        self._unsaved = True
+
+    async def async_save_last_success(self) -> None:
+        """Write the time of the last successful poll if it was not written."""
+        if self._unsaved:
+            await self._store.async_save(self._data_to_save())
+
+    @callback
+    def async_set_gardens(self, gardens: Dict[str, GardenState]) -> None:
+        """Remember a changed snapshot, serialized only when it is written."""
+        self._gardens = gardens
+        self._data["updated"] = dt_util.utcnow().isoformat()
+        self._store.async_delay_save(self._data_to_save, STORAGE_SAVE_DELAY)
+
+    @callback
+    def _data_to_save(self) -> Dict[str, Any]:
+        self._unsaved = False
+        if self._gardens is not None:
+            self._data["gardens"] = {
+                key: garden.as_dict() for key, garden in self._gardens.items()
+            }
+            self._gardens = None
+        return self._data
@@ -0,0 +1,236 @@
+"""Rolling statistics derived from the successive snapshots of each garden."""
+
+from collections import deque
+import time
+from typing import Callable, Deque, Dict, List, Optional, Set, Tuple
+
+from .const import (
+    NUTRIENT_SAMPLE_INTERVAL,
+    NUTRIENT_TREND_WINDOW,
+    TELEMETRY_MAX_SEGMENTS,
+    TELEMETRY_SAMPLE_INTERVAL,
+    TELEMETRY_WINDOW,
+)
+from .models import GardenState
+
+METRIC_PUMP_DUTY_CYCLE = "pump_duty_cycle"
+METRIC_PUMP_LEVEL_TREND = "pump_level_trend"
+METRIC_NUTRIENT_DAYS_LEFT = "nutrient_days_left"
+METRIC_LIGHT_HOURS = "light_hours"
+
+SECONDS_PER_DAY = 86400.0
+
+
+class RollingTimeFraction:
+    """Time an on/off signal spent on during the last ``window`` seconds.
+
+    The signal keeps its last sampled state until the next sample. Only state
+    changes are stored, as segments, so memory depends on the number of
+    changes within the window and is capped by ``max_segments``.
+    """
+
+    def __init__(
+        self,
+        window: float = TELEMETRY_WINDOW,
+        max_segments: int = TELEMETRY_MAX_SEGMENTS,
+    ) -> None:
+        self._window = window
+        self._max_segments = max_segments
+        # [start, end, on] segments, oldest first
+        self._segments: Deque[List] = deque()
+        self.on_time = 0.0
+        self.observed = 0.0
+
+    def add(self, timestamp: float, on: bool) -> None:
+        if self._segments:
+            last = self._segments[-1]
+            if timestamp - last[1] > self._window:
+                # Nothing is known about such a gap, start over
+                self._reset()
+            else:
+                self._extend(last, timestamp)
+        if not self._segments or self._segments[-1][2] != on:
+            self._segments.append([timestamp, timestamp, on])
+            if len(self._segments) > self._max_segments:
+                self._drop(self._segments.popleft())
+        self._evict(timestamp - self._window)
+
+    @property
+    def fraction(self) -> Optional[float]:
+        return self.on_time / self.observed if self.observed else None
+
+    def __len__(self) -> int:
+        return len(self._segments)
+
+    def _extend(self, segment: List, end: float) -> None:
+        duration = end - segment[1]
+        segment[1] = end
+        self.observed += duration
+        if segment[2]:
+            self.on_time += duration
+
+    def _drop(self, segment: List) -> None:
+        duration = segment[1] - segment[0]
+        self.observed -= duration
+        if segment[2]:
+            self.on_time -= duration
+
+    def _evict(self, cutoff: float) -> None:
+        while self._segments and self._segments[0][0] < cutoff:
+            first = self._segments[0]
+            if first[1] <= cutoff and len(self._segments) > 1:
+                self._drop(self._segments.popleft())
+                continue
+            # Trim the segment the window starts in
+            trimmed = min(cutoff, first[1]) - first[0]
+            first[0] += trimmed
+            self.observed -= trimmed
+            if first[2]:
+                self.on_time -= trimmed
+            break
+
+    def _reset(self) -> None:
+        self._segments.clear()
+        self.on_time = 0.0
+        self.observed = 0.0
+
+
+class RollingTrend:
+    """Least squares slope of a value over the last ``window`` seconds.
+
+    At most one sample per ``min_interval`` seconds is kept, and running sums
+    make each sample O(1). Timestamps are taken relative to an origin that
+    moves forward with the window, so the sums stay small.
+    """
+
+    def __init__(
+        self,
+        window: float = TELEMETRY_WINDOW,
+        min_interval: float = TELEMETRY_SAMPLE_INTERVAL,
+    ) -> None:
+        self._window = window
+        self._min_interval = min_interval
+        self._samples: Deque[Tuple[float, float]] = deque()
+        self._origin: Optional[float] = None
+        self._sum_t = self._sum_v = self._sum_tt = self._sum_tv = 0.0
+        self.last: Optional[float] = None
+
+    def add(self, timestamp: float, value: Optional[float]) -> None:
+        if value is None:
+            return
+        self.last = value
+        if self._samples and timestamp - self._samples[-1][0] < self._min_interval:
+            return
+        if self._origin is None or timestamp - self._origin > 2 * self._window:
+            self._rebase(timestamp)
+        self._samples.append((timestamp, value))
+        self._accumulate(timestamp, value, 1)
+        while self._samples[0][0] < timestamp - self._window:
+            self._accumulate(*self._samples.popleft(), -1)
+
+    @property
+    def slope(self) -> Optional[float]:
+        """Return the change of the value per second, if it can be estimated."""
+        count = len(self._samples)
+        if count < 2:
+            return None
+        denominator = count * self._sum_tt - self._sum_t**2
+        if denominator <= 0:
+            return None
+        return (count * self._sum_tv - self._sum_t * self._sum_v) / denominator
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def _accumulate(self, timestamp: float, value: float, sign: int) -> None:
+        t = timestamp - self._origin
+        self._sum_t += sign * t
+        self._sum_v += sign * value
+        self._sum_tt += sign * t * t
+        self._sum_tv += sign * t * value
+
+    def _rebase(self, origin: float) -> None:
+        """Recompute the sums around a new origin, once per two windows."""
+        self._origin = origin
+        self._sum_t = self._sum_v = self._sum_tt = self._sum_tv = 0.0
+        for sample in self._samples:
+            self._accumulate(*sample, 1)
+
+
+class GardenTelemetry:
+    """The rolling statistics of one garden."""
+
+    def __init__(self, window: float = TELEMETRY_WINDOW) -> None:
+        self.pump = RollingTimeFraction(window)
+        self.light = RollingTimeFraction(window)
+        self.pump_level = RollingTrend(window)
+        self.nutrients = RollingTrend(
+            max(window, NUTRIENT_TREND_WINDOW), NUTRIENT_SAMPLE_INTERVAL
+        )
+
+    def add(self, timestamp: float, garden: GardenState) -> None:
+        if garden.pumpStat is not None:
+            self.pump.add(timestamp, garden.pumpStat == 1)
+        if garden.lightStat is not None:
+            self.light.add(timestamp, garden.lightStat == 1)
+        self.pump_level.add(timestamp, garden.pumpLevel)
+        self.nutrients.add(timestamp, garden.nutriRemindDay)
+
+    def values(self) -> Dict[str, Optional[float]]:
+        duty_cycle = self.pump.fraction
+        trend = self.pump_level.slope
+        days_left = None
+        if (decline := self.nutrients.slope) is not None and decline < 0:
+            days_left = max(0.0, self.nutrients.last / -(decline * SECONDS_PER_DAY))
+        return {
+            METRIC_PUMP_DUTY_CYCLE: (
+                None if duty_cycle is None else round(duty_cycle * 100, 1)
+            ),
+            METRIC_PUMP_LEVEL_TREND: (
+                None if trend is None else round(trend * SECONDS_PER_DAY, 2)
+            ),
+            METRIC_NUTRIENT_DAYS_LEFT: (
+                None if days_left is None else round(days_left, 1)
+            ),
+            METRIC_LIGHT_HOURS: (
+                round(self.light.on_time / 3600, 2) if self.light.observed else None
+            ),
+        }
+
+
+class TelemetryEngine:
+    """Feed every successful snapshot into the statistics of each garden."""
+
+    def __init__(
+        self,
+        window: float = TELEMETRY_WINDOW,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._window = window
+        self._clock = clock
+        self._gardens: Dict[str, GardenTelemetry] = {}
+        self._values: Dict[str, Dict[str, Optional[float]]] = {}
+
+    def update(self, gardens: Dict[str, GardenState]) -> Set[Tuple[str, str]]:
+        """Add a snapshot, returning the (garden, metric) pairs whose value changed."""
+        now = self._clock()
+        changed: Set[Tuple[str, str]] = set()
+        for key, garden in gardens.items():
+            if (telemetry := self._gardens.get(key)) is None:
+                telemetry = self._gardens[key] = GardenTelemetry(self._window)
+            telemetry.add(now, garden)
+            values = telemetry.values()
+            previous = self._values.get(key, {})
+            changed.update(
+                (key, metric)
+                for metric, value in values.items()
+                if previous.get(metric) != value
+            )
+            self._values[key] = values
+        for key in self._gardens.keys() - gardens.keys():
+            del self._gardens[key]
+            del self._values[key]
+        return changed
+
+    def value(self, key: str, metric: str) -> Optional[float]:
+        return self._values.get(key, {}).get(metric)
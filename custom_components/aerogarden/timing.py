@@ -0,0 +1,45 @@
+"""Wall clock timing of the phases of a multi-step operation."""
+
+from contextlib import contextmanager
+import time
+from typing import Any, Callable, Dict, Iterator, NamedTuple
+
+
+class Phase(NamedTuple):
+    start: float
+    duration: float
+
+
+class PhaseTimer:
+    """Record when each phase started, relative to the timer, and how long it took.
+
+    Phases may overlap, the start offsets show which ones ran concurrently.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.perf_counter) -> None:
+        self._clock = clock
+        self.started = clock()
+        self.phases: Dict[str, Phase] = {}
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        started = self._clock()
+        try:
+            yield
+        finally:
+            self.record(name, started, self._clock() - started)
+
+    def record(self, name: str, started: float, duration: float) -> None:
+        """Record a phase that started at ``started`` on the timer's clock."""
+        self.phases[name] = Phase(started - self.started, duration)
+
+    def merge(self, other: "PhaseTimer") -> None:
+        """Add the phases of a timer running on the same clock."""
+        for name, phase in other.phases.items():
+            self.record(name, other.started + phase.start, phase.duration)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            name: {"start": round(phase.start, 4), "duration": round(phase.duration, 4)}
+            for name, phase in self.phases.items()
+        }
@@ -0,0 +1,180 @@
+"""A local stand-in for the Aerogarden cloud, used by tests and benchmarks."""
+
+import asyncio
+import base64
+from contextlib import contextmanager
+import json
+import random
+import threading
+from typing import Any, Callable, Dict, Iterator, List, Optional, Union
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+EMAIL = "test@example.com"
+PASSWORD = "password"
+USER_ID = 4242
+
+Latency = Union[float, Callable[[], float]]
+
+
+def make_garden(index: int, padding: int = 0) -> Dict[str, Any]:
+    """Return a garden record shaped like the ones QueryUserDevice returns."""
+    garden = {
+        "configID": index,
+        "airGuid": f"AA:BB:CC:{index // 65536:02X}:{index // 256 % 256:02X}:{index % 256:02X}",
+        "lcTemp": 1,
+        "lightTemp": 1,
+        "lightStat": 1,
+        "clock": 0,
+        "pumpStat": index % 2,
+        "pumpHydro": 0,
+        "pumpLevel": 1,
+        "plantedName": base64.b64encode(f"Garden {index}".encode()).decode(),
+        "totalDay": 365,
+        "plantedType": 10,
+        "nutriRemindDay": 14,
+        "alarmAllow": 0,
+        "plantedDate": "2024-01-01T00:00:00",
+        "nutrientDate": "2024-01-01T00:00:00",
+        "updateDate": "2024-01-01T00:00:00",
+        "createDate": "2024-01-01T00:00:00",
+        "swVersion": "MFW-V0.37",
+        "hwVersion": "SW-V1.01",
+        "bwVersion": "HW-V3.0",
+        "oldPlantedDay": 0,
+        "deviceID": "",
+        "deviceIP": "192.168.1.2",
+        "chooseGarden": 0,
+        "plantedDay": 30,
+        "nutriStatus": 0,
+    }
+    if padding:
+        garden["notes"] = "x" * padding
+    return garden
+
+
+class FakeAerogardenCloud:
+    """Serve /api/Admin/Login, QueryUserDevice and UpdateDeviceConfig.
+
+    ``latency`` is a number of seconds, or a callable returning one, added to
+    every response. ``error_rate`` is the fraction of requests answered with
+    an HTTP 500. ``padding`` adds that many bytes to every garden record.
+    """
+
+    def __init__(
+        self,
+        gardens: int = 1,
+        latency: Latency = 0.0,
+        error_rate: float = 0.0,
+        padding: int = 0,
+        seed: int = 0,
+    ) -> None:
+        self.gardens: List[Dict[str, Any]] = [
+            make_garden(index, padding) for index in range(gardens)
+        ]
+        self.latency = latency
+        self.error_rate = error_rate
+        self.requests: Dict[str, int] = {"login": 0, "status": 0, "update": 0}
+        self._random = random.Random(seed)
+        self._server: Optional[TestServer] = None
+
+        self.app = web.Application()
+        self.app.router.add_post("/api/Admin/Login", self._login)
+        self.app.router.add_post("/api/CustomData/QueryUserDevice", self._status)
+        self.app.router.add_post("/api/Custom/UpdateDeviceConfig", self._update)
+
+    @property
+    def host(self) -> str:
+        assert self._server is not None
+        return str(self._server.make_url("")).rstrip("/")
+
+    async def start(self) -> str:
+        """Start serving on a free local port and return the host URL."""
+        self._server = TestServer(self.app)
+        await self._server.start_server()
+        return self.host
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            await self._server.close()
+            self._server = None
+
+    @contextmanager
+    def run_in_thread(self) -> Iterator[str]:
+        """Serve from a separate thread and event loop.
+
+        Keeps the server's CPU time out of the client thread's measurements.
+        """
+        loop = asyncio.new_event_loop()
+        started = threading.Event()
+        thread = threading.Thread(
+            target=self._serve_forever, args=(loop, started), daemon=True
+        )
+        thread.start()
+        started.wait()
+        try:
+            yield self.host
+        finally:
+            asyncio.run_coroutine_threadsafe(self.stop(), loop).result()
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+            loop.close()
+
+    def _serve_forever(self, loop: asyncio.AbstractEventLoop, started) -> None:
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(self.start())
+        started.set()
+        loop.run_forever()
+
+    async def _respond(self, endpoint: str, handler) -> web.Response:
+        self.requests[endpoint] += 1
+        latency = self.latency() if callable(self.latency) else self.latency
+        if latency:
+            await asyncio.sleep(latency)
+        if self.error_rate and self._random.random() < self.error_rate:
+            return web.Response(status=500, text="Internal Server Error")
+        return web.Response(
+            body=json.dumps(await handler()).encode(),
+            content_type="application/json",
+        )
+
+    async def _login(self, request: web.Request) -> web.Response:
+        async def handler():
+            form = await request.post()
+            if form.get("mail") != EMAIL:
+                return {"code": -2, "msg": "Account not found"}
+            if form.get("userPwd") != PASSWORD:
+                return {"code": -4, "msg": "Wrong password"}
+            return {"code": USER_ID, "msg": "Success"}
+
+        return await self._respond("login", handler)
+
+    async def _status(self, request: web.Request) -> web.Response:
+        async def handler():
+            form = await request.post()
+            if form.get("userID") != str(USER_ID):
+                return {"Message": "An error has occurred."}
+            return self.gardens
+
+        return await self._respond("status", handler)
+
+    async def _update(self, request: web.Request) -> web.Response:
+        async def handler():
+            form = await request.post()
+            if form.get("userID") != str(USER_ID):
+                return {"Message": "An error has occurred."}
+            air_guid = form.get("airGuid")
+            for garden in self.gardens:
+                # The integration sends either the airGuid or its garden key
+                if air_guid in (
+                    garden["airGuid"],
+                    f"{garden['airGuid']}-{garden['configID']}",
+                ):
+                    config = json.loads(form.get("plantConfig", "{}"))
+                    if "lightTemp" in config:
+                        garden["lightStat"] = 1 - garden["lightStat"]
+                    return {"code": 1, "msg": "Success"}
+            return {"code": 0, "msg": "Device not found"}
+
+        return await self._respond("update", handler)
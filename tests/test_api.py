@@ -1,14 +1,29 @@
+import asyncio
+import json
 from unittest.mock import MagicMock, patch
 
+import aiohttp
+from aioresponses import aioresponses
 from homeassistant.core import HomeAssistant
 import pytest
 
 from custom_components.aerogarden.api import AerogardenAPI
+from custom_components.aerogarden.capture import PayloadCapture
+from custom_components.aerogarden.models import GardenState
+from custom_components.aerogarden.resilience import (
+    BREAKER_CLOSED,
+    BREAKER_OPEN,
+    RetryPolicy,
+)
+
+GARDEN = GardenState(key="AA:BB:CC:DD:EE:FF-1", chooseGarden=0, lightTemp=1)
 
 
 @pytest.fixture
 def hass():
-    return MagicMock(spec=HomeAssistant)
+    hass = MagicMock(spec=HomeAssistant)
+    hass.data = {}
+    return hass
 
 
 @pytest.fixture
@@ -16,6 +31,17 @@ def api(hass):
     return AerogardenAPI(hass, "test@example.com", "password", "http://example.com")
 
 
+@pytest.fixture
+async def session():
+    session = aiohttp.ClientSession()
+    with patch(
+        "custom_components.aerogarden.api.async_get_clientsession",
+        return_value=session,
+    ):
+        yield session
+    await session.close()
+
+
 @pytest.mark.asyncio
 async def test_login_success(api):
     with patch(
@@ -61,6 +87,53 @@ async def test_update_success(api):
         assert api.garden_name("AA:BB:CC:DD:EE:FF-1") == "Plant Name_left"
 
 
+@pytest.mark.asyncio
+async def test_update_reuses_unchanged_gardens(api):
+    api._userid = "123"  # Simulate successful login
+    gardens = [
+        {"airGuid": "AA:BB:CC:DD:EE:FF", "configID": index, "pumpStat": 0}
+        for index in range(3)
+    ]
+    with patch(
+        "custom_components.aerogarden.api.AerogardenAPI._post_request"
+    ) as mock_post:
+        mock_post.side_effect = lambda *_: [dict(garden) for garden in gardens]
+        await api.update()
+        first = dict(api.data)
+
+        gardens[1]["pumpStat"] = 1
+        await api.update()
+
+    assert api.data["AA:BB:CC:DD:EE:FF-0"] is first["AA:BB:CC:DD:EE:FF-0"]
+    assert api.data["AA:BB:CC:DD:EE:FF-2"] is first["AA:BB:CC:DD:EE:FF-2"]
+    assert api.garden_property("AA:BB:CC:DD:EE:FF-1", "pumpStat") == 1
+    assert api.parsing == {
+        "last_reused": 2,
+        "last_parsed": 1,
+        "reused": 2,
+        "parsed": 4,
+    }
+
+
+@pytest.mark.asyncio
+async def test_update_parses_changes_python_hashes_alike(api):
+    api._userid = "123"  # Simulate successful login
+    garden = {"airGuid": "AA:BB:CC:DD:EE:FF", "configID": 1, "pumpLevel": -1}
+    with patch(
+        "custom_components.aerogarden.api.AerogardenAPI._post_request"
+    ) as mock_post:
+        mock_post.side_effect = lambda *_: [dict(garden)]
+        await api.update()
+
+        # hash(-1) == hash(-2), and 1, 1.0 and True hash alike
+        for value in (-2, 1, 1.0, True):
+            garden["pumpLevel"] = value
+            await api.update()
+            assert api.garden_property("AA:BB:CC:DD:EE:FF-1", "pumpLevel") is value
+
+    assert api.parsing["reused"] == 0
+
+
 @pytest.mark.asyncio
 async def test_update_failure(api):
     api._userid = "123"  # Simulate successful login
@@ -76,7 +149,7 @@ async def test_update_failure(api):
 @pytest.mark.asyncio
 async def test_light_toggle_success(api):
     api._userid = "123"  # Simulate successful login
-    api._data = {"AA:BB:CC:DD:EE:FF-1": {"chooseGarden": 0, "lightTemp": 1}}
+    api._data = {"AA:BB:CC:DD:EE:FF-1": GARDEN}
     with patch(
         "custom_components.aerogarden.api.AerogardenAPI._post_request"
     ) as mock_post, patch(
@@ -87,13 +160,14 @@ async def test_light_toggle_success(api):
         result = await api.light_toggle("AA:BB:CC:DD:EE:FF-1")
         assert result is True
         assert mock_post.call_count == 1
-        assert mock_update.call_count == 1
+        # Confirmation is left to the coordinator's next refresh
+        assert mock_update.call_count == 0
 
 
 @pytest.mark.asyncio
 async def test_light_toggle_failure(api):
     api._userid = "123"  # Simulate successful login
-    api._data = {"AA:BB:CC:DD:EE:FF-1": {"chooseGarden": 0, "lightTemp": 1}}
+    api._data = {"AA:BB:CC:DD:EE:FF-1": GARDEN}
     with patch(
         "custom_components.aerogarden.api.AerogardenAPI._post_request"
     ) as mock_post:
@@ -105,11 +179,12 @@ async def test_light_toggle_failure(api):
 
 def test_garden_property(api):
     api._data = {
-        "AA:BB:CC:DD:EE:FF-1": {
-            "plantedName": "Test Plant",
-            "chooseGarden": 0,
-            "lightTemp": 1,
-        }
+        "AA:BB:CC:DD:EE:FF-1": GardenState(
+            key="AA:BB:CC:DD:EE:FF-1",
+            plantedName="Test Plant",
+            chooseGarden=0,
+            lightTemp=1,
+        )
     }
     assert api.garden_property("AA:BB:CC:DD:EE:FF-1", "plantedName") == "Test Plant"
     assert api.garden_property("AA:BB:CC:DD:EE:FF-1", "chooseGarden") == 0
@@ -117,26 +192,337 @@ def test_garden_property(api):
 
 
 @pytest.mark.asyncio
-async def test_update_throttle(api):
+async def test_update_does_not_format_payload(api, session):
     api._userid = "123"  # Simulate successful login
+    with aioresponses() as mocked, patch("json.dumps") as mock_dumps:
+        mocked.post(
+            "http://example.com/api/CustomData/QueryUserDevice",
+            body='[{"airGuid": "AA:BB:CC:DD:EE:FF", "configID": 1}]',
+        )
+        assert await api.update() is True
+        assert mock_dumps.call_count == 0
+        assert api.payload_capture is None
+
+
+@pytest.mark.asyncio
+async def test_payload_capture_is_bounded(api, session):
+    api._userid = "123"  # Simulate successful login
+    api.payload_capture = PayloadCapture(size=2)
+    with aioresponses() as mocked:
+        for config_id in range(3):
+            mocked.post(
+                "http://example.com/api/CustomData/QueryUserDevice",
+                payload=[{"airGuid": "AA:BB:CC:DD:EE:FF", "configID": config_id}],
+            )
+            assert await api.update() is True
+
+    captured = api.payload_capture.as_dict()
+    assert len(captured) == 2
+    assert [payload["body"][0]["configID"] for payload in captured] == [1, 2]
+    assert captured[-1]["status"] == 200
+    assert captured[-1]["size"] > 0
+
+
+@pytest.mark.asyncio
+async def test_update_with_cached_userid_skips_login(hass):
+    api = AerogardenAPI(hass, "test@example.com", "password", "http://example.com", "7")
     with patch(
         "custom_components.aerogarden.api.AerogardenAPI._post_request"
-    ) as mock_post, patch(
-        "custom_components.aerogarden.api.MIN_TIME_BETWEEN_UPDATES", new=1
-    ):
+    ) as mock_post:
         mock_post.return_value = [{"airGuid": "AA:BB:CC:DD:EE:FF", "configID": 1}]
-
-        # First call should update
-        result1 = await api.throttled_update()
-        assert result1 is True
+        assert await api.update() is True
         assert mock_post.call_count == 1
+        assert mock_post.call_args.args[1] == {"userID": "7"}
+
+
+@pytest.mark.asyncio
+async def test_update_with_rejected_cached_userid_logs_in(hass):
+    api = AerogardenAPI(hass, "test@example.com", "password", "http://example.com", "7")
+    with patch(
+        "custom_components.aerogarden.api.AerogardenAPI._post_request"
+    ) as mock_post:
+        mock_post.side_effect = [
+            {"Message": "An error has occurred."},
+            {"code": 8},
+            [{"airGuid": "AA:BB:CC:DD:EE:FF", "configID": 1}],
+        ]
+        assert await api.update() is True
+        assert api.userid == "8"
+        assert mock_post.call_args.args[1] == {"userID": "8"}
+
+
+def fake_cloud(valid_userid, login_delay=0.01):
+    """Answer like the cloud: only ``valid_userid`` is accepted."""
+    calls = {"login": 0, "status": 0, "update": 0}
+
+    async def post(url, post_data, priority=None, idempotent=True):
+        if url.endswith("/Login"):
+            calls["login"] += 1
+            await asyncio.sleep(login_delay)
+            return {"code": int(valid_userid)}
+        # Let concurrent callers send their requests before any answer arrives
+        await asyncio.sleep(0)
+        if post_data["userID"] != valid_userid:
+            return {"Message": "An error has occurred."}
+        if url.endswith("/UpdateDeviceConfig"):
+            calls["update"] += 1
+            return {"code": 1}
+        calls["status"] += 1
+        return [{"airGuid": "AA:BB:CC:DD:EE:FF", "configID": 1, "lightTemp": 1}]
+
+    return post, calls
+
+
+@pytest.mark.asyncio
+async def test_concurrent_callers_share_one_login(api):
+    api._userid = "7"  # Stale userID
+    post, calls = fake_cloud("8")
+    # update() callers share one refresh, so the others send their own
+    # requests, each rejected with the stale userID
+    with patch.object(AerogardenAPI, "_post_request", side_effect=post) as mock_post:
+        results = await asyncio.gather(
+            api.update(),
+            *(
+                api._post_authenticated(
+                    api._update_url,
+                    lambda userid, index=index: {"userID": userid, "airGuid": index},
+                    idempotent=False,
+                )
+                for index in range(4)
+            ),
+        )
+
+    assert results == [True] + [{"code": 1}] * 4
+    assert calls == {"login": 1, "status": 1, "update": 4}
+    assert api.userid == "8"
+    # Five rejected requests, one login and five retries with the new userID
+    assert mock_post.call_count == 11
+
+
+@pytest.mark.asyncio
+async def test_caller_arriving_during_login_waits_for_it(api):
+    api._userid = "7"  # Stale userID
+    post, calls = fake_cloud("8", login_delay=0.05)
+    with patch.object(AerogardenAPI, "_post_request", side_effect=post):
+        first = asyncio.create_task(api.update())
+        await asyncio.sleep(0.01)
+        assert api._login_task is not None
+        # A command issued while the login is running must not log in again
+        api._data = {"AA:BB:CC:DD:EE:FF-1": GARDEN}
+        toggle = asyncio.create_task(api.light_toggle("AA:BB:CC:DD:EE:FF-1"))
+        assert await first is True
+        assert await toggle is True
+
+    assert calls["login"] == 1
+    assert calls["update"] == 1
+    assert api._login_task is None
+
+
+@pytest.mark.asyncio
+async def test_failed_relogin_is_not_retried(api):
+    api._userid = "7"  # Stale userID
+
+    async def post(url, post_data, priority=None, idempotent=True):
+        if url.endswith("/Login"):
+            return {"code": -4}
+        await asyncio.sleep(0)
+        return {"Message": "An error has occurred."}
+
+    with patch.object(AerogardenAPI, "_post_request", side_effect=post) as mock_post:
+        results = await asyncio.gather(
+            api.update(),
+            api._post_authenticated(
+                api._update_url, lambda userid: {"userID": userid}, idempotent=False
+            ),
+        )
+
+    assert results == [False, None]
+    # Both rejected callers wait for the one failed login, nobody retries
+    assert mock_post.call_count == 3
+    assert [call.args[0].endswith("/Login") for call in mock_post.call_args_list] == [
+        False,
+        False,
+        True,
+    ]
+    assert api.is_valid_login() is False
+
+
+def slow_send(response, delay=0.01):
+    calls = []
+
+    async def send(url, post_data, priority, idempotent):
+        calls.append((url, post_data))
+        await asyncio.sleep(delay)
+        return response
+
+    return send, calls
+
+
+@pytest.mark.asyncio
+async def test_concurrent_updates_share_one_poll(api):
+    api._userid = "123"  # Simulate successful login
+    send, calls = slow_send([{"airGuid": "AA:BB:CC:DD:EE:FF", "configID": 1}])
+    with patch.object(AerogardenAPI, "_send_request", side_effect=send):
+        results = await asyncio.gather(*(api.update() for _ in range(4)))
+        assert await api.update() is True
+
+    assert results == [True] * 4
+    # Overlapping callers join the running poll, a later call starts a new one
+    assert len(calls) == 2
+    assert api.coalescing["coalesced_updates"] == 3
+
+
+@pytest.mark.asyncio
+async def test_identical_requests_are_coalesced(api):
+    send, calls = slow_send({"code": 5})
+    with patch.object(AerogardenAPI, "_send_request", side_effect=send):
+        results = await asyncio.gather(
+            api._post_request("http://example.com/a", {"userID": "1"}),
+            api._post_request("http://example.com/a", {"userID": "1"}),
+            api._post_request("http://example.com/a", {"userID": "2"}),
+        )
+
+    assert results == [{"code": 5}] * 3
+    assert len(calls) == 2
+    assert api.coalescing == {
+        "requests": 3,
+        "coalesced_requests": 1,
+        "updates": 0,
+        "coalesced_updates": 0,
+    }
+    assert api._inflight == {}
+
+
+@pytest.mark.asyncio
+async def test_commands_are_never_coalesced(api):
+    api._userid = "123"  # Simulate successful login
+    api._data = {"AA:BB:CC:DD:EE:FF-1": GARDEN}
+    send, calls = slow_send({"code": 1})
+    with patch.object(AerogardenAPI, "_send_request", side_effect=send):
+        results = await asyncio.gather(
+            api.light_toggle("AA:BB:CC:DD:EE:FF-1"),
+            api.light_toggle("AA:BB:CC:DD:EE:FF-1"),
+        )
+
+    assert results == [True, True]
+    assert len(calls) == 2
 
-        # Second immediate call should not update due to throttle
-        result2 = await api.throttled_update()
-        assert result2 is None
-        assert mock_post.call_count == 1
 
-        # Call with no_throttle should update
-        result3 = await api.update()
-        assert result3 is True
-        assert mock_post.call_count == 2
+@pytest.fixture
+def retrying_api(hass):
+    return AerogardenAPI(
+        hass,
+        "test@example.com",
+        "password",
+        "http://example.com",
+        userid="123",
+        retry_policy=RetryPolicy(attempts=3, base_delay=0),
+    )
+
+
+@pytest.mark.asyncio
+async def test_transient_errors_are_retried(retrying_api, session):
+    with aioresponses() as mocked:
+        mocked.post("http://example.com/api/CustomData/QueryUserDevice", status=502)
+        mocked.post(
+            "http://example.com/api/CustomData/QueryUserDevice",
+            exception=asyncio.TimeoutError(),
+        )
+        mocked.post(
+            "http://example.com/api/CustomData/QueryUserDevice",
+            payload=[{"airGuid": "AA:BB:CC:DD:EE:FF", "configID": 1}],
+        )
+        assert await retrying_api.update() is True
+
+    assert retrying_api.breaker.state == BREAKER_CLOSED
+
+
+@pytest.mark.asyncio
+async def test_client_errors_are_not_retried(retrying_api, session):
+    with aioresponses() as mocked:
+        mocked.post("http://example.com/api/CustomData/QueryUserDevice", status=404)
+        assert await retrying_api.update() is False
+        assert sum(len(sent) for sent in mocked.requests.values()) == 1
+
+
+@pytest.mark.asyncio
+async def test_commands_are_not_retried(retrying_api, session):
+    retrying_api._data = {"AA:BB:CC:DD:EE:FF-1": GARDEN}
+    with aioresponses() as mocked:
+        mocked.post("http://example.com/api/Custom/UpdateDeviceConfig", status=503)
+        assert await retrying_api.light_toggle("AA:BB:CC:DD:EE:FF-1") is False
+        assert sum(len(sent) for sent in mocked.requests.values()) == 1
+
+
+@pytest.mark.asyncio
+async def test_open_breaker_fails_fast(retrying_api, session):
+    breaker = retrying_api.breaker
+    for _ in range(5):
+        breaker.record_failure()
+    assert breaker.state == BREAKER_OPEN
+
+    with aioresponses() as mocked:
+        assert await retrying_api.update() is False
+        assert mocked.requests == {}
+    assert breaker.rejected == 1
+
+
+@pytest.mark.asyncio
+async def test_request_metrics(retrying_api, session):
+    url = "http://example.com/api/CustomData/QueryUserDevice"
+    body = '[{"airGuid": "AA:BB:CC:DD:EE:FF", "configID": 1}]'
+    with aioresponses() as mocked:
+        mocked.post(url, status=500)
+        mocked.post(url, exception=asyncio.TimeoutError())
+        mocked.post(url, body=body)
+        assert await retrying_api.update() is True
+        mocked.post(url, body="not json")
+        assert await retrying_api.update() is False
+
+    status = retrying_api.metrics.endpoints["status"]
+    assert status.requests == 4
+    assert status.retries == 2
+    assert status.failures == {"http_500": 1, "timeout": 1, "decode": 1}
+    assert status.latency.count == 4
+    # The timed out attempt does not time the hedges
+    assert status.answered_latency.count == 3
+    assert status.last_response_bytes == len("not json")
+    assert status.max_response_bytes == len(body)
+    assert retrying_api.metrics.failed == 3
+    assert retrying_api.metrics.as_dict()["login"]["requests"] == 0
+
+
+@pytest.mark.asyncio
+async def test_config_batches_bound_concurrency(api):
+    api._userid = "123"
+    api._data = {
+        f"AA:BB:CC:DD:EE:{index:02X}-0": GardenState(
+            key=f"AA:BB:CC:DD:EE:{index:02X}-0", chooseGarden=0
+        )
+        for index in range(10)
+    }
+    inflight = []
+    sent = []
+
+    async def post_request(url, post_data, *_args):
+        inflight.append(post_data["airGuid"])
+        sent.append((len(inflight), post_data))
+        await asyncio.sleep(0)
+        inflight.remove(post_data["airGuid"])
+        if post_data["airGuid"].endswith("09-0"):
+            return {"code": 0, "msg": "Offline"}
+        return {"code": 1}
+
+    with patch.object(AerogardenAPI, "_post_request", side_effect=post_request):
+        errors = await api._send_configs(
+            {**{key: {"lightTemp": 1} for key in api._data}, "unknown": {}},
+            concurrency=3,
+        )
+
+    assert max(concurrent for concurrent, _post_data in sent) == 3
+    assert len(sent) == 10
+    assert json.loads(sent[0][1]["plantConfig"]) == {"lightTemp": 1}
+    assert [key for key, error in errors.items() if error is not None] == [
+        "AA:BB:CC:DD:EE:09-0",
+        "unknown",
+    ]
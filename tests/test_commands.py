@@ -0,0 +1,104 @@
+import asyncio
+
+import pytest
+
+from custom_components.aerogarden.commands import ConfigWriteBuffer
+
+
+def recording_sender(errors=None, delay=0.0):
+    batches = []
+
+    async def send(configs):
+        batches.append({macaddr: dict(config) for macaddr, config in configs.items()})
+        await asyncio.sleep(delay)
+        return {macaddr: (errors or {}).get(macaddr) for macaddr in configs}
+
+    return send, batches
+
+
+@pytest.mark.asyncio
+async def test_writes_within_the_window_share_one_request():
+    send, batches = recording_sender(errors={"B": "Offline"})
+    buffer = ConfigWriteBuffer(send, window=0.01)
+
+    results = await asyncio.gather(
+        buffer.async_write("A", {"pumpStat": 1, "plantedDay": 3}),
+        buffer.async_write("B", {"pumpStat": 1}),
+        buffer.async_write("A", {"plantedDay": 4, "nutriRemindDay": 14}),
+    )
+
+    # One batch, one request per garden, later values win
+    assert batches == [
+        {
+            "A": {"pumpStat": 1, "plantedDay": 4, "nutriRemindDay": 14},
+            "B": {"pumpStat": 1},
+        }
+    ]
+    assert results == [None, "Offline", None]
+    assert buffer.as_dict() == {"writes": 3, "requests": 2, "pending": 0}
+
+
+@pytest.mark.asyncio
+async def test_toggles_are_never_merged():
+    send, batches = recording_sender()
+    buffer = ConfigWriteBuffer(send, window=0.01)
+
+    results = await asyncio.gather(
+        buffer.async_write("A", {"lightTemp": 1}),
+        buffer.async_write("A", {"pumpStat": 1}),
+        buffer.async_write("A", {"lightTemp": 0}),
+        buffer.async_write("B", {"lightTemp": 1}),
+    )
+
+    # The second toggle of A waits for the next request, with nothing else
+    # pending for B
+    assert batches == [
+        {"A": {"lightTemp": 1, "pumpStat": 1}, "B": {"lightTemp": 1}},
+        {"A": {"lightTemp": 0}},
+    ]
+    assert results == [None] * 4
+
+
+@pytest.mark.asyncio
+async def test_write_made_while_sending_goes_in_the_next_request():
+    send, batches = recording_sender(delay=0.05)
+    buffer = ConfigWriteBuffer(send, window=0.01)
+
+    first = asyncio.create_task(buffer.async_write("A", {"pumpStat": 1}))
+    await asyncio.sleep(0.03)
+    assert len(batches) == 1
+    second = asyncio.create_task(buffer.async_write("A", {"pumpStat": 0}))
+
+    assert await first is None
+    assert await second is None
+    assert batches == [{"A": {"pumpStat": 1}}, {"A": {"pumpStat": 0}}]
+
+
+@pytest.mark.asyncio
+async def test_failed_send_resolves_the_waiting_writes_with_an_error():
+    async def send(configs):
+        raise RuntimeError("Broken")
+
+    buffer = ConfigWriteBuffer(send, window=0.01)
+
+    results = await asyncio.gather(
+        buffer.async_write("A", {"pumpStat": 1}),
+        buffer.async_write("A", {"lightTemp": 1}),
+        buffer.async_write("A", {"lightTemp": 1}),
+    )
+    assert results == ["Error sending the config update: Broken"] * 3
+    assert buffer.as_dict() == {"writes": 3, "requests": 2, "pending": 0}
+
+
+@pytest.mark.asyncio
+async def test_cancelled_flush_cancels_the_waiting_writes():
+    send, _batches = recording_sender(delay=1)
+    buffer = ConfigWriteBuffer(send, window=0.01)
+
+    write = asyncio.ensure_future(buffer.async_write("A", {"pumpStat": 1}))
+    await asyncio.sleep(0.05)
+    buffer._task.cancel()
+
+    with pytest.raises(asyncio.CancelledError):
+        await write
+    assert buffer.as_dict()["pending"] == 0
@@ -1,11 +1,12 @@
 from dataclasses import dataclass
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 from homeassistant import config_entries, data_entry_flow
-from homeassistant.const import CONF_PASSWORD, CONF_USERNAME
+from homeassistant.const import CONF_EMAIL, CONF_PASSWORD, CONF_USERNAME
 import pytest
 
-from custom_components.aerogarden.const import DOMAIN
+from custom_components.aerogarden.config_flow import AerogardenConfigFlow
+from custom_components.aerogarden.const import CONF_USERID, DOMAIN
 
 
 @dataclass
@@ -137,3 +138,27 @@ async def test_user_form_unique_id(hass, mock_api):
     )
 
     assert flow_result == abort_result
+
+
+@pytest.mark.asyncio
+async def test_created_entry_keeps_the_userid(hass):
+    flow = AerogardenConfigFlow()
+    flow.hass = hass
+    flow.context = {"source": config_entries.SOURCE_USER}
+    with patch(
+        "custom_components.aerogarden.config_flow.AerogardenAPI"
+    ) as mock_api, patch.object(flow, "async_set_unique_id"), patch.object(
+        flow, "_abort_if_unique_id_configured"
+    ):
+        mock_api.return_value.login = AsyncMock(return_value=True)
+        mock_api.return_value.userid = "123"
+        result = await flow.async_step_user(
+            {CONF_EMAIL: "test@example.com", CONF_PASSWORD: "test-password"}
+        )
+
+    assert result["type"] == data_entry_flow.RESULT_TYPE_CREATE_ENTRY
+    assert result["data"] == {
+        CONF_EMAIL: "test@example.com",
+        CONF_PASSWORD: "test-password",
+        CONF_USERID: "123",
+    }
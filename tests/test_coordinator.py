@@ -0,0 +1,520 @@
+import asyncio
+import base64
+from datetime import timedelta
+from unittest.mock import MagicMock, patch
+
+import aiohttp
+from aioresponses import aioresponses
+from homeassistant.core import HomeAssistant
+import pytest
+from yarl import URL
+
+from custom_components.aerogarden import binary_sensor, light, sensor
+from custom_components.aerogarden.api import AerogardenAPI
+from custom_components.aerogarden.const import (
+    DOMAIN,
+    FAST_UPDATE_INTERVAL,
+    UPDATE_INTERVAL,
+)
+from custom_components.aerogarden.coordinator import AerogardenDataUpdateCoordinator
+from custom_components.aerogarden.polling import AdaptivePollPolicy
+from custom_components.aerogarden.resilience import RetryPolicy
+from custom_components.aerogarden.storage import AerogardenStore
+
+HOST = "http://example.com"
+STATUS_URL = f"{HOST}/api/CustomData/QueryUserDevice"
+
+# The sensors, telemetry sensors, binary sensors and light of every garden
+ENTITIES_PER_GARDEN = (
+    len(sensor.SENSOR_FIELDS)
+    + len(sensor.TELEMETRY_SENSORS)
+    + len(binary_sensor.SENSOR_FIELDS)
+    + 1
+)
+
+
+def make_gardens(count):
+    return [
+        {
+            "airGuid": f"AA:BB:CC:DD:{index // 256:02X}:{index % 256:02X}",
+            "configID": index,
+            "plantedName": base64.b64encode(f"Garden {index}".encode()).decode(),
+            "chooseGarden": 0,
+            "lightStat": 1,
+            "lightTemp": 1,
+            "pumpLevel": 1,
+            "pumpStat": 0,
+        }
+        for index in range(count)
+    ]
+
+
+@pytest.fixture
+async def hass():
+    hass = MagicMock(spec=HomeAssistant)
+    hass.loop = asyncio.get_running_loop()
+    hass.is_stopping = False
+    hass.data = {}
+    return hass
+
+
+@pytest.fixture
+async def session():
+    session = aiohttp.ClientSession()
+    with patch(
+        "custom_components.aerogarden.api.async_get_clientsession",
+        return_value=session,
+    ):
+        yield session
+    await session.close()
+
+
+@pytest.fixture
+def api(hass):
+    api = AerogardenAPI(
+        hass,
+        "test@example.com",
+        "password",
+        HOST,
+        retry_policy=RetryPolicy(base_delay=0),
+    )
+    api._userid = "123"  # Simulate successful login
+    return api
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("garden_count", [1, 10, 100])
+async def test_one_status_request_per_cycle(hass, session, api, garden_count):
+    coordinator = AerogardenDataUpdateCoordinator(hass, api)
+    calls = []
+    unsubscribers = [
+        coordinator.async_add_listener(lambda: calls.append(1))
+        for _ in range(garden_count * ENTITIES_PER_GARDEN)
+    ]
+
+    cycles = 3
+    with aioresponses() as mocked:
+        mocked.post(STATUS_URL, payload=make_gardens(garden_count), repeat=True)
+        for _ in range(cycles):
+            await coordinator.async_refresh()
+        requests = sum(len(sent) for sent in mocked.requests.values())
+
+    assert requests == cycles
+    assert len(api.gardens) == garden_count
+    assert len(calls) == cycles * garden_count * ENTITIES_PER_GARDEN
+
+    for unsubscribe in unsubscribers:
+        unsubscribe()
+    await coordinator.async_shutdown()
+
+
+@pytest.mark.asyncio
+async def test_failed_update_marks_coordinator_unsuccessful(hass, session, api):
+    coordinator = AerogardenDataUpdateCoordinator(hass, api)
+
+    with aioresponses() as mocked:
+        mocked.post(STATUS_URL, status=500)
+        await coordinator.async_refresh()
+
+    assert coordinator.last_update_success is False
+
+
+@pytest.mark.asyncio
+async def test_unchanged_poll_writes_no_state(hass, api):
+    coordinator = AerogardenDataUpdateCoordinator(hass, api)
+    writes = []
+    with patch(
+        "custom_components.aerogarden.api.AerogardenAPI._post_request"
+    ) as mock_post:
+        mock_post.side_effect = lambda *_: make_gardens(2)
+        await coordinator.async_refresh()
+        for garden in api.gardens:
+            for field in ("pumpLevel", "pumpStat", "lightStat"):
+                coordinator.async_add_listener(
+                    lambda key=(garden, field): writes.append(key), (garden, field)
+                )
+
+        await coordinator.async_refresh()
+
+    assert coordinator.changed_fields == set()
+    assert writes == []
+
+
+async def add_platform_entities(hass, coordinator):
+    """Set up the platforms, returning their entities with state writes mocked."""
+    entry = MagicMock(entry_id="entry-id")
+    hass.data[DOMAIN] = {entry.entry_id: coordinator}
+    entities = []
+
+    def add_entities(new_entities):
+        entities.extend(new_entities)
+
+    for platform in (sensor, binary_sensor, light):
+        await platform.async_setup_entry(hass, entry, add_entities)
+    for entity in entities:
+        entity.hass = hass
+        entity.entity_id = f"sensor.{entity.unique_id}"
+        entity.async_write_ha_state = MagicMock()
+        await entity.async_added_to_hass()
+    return entities
+
+
+@pytest.mark.asyncio
+async def test_unchanged_poll_writes_no_entity_state(hass, api):
+    coordinator = AerogardenDataUpdateCoordinator(hass, api)
+    gardens = 2
+    with patch(
+        "custom_components.aerogarden.api.AerogardenAPI._post_request"
+    ) as mock_post:
+        mock_post.side_effect = lambda *_: make_gardens(gardens)
+        await coordinator.async_refresh()
+        entities = await add_platform_entities(hass, coordinator)
+        # The account entities write their state once, then only on changes
+        await coordinator.async_refresh()
+        for entity in entities:
+            entity.async_write_ha_state.reset_mock()
+
+        for _ in range(3):
+            await coordinator.async_refresh()
+
+    assert len(entities) > gardens * ENTITIES_PER_GARDEN
+    assert [
+        entity.name for entity in entities if entity.async_write_ha_state.called
+    ] == []
+    await coordinator.async_shutdown()
+
+
+@pytest.mark.asyncio
+async def test_changed_field_only_notifies_its_subscribers(hass, api):
+    coordinator = AerogardenDataUpdateCoordinator(hass, api)
+    writes = []
+    payload = make_gardens(2)
+    with patch(
+        "custom_components.aerogarden.api.AerogardenAPI._post_request"
+    ) as mock_post:
+        mock_post.side_effect = lambda *_: [dict(garden) for garden in payload]
+        await coordinator.async_refresh()
+        for garden in api.gardens:
+            for field in ("pumpLevel", "pumpStat", "lightStat"):
+                coordinator.async_add_listener(
+                    lambda key=(garden, field): writes.append(key), (garden, field)
+                )
+
+        payload[1]["pumpStat"] = 1
+        await coordinator.async_refresh()
+
+    assert coordinator.changed_fields == {("AA:BB:CC:DD:00:01-1", "pumpStat")}
+    assert writes == [("AA:BB:CC:DD:00:01-1", "pumpStat")]
+
+
+@pytest.mark.asyncio
+async def test_availability_change_notifies_every_subscriber(hass, api):
+    coordinator = AerogardenDataUpdateCoordinator(hass, api)
+    writes = []
+    with patch(
+        "custom_components.aerogarden.api.AerogardenAPI._post_request"
+    ) as mock_post:
+        mock_post.side_effect = lambda *_: make_gardens(1)
+        await coordinator.async_refresh()
+        coordinator.async_add_listener(
+            lambda: writes.append(1), ("AA:BB:CC:DD:00:00-0", "pumpStat")
+        )
+
+        mock_post.side_effect = lambda *_: None
+        await coordinator.async_refresh()
+
+    assert coordinator.last_update_success is False
+    assert writes == [1]
+
+
+@pytest.mark.asyncio
+async def test_interval_follows_poll_policy(hass, api):
+    coordinator = AerogardenDataUpdateCoordinator(
+        hass, api, AdaptivePollPolicy(jitter=0)
+    )
+    with patch(
+        "custom_components.aerogarden.api.AerogardenAPI._post_request"
+    ) as mock_post:
+        mock_post.side_effect = lambda *_: None
+        await coordinator.async_refresh()
+        await coordinator.async_refresh()
+        assert coordinator.update_interval.total_seconds() == 2 * UPDATE_INTERVAL
+
+        mock_post.side_effect = lambda *_: make_gardens(1)
+        await coordinator.async_refresh()
+        assert coordinator.update_interval.total_seconds() == UPDATE_INTERVAL
+
+    coordinator.async_note_command()
+    assert coordinator.update_interval.total_seconds() == FAST_UPDATE_INTERVAL
+
+
+@pytest.mark.asyncio
+async def test_successful_update_stores_userid(hass, api):
+    store = MagicMock()
+    coordinator = AerogardenDataUpdateCoordinator(hass, api, store=store)
+    with patch(
+        "custom_components.aerogarden.api.AerogardenAPI._post_request"
+    ) as mock_post:
+        mock_post.side_effect = lambda *_: make_gardens(1)
+        await coordinator.async_refresh()
+
+    store.async_set_userid.assert_called_with("123")
+
+
+@pytest.mark.asyncio
+async def test_unchanged_polls_do_not_write_the_store(hass, api):
+    with patch("custom_components.aerogarden.storage.Store") as mock_store:
+        store = AerogardenStore(hass, "entry-id")
+    coordinator = AerogardenDataUpdateCoordinator(hass, api, store=store)
+    with patch(
+        "custom_components.aerogarden.api.AerogardenAPI._post_request"
+    ) as mock_post:
+        mock_post.side_effect = lambda *_: make_gardens(2)
+        await coordinator.async_refresh()
+        saves = mock_store.return_value.async_delay_save.call_count
+        for _ in range(5):
+            await coordinator.async_refresh()
+
+    assert saves > 0
+    assert mock_store.return_value.async_delay_save.call_count == saves
+    assert store.last_success == coordinator.last_successful_update
+    await coordinator.async_shutdown()
+
+
+@pytest.mark.asyncio
+async def test_changed_snapshot_is_stored(hass, api):
+    store = MagicMock()
+    coordinator = AerogardenDataUpdateCoordinator(hass, api, store=store)
+    with patch(
+        "custom_components.aerogarden.api.AerogardenAPI._post_request"
+    ) as mock_post:
+        mock_post.side_effect = lambda *_: make_gardens(1)
+        await coordinator.async_refresh()
+        await coordinator.async_refresh()
+
+    store.async_set_gardens.assert_called_once_with(api.data)
+    # Every successful poll is recorded, changed or not
+    assert store.async_set_last_success.call_count == 2
+    store.async_set_last_success.assert_called_with(coordinator.last_successful_update)
+
+
+@pytest.mark.asyncio
+async def test_restored_snapshot_is_stale_until_refreshed(hass, api):
+    store = MagicMock()
+    store.gardens = {
+        "AA:BB:CC:DD:00:00-0": {
+            "airGuid": "AA:BB:CC:DD:00:00",
+            "configID": 0,
+            "plantedName": "Garden 0",
+            "chooseGarden": 0,
+            "lightStat": 1,
+            "lightTemp": 1,
+            "pumpLevel": 1,
+            "pumpStat": 0,
+        }
+    }
+    coordinator = AerogardenDataUpdateCoordinator(hass, api, store=store)
+
+    assert coordinator.async_restore() is True
+    assert coordinator.restored is True
+    assert coordinator.last_successful_update is store.last_success
+    assert api.garden_name("AA:BB:CC:DD:00:00-0") == "Garden 0_left"
+
+    writes = []
+    coordinator.async_add_listener(
+        lambda: writes.append(1), ("AA:BB:CC:DD:00:00-0", "pumpStat")
+    )
+    with patch(
+        "custom_components.aerogarden.api.AerogardenAPI._post_request"
+    ) as mock_post:
+        mock_post.side_effect = lambda *_: make_gardens(1)
+        await coordinator.async_refresh()
+
+    assert coordinator.restored is False
+    # The live data equals the snapshot, but the stale marker must be cleared
+    assert writes == [1]
+    assert store.async_set_gardens.call_count == 0
+
+
+def test_restore_falls_back_to_the_snapshot_time(hass, api):
+    store = MagicMock(
+        gardens={"AA:BB:CC:DD:00:00-0": {"airGuid": "AA:BB:CC:DD:00:00"}},
+        last_success=None,
+    )
+    coordinator = AerogardenDataUpdateCoordinator(hass, api, store=store)
+    assert coordinator.async_restore() is True
+    assert coordinator.last_successful_update is store.updated
+
+
+def test_nothing_to_restore(hass, api):
+    store = MagicMock(gardens=None)
+    coordinator = AerogardenDataUpdateCoordinator(hass, api, store=store)
+    assert coordinator.async_restore() is False
+    assert coordinator.restored is False
+
+
+@pytest.mark.asyncio
+async def test_garden_listener_is_called_for_new_gardens(hass, api):
+    coordinator = AerogardenDataUpdateCoordinator(hass, api)
+    added = []
+    unsubscribe = coordinator.async_add_garden_listener(added.append)
+    assert added == []
+
+    with patch(
+        "custom_components.aerogarden.api.AerogardenAPI._post_request"
+    ) as mock_post:
+        mock_post.side_effect = lambda *_: make_gardens(1)
+        await coordinator.async_refresh()
+        mock_post.side_effect = lambda *_: make_gardens(3)
+        await coordinator.async_refresh()
+        await coordinator.async_refresh()
+
+    assert added == [
+        ["AA:BB:CC:DD:00:00-0"],
+        ["AA:BB:CC:DD:00:01-1", "AA:BB:CC:DD:00:02-2"],
+    ]
+    unsubscribe()
+    await coordinator.async_shutdown()
+
+
+class CountingDict(dict):
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.iterations = 0
+
+    def values(self):
+        self.iterations += 1
+        return super().values()
+
+
+@pytest.mark.asyncio
+async def test_fan_out_scales_with_changed_fields(hass, api):
+    coordinator = AerogardenDataUpdateCoordinator(hass, api)
+    payload = make_gardens(1000)
+    writes = []
+    with patch(
+        "custom_components.aerogarden.api.AerogardenAPI._post_request"
+    ) as mock_post:
+        mock_post.side_effect = lambda *_: [dict(garden) for garden in payload]
+        await coordinator.async_refresh()
+        unsubscribers = [
+            coordinator.async_add_listener(
+                lambda key=(garden, field): writes.append(key), (garden, field)
+            )
+            for garden in api.gardens
+            for field in ("pumpLevel", "pumpStat", "lightStat", "plantedName")
+        ]
+        coordinator._listeners = CountingDict(coordinator._listeners)
+
+        payload[500]["pumpStat"] = 1
+        payload[501]["lightStat"] = 0
+        await coordinator.async_refresh()
+
+        assert sorted(writes) == [
+            ("AA:BB:CC:DD:01:F4-500", "pumpStat"),
+            ("AA:BB:CC:DD:01:F5-501", "lightStat"),
+        ]
+        # The listeners of unchanged gardens were never visited
+        assert coordinator._listeners.iterations == 0
+
+        for unsubscribe in unsubscribers:
+            unsubscribe()
+        assert coordinator._listeners_by_context == {}
+        assert coordinator._listeners == {}
+
+
+@pytest.mark.asyncio
+async def test_refresh_records_phase_timings(hass, session, api):
+    coordinator = AerogardenDataUpdateCoordinator(hass, api)
+    coordinator.async_add_listener(lambda: None)
+
+    with aioresponses() as mocked:
+        mocked.post(STATUS_URL, payload=make_gardens(10))
+        mocked.post(STATUS_URL, status=404)
+        await coordinator.async_refresh()
+        await coordinator.async_refresh()
+
+    succeeded, failed = coordinator.refresh_history
+    assert succeeded["success"] is True
+    assert set(succeeded["phases"]) == {"network", "decode", "parse", "entity_writes"}
+    assert (
+        sum(phase["duration"] for phase in succeeded["phases"].values())
+        <= succeeded["duration"] + 0.001
+    )
+    assert failed["success"] is False
+    assert "parse" not in failed["phases"]
+    await coordinator.async_shutdown()
+
+
+@pytest.mark.asyncio
+async def test_failing_cloud_serves_stale_data_until_max_staleness(hass, session, api):
+    coordinator = AerogardenDataUpdateCoordinator(hass, api)
+    coordinator.max_staleness = 600
+    calls = []
+    key = "AA:BB:CC:DD:00:00-0"
+    coordinator.async_add_listener(lambda: calls.append(1), (key, "pumpStat"))
+
+    with aioresponses() as mocked, patch(
+        "custom_components.aerogarden.coordinator.async_call_later"
+    ) as mock_call_later:
+        mocked.post(STATUS_URL, payload=make_gardens(1))
+        await coordinator.async_refresh()
+        assert coordinator.available and not coordinator.degraded
+        assert len(calls) == 1
+
+        mocked.post(STATUS_URL, status=500, repeat=True)
+        await coordinator.async_refresh()
+        # Polls are single probes while the cloud is down
+        await coordinator.async_refresh()
+        await coordinator.async_refresh()
+        requests = len(mocked.requests[("POST", URL(STATUS_URL))])
+
+    assert requests == 1 + 3 + 1 + 1
+    assert api.probe_only is True
+    assert coordinator.degraded is True
+    assert coordinator.available is True
+    assert api.garden_property(key, "pumpStat") == 0
+    # Only entering the degraded mode wrote the entities, once
+    assert len(calls) == 2
+    mock_call_later.assert_called_once()
+    _hass, delay, staleness_expired = mock_call_later.call_args.args
+    assert 599 < delay <= 600
+
+    # The data became too old
+    coordinator.last_successful_update -= timedelta(seconds=601)
+    staleness_expired(None)
+    assert coordinator.available is False
+    assert len(calls) == 3
+
+    with aioresponses() as mocked:
+        mocked.post(STATUS_URL, status=500)
+        await coordinator.async_refresh()
+    assert len(calls) == 3
+
+    with aioresponses() as mocked:
+        mocked.post(STATUS_URL, payload=make_gardens(1))
+        await coordinator.async_refresh()
+    assert coordinator.available and not coordinator.degraded
+    assert api.probe_only is False
+    assert coordinator.staleness < 1
+    assert len(calls) == 4
+    await coordinator.async_shutdown()
+
+
+@pytest.mark.asyncio
+async def test_recovery_cancels_the_staleness_timer(hass, session, api):
+    coordinator = AerogardenDataUpdateCoordinator(hass, api)
+    with patch(
+        "custom_components.aerogarden.coordinator.async_call_later"
+    ) as mock_call_later:
+        with aioresponses() as mocked:
+            mocked.post(STATUS_URL, payload=make_gardens(1))
+            await coordinator.async_refresh()
+            mocked.post(STATUS_URL, status=500, repeat=True)
+            await coordinator.async_refresh()
+        with aioresponses() as mocked:
+            mocked.post(STATUS_URL, payload=make_gardens(1))
+            await coordinator.async_refresh()
+
+    mock_call_later.return_value.assert_called_once_with()
+    await coordinator.async_shutdown()
@@ -0,0 +1,83 @@
+import json
+
+import pytest
+
+from custom_components.aerogarden.decoding import (
+    DECODERS,
+    StreamingArrayDecoder,
+    get_decoder,
+)
+
+DOCUMENT = [
+    {"airGuid": "AA:BB:CC:DD:EE:FF", "configID": 1, "plantedName": "Basil ✓"},
+    {"airGuid": "AA:BB:CC:DD:EE:FF", "configID": 2, "nested": [1, {"a": None}]},
+    12345,
+    "a string with ] and , inside",
+]
+BODY = json.dumps(DOCUMENT, ensure_ascii=False, indent=1).encode()
+
+
+@pytest.mark.parametrize("name", list(DECODERS))
+def test_decoders_agree(name):
+    assert get_decoder(name)(BODY) == DOCUMENT
+
+
+def test_invalid_body_raises_value_error():
+    for decoder in DECODERS.values():
+        with pytest.raises(ValueError):
+            decoder(b"\xff not json")
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 7, 64, len(BODY)])
+def test_streaming_decoder_yields_elements_as_they_complete(chunk_size):
+    decoder = StreamingArrayDecoder()
+    yielded = []
+    for start in range(0, len(BODY), chunk_size):
+        yielded.extend(decoder.feed(BODY[start : start + chunk_size]))
+    yielded.extend(decoder.feed(b""))
+
+    assert decoder.close() == DOCUMENT
+    assert yielded == DOCUMENT
+
+
+def test_streaming_decoder_yields_before_the_end():
+    decoder = StreamingArrayDecoder()
+    assert decoder.feed(b'[{"configID": 1}, {"config') == [{"configID": 1}]
+    assert decoder.feed(b'ID": 2}]') == [{"configID": 2}]
+    assert decoder.close() == [{"configID": 1}, {"configID": 2}]
+
+
+def test_streaming_decoder_waits_for_the_end_of_numbers():
+    decoder = StreamingArrayDecoder()
+    assert decoder.feed(b"[12") == []
+    assert decoder.feed(b"34]") == [1234]
+    assert decoder.close() == [1234]
+
+
+@pytest.mark.parametrize(
+    "body", [b"[]", b" [ ] ", b'{"Message": "An error has occurred."}']
+)
+def test_streaming_decoder_decodes_other_documents(body):
+    decoder = StreamingArrayDecoder()
+    decoder.feed(body)
+    assert decoder.close() == json.loads(body)
+
+
+@pytest.mark.parametrize("body", [b'[{"configID": 1}', b"[1,]", b"[1 2]", b"[1] x"])
+def test_streaming_decoder_rejects_invalid_arrays(body):
+    decoder = StreamingArrayDecoder()
+    with pytest.raises(ValueError):
+        decoder.feed(body)
+        decoder.close()
+
+
+def test_streaming_decoder_can_drop_the_returned_elements():
+    decoder = StreamingArrayDecoder(keep=False)
+    assert decoder.feed(b'[{"configID": 1}, 12') == [{"configID": 1}]
+    assert decoder.feed(b"34]") == [1234]
+    assert decoder.close() == []
+    assert decoder.items == []
+
+    empty = StreamingArrayDecoder(keep=False)
+    empty.feed(b"[]")
+    assert empty.close() == []
@@ -0,0 +1,64 @@
+from unittest.mock import MagicMock
+
+from homeassistant.const import CONF_EMAIL, CONF_PASSWORD
+import pytest
+
+from custom_components.aerogarden.capture import PayloadCapture
+from custom_components.aerogarden.const import CONF_USERID, DOMAIN
+from custom_components.aerogarden.diagnostics import (
+    async_get_config_entry_diagnostics,
+)
+from custom_components.aerogarden.models import GardenState
+
+
+@pytest.mark.asyncio
+async def test_diagnostics_redacts_account_details():
+    capture = PayloadCapture()
+    capture.record(
+        "http://example.com/api/CustomData/QueryUserDevice",
+        200,
+        b'[{"airGuid": "AA:BB:CC:DD:EE:FF", "userID": 123, "deviceIP": "10.0.0.2"}]',
+    )
+    capture.record("http://example.com/api/Admin/Login", 500, b"Server Error")
+    capture.record(
+        "http://example.com/api/Admin/Login", 200, b'{"code": 123, "msg": "Success"}'
+    )
+
+    entry = MagicMock(entry_id="entry-id")
+    entry.as_dict.return_value = {
+        "title": "Aerogarden (test@example.com)",
+        "data": {
+            CONF_EMAIL: "test@example.com",
+            CONF_PASSWORD: "password",
+            CONF_USERID: "123",
+        },
+    }
+    coordinator = MagicMock()
+    coordinator.api.payload_capture = capture
+    coordinator.api.data = {
+        "AA:BB:CC:DD:EE:FF-1": GardenState(
+            key="AA:BB:CC:DD:EE:FF-1",
+            pumpStat=1,
+            deviceIP="10.0.0.2",
+            deviceID="device",
+            extra={"userID": 123},
+        )
+    }
+    hass = MagicMock()
+    hass.data = {DOMAIN: {"entry-id": coordinator}}
+
+    diagnostics = await async_get_config_entry_diagnostics(hass, entry)
+
+    assert diagnostics["entry"]["data"][CONF_PASSWORD] == "**REDACTED**"
+    assert diagnostics["entry"]["data"][CONF_USERID] == "**REDACTED**"
+    assert diagnostics["entry"]["title"] == "**REDACTED**"
+    assert diagnostics["gardens"]["AA:BB:CC:DD:EE:FF-1"]["userID"] == "**REDACTED**"
+    assert diagnostics["gardens"]["AA:BB:CC:DD:EE:FF-1"]["pumpStat"] == 1
+    captured = diagnostics["payload_capture"]
+    assert captured[0]["body"][0]["userID"] == "**REDACTED**"
+    assert captured[0]["body"][0]["deviceIP"] == "**REDACTED**"
+    assert captured[1]["body"] == "Server Error"
+    # The code of a successful login is the userID
+    assert captured[2]["body"] == {"code": "**REDACTED**", "msg": "Success"}
+    garden = diagnostics["gardens"]["AA:BB:CC:DD:EE:FF-1"]
+    assert garden["deviceIP"] == garden["deviceID"] == "**REDACTED**"
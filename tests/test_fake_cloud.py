@@ -0,0 +1,261 @@
+import asyncio
+from contextlib import asynccontextmanager
+import time
+from unittest.mock import MagicMock, patch
+
+import aiohttp
+from homeassistant.core import HomeAssistant
+import pytest
+
+from custom_components.aerogarden.api import AerogardenAPI, _GardenParser
+from custom_components.aerogarden.resilience import RetryPolicy
+from custom_components.aerogarden.scheduler import DATA_SCHEDULERS, RequestScheduler
+
+from .fake_cloud import EMAIL, PASSWORD, USER_ID, FakeAerogardenCloud
+
+
+@pytest.fixture
+async def session():
+    session = aiohttp.ClientSession()
+    with patch(
+        "custom_components.aerogarden.api.async_get_clientsession",
+        return_value=session,
+    ):
+        yield session
+    await session.close()
+
+
+async def make_api(cloud, password=PASSWORD):
+    host = await cloud.start()
+    hass = MagicMock(spec=HomeAssistant)
+    # Keep the shared rate limit out of the way of the tests
+    hass.data = {
+        DATA_SCHEDULERS: {
+            host: RequestScheduler(rate=1000, burst=100, startup_jitter=0)
+        }
+    }
+    return AerogardenAPI(
+        hass, EMAIL, password, host, retry_policy=RetryPolicy(base_delay=0)
+    )
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("garden_count", [1, 25, 1000])
+async def test_login_and_poll(session, garden_count):
+    cloud = FakeAerogardenCloud(gardens=garden_count)
+    api = await make_api(cloud)
+    try:
+        assert await api.login() is True
+        assert api.userid == str(USER_ID)
+        assert await api.update() is True
+    finally:
+        await cloud.stop()
+
+    assert len(api.gardens) == garden_count
+    assert api.garden_name("AA:BB:CC:00:00:00-0") == "Garden 0_left"
+    assert cloud.requests == {"login": 1, "status": 1, "update": 0}
+
+
+@pytest.mark.asyncio
+async def test_invalid_credentials(session):
+    cloud = FakeAerogardenCloud()
+    api = await make_api(cloud, password="wrong")
+    try:
+        assert await api.login() is False
+    finally:
+        await cloud.stop()
+
+    assert api.error == f"Invalid Credentials for {EMAIL}"
+
+
+@pytest.mark.asyncio
+async def test_light_toggle_round_trip(session):
+    cloud = FakeAerogardenCloud(gardens=2)
+    api = await make_api(cloud)
+    try:
+        assert await api.update() is True
+        assert await api.light_toggle("AA:BB:CC:00:00:01-1") is True
+        assert await api.update() is True
+    finally:
+        await cloud.stop()
+
+    assert api.garden_property("AA:BB:CC:00:00:01-1", "lightStat") == 0
+    assert api.garden_property("AA:BB:CC:00:00:00-0", "lightStat") == 1
+
+
+@pytest.mark.asyncio
+async def test_server_errors_are_retried(session):
+    cloud = FakeAerogardenCloud(gardens=1, error_rate=0.5, seed=1)
+    api = await make_api(cloud)
+    api._userid = str(USER_ID)
+    try:
+        results = [await api.update() for _ in range(10)]
+    finally:
+        await cloud.stop()
+
+    assert cloud.requests["status"] > 10
+    assert results.count(True) >= 8
+
+
+@pytest.mark.asyncio
+async def test_streamed_poll_matches_buffered_poll(session):
+    cloud = FakeAerogardenCloud(gardens=200, padding=1000)
+    api = await make_api(cloud)
+    try:
+        assert await api.login() is True
+        assert await api.update() is True
+        buffered = dict(api.data)
+
+        api.stream_responses = True
+        api._by_fingerprint = {}
+        assert await api.update() is True
+    finally:
+        await cloud.stop()
+
+    assert api.data == buffered
+    assert api.parsing["last_parsed"] == 200
+
+
+@pytest.mark.asyncio
+async def test_streamed_poll_parses_gardens_as_they_arrive(session):
+    cloud = FakeAerogardenCloud(gardens=200, padding=1000)
+    api = await make_api(cloud)
+    api.stream_responses = True
+    batches = []
+    parse = _GardenParser.parse
+
+    def record_batch(parser, records):
+        batches.append(len(records))
+        parse(parser, records)
+
+    try:
+        assert await api.login() is True
+        assert await api.update() is True
+        first = dict(api.data)
+        with patch.object(_GardenParser, "parse", record_batch):
+            assert await api.update() is True
+    finally:
+        await cloud.stop()
+
+    # The body spans several chunks, each parsed once it was decoded
+    assert len(batches) > 1 and sum(batches) == 200
+    # Unchanged gardens are reused from the streamed records too
+    assert api.parsing["last_reused"] == 200
+    assert all(api.data[key] is garden for key, garden in first.items())
+
+
+def slow_first_request(slow, fast=0.0):
+    """Latency of the stand-in: ``slow`` for the first request, then ``fast``."""
+    latencies = iter([slow])
+    return lambda: next(latencies, fast)
+
+
+def warm_up(api, endpoint, samples=20, latency=0.01, error=None):
+    for _ in range(samples):
+        api.metrics.endpoints[endpoint].record(latency, 0, error)
+
+
+@pytest.mark.asyncio
+async def test_slow_poll_is_hedged(session):
+    cloud = FakeAerogardenCloud(gardens=2, latency=slow_first_request(1.0))
+    api = await make_api(cloud)
+    api._userid = str(USER_ID)
+    api.hedge_requests = True
+    warm_up(api, "status")
+    try:
+        started = time.perf_counter()
+        assert await api.update() is True
+        elapsed = time.perf_counter() - started
+    finally:
+        await cloud.stop()
+
+    # The hedge was sent after the p95 bucket bound of 0.1 s and answered first
+    assert elapsed < 0.5
+    assert len(api.gardens) == 2
+    assert cloud.requests["status"] == 2
+    status = api.metrics.endpoints["status"]
+    assert (status.hedges, status.hedge_wins) == (1, 1)
+    assert status.failures == {"cancelled": 1}
+    assert api.metrics.failed == 0
+
+
+@pytest.mark.asyncio
+async def test_timed_out_attempts_do_not_time_hedges(session):
+    cloud = FakeAerogardenCloud(gardens=1, latency=slow_first_request(0.3))
+    api = await make_api(cloud)
+    api._userid = str(USER_ID)
+    api.hedge_requests = True
+    warm_up(api, "status", error="timeout")
+    try:
+        assert await api.update() is True
+    finally:
+        await cloud.stop()
+
+    assert cloud.requests["status"] == 1
+    status = api.metrics.endpoints["status"]
+    assert status.hedges == 0
+    # The timeouts still count in the latency shown to the user
+    assert status.latency.count == 21
+
+
+@pytest.mark.asyncio
+async def test_commands_are_never_hedged(session):
+    cloud = FakeAerogardenCloud(gardens=1, latency=slow_first_request(0.3))
+    api = await make_api(cloud)
+    api._userid = str(USER_ID)
+    api.hedge_requests = True
+    warm_up(api, "update")
+    try:
+        await api.update()
+        assert await api.light_toggle(api.gardens[0]) is True
+    finally:
+        await cloud.stop()
+
+    assert cloud.requests["update"] == 1
+    assert api.metrics.endpoints["update"].hedges == 0
+
+
+@pytest.mark.asyncio
+async def test_retries_stop_at_the_endpoint_deadline(session):
+    cloud = FakeAerogardenCloud(gardens=1, latency=1.0)
+    api = await make_api(cloud)
+    api._userid = str(USER_ID)
+    api._retry_policy = RetryPolicy(attempts=10, base_delay=0)
+    api.timeouts["status"] = 0.05
+    api.deadlines["status"] = 0.12
+    try:
+        started = time.perf_counter()
+        assert await api.update() is False
+        elapsed = time.perf_counter() - started
+    finally:
+        await cloud.stop()
+
+    assert elapsed < 0.3
+    assert api.metrics.endpoints["status"].failures["timeout"] < 5
+
+
+@pytest.mark.asyncio
+async def test_deadline_covers_the_wait_for_a_slot(session):
+    cloud = FakeAerogardenCloud(gardens=1)
+    api = await make_api(cloud)
+    api._userid = str(USER_ID)
+    api.deadlines["status"] = 0.1
+
+    @asynccontextmanager
+    async def busy_slot(priority):
+        await asyncio.sleep(1.0)
+        yield
+
+    api._scheduler.slot = busy_slot
+    try:
+        started = time.perf_counter()
+        assert await api.update() is False
+        elapsed = time.perf_counter() - started
+    finally:
+        await cloud.stop()
+
+    assert elapsed < 0.5
+    assert cloud.requests["status"] == 0
+    status = api.metrics.endpoints["status"]
+    assert status.failures == {"timeout": 1}
+    assert status.latency.count == 0
@@ -0,0 +1,180 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import aiohttp
+from homeassistant.const import (
+    CONF_EMAIL,
+    CONF_PASSWORD,
+    EVENT_HOMEASSISTANT_CLOSE,
+    EVENT_HOMEASSISTANT_FINAL_WRITE,
+)
+from homeassistant.core import HomeAssistant
+import pytest
+
+from custom_components.aerogarden import (
+    PLATFORMS,
+    async_setup_entry,
+    async_unload_entry,
+)
+from custom_components.aerogarden.const import CONF_USERID, DOMAIN
+from custom_components.aerogarden.scheduler import DATA_SCHEDULERS, RequestScheduler
+
+from .fake_cloud import EMAIL, PASSWORD, USER_ID, FakeAerogardenCloud
+
+
+@pytest.fixture
+async def cloud():
+    cloud = FakeAerogardenCloud(gardens=2)
+    host = await cloud.start()
+    with patch("custom_components.aerogarden.DEFAULT_HOST", host):
+        yield cloud
+    await cloud.stop()
+
+
+@pytest.fixture
+async def hass(cloud, session):
+    hass = MagicMock(spec=HomeAssistant)
+    hass.loop = asyncio.get_running_loop()
+    hass.is_stopping = False
+    hass.data = {
+        DATA_SCHEDULERS: {
+            cloud.host: RequestScheduler(rate=1000, burst=100, startup_jitter=0)
+        }
+    }
+    hass.bus = MagicMock()
+    hass.config_entries.async_forward_entry_setups = AsyncMock()
+    return hass
+
+
+@pytest.fixture
+async def session():
+    session = aiohttp.ClientSession()
+    with patch(
+        "custom_components.aerogarden.api.async_get_clientsession",
+        return_value=session,
+    ):
+        yield session
+    await session.close()
+
+
+@pytest.fixture
+def store():
+    with patch("custom_components.aerogarden.storage.Store") as mock_store:
+        mock_store.return_value.async_load = AsyncMock(return_value=None)
+        mock_store.return_value.async_save = AsyncMock()
+        yield mock_store.return_value
+
+
+def listener(hass, event):
+    """Return the listener registered once for ``event``."""
+    for call in hass.bus.async_listen_once.call_args_list:
+        if call.args[0] == event:
+            return call.args[1]
+    raise AssertionError(f"No listener for {event}")
+
+
+def make_entry(password=PASSWORD, **data):
+    entry = MagicMock(
+        entry_id="entry-id",
+        data={CONF_EMAIL: EMAIL, CONF_PASSWORD: password, **data},
+        options={},
+    )
+    entry.background_tasks = []
+    entry.async_create_background_task = (
+        lambda hass, target, name: entry.background_tasks.append(
+            hass.loop.create_task(target)
+        )
+    )
+    return entry
+
+
+@pytest.mark.asyncio
+async def test_setup_forwards_platforms_once_and_refreshes_in_background(
+    hass, cloud, store
+):
+    entry = make_entry()
+
+    assert await async_setup_entry(hass, entry) is True
+    hass.config_entries.async_forward_entry_setups.assert_called_once_with(
+        entry, PLATFORMS
+    )
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    assert cloud.requests["status"] == 0
+
+    await asyncio.gather(*entry.background_tasks)
+    assert cloud.requests == {"login": 1, "status": 1, "update": 0}
+    assert len(coordinator.api.gardens) == 2
+    assert set(coordinator.startup_timer.as_dict()) == {
+        "storage",
+        "login",
+        "entity_creation",
+        "first_fetch",
+        "parse",
+    }
+    # Both requests went through the integration's own session
+    connections = coordinator.api.connections
+    assert connections.requests == 2
+    assert connections.connections_created == 1
+    assert connections.connections_reused == 1
+    await coordinator.async_shutdown()
+
+    hass.config_entries.async_unload_platforms = AsyncMock(return_value=True)
+    assert await async_unload_entry(hass, entry) is True
+    assert coordinator.api._session is None
+    # The time of the last poll is written when the entry unloads
+    assert store.async_save.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_setup_fails_on_invalid_credentials(hass, cloud, store):
+    entry = make_entry(password="wrong")
+
+    assert await async_setup_entry(hass, entry) is False
+    assert hass.config_entries.async_forward_entry_setups.call_count == 0
+    assert entry.entry_id not in hass.data[DOMAIN]
+
+
+@pytest.mark.asyncio
+async def test_session_is_closed_when_home_assistant_stops(hass, cloud, store):
+    entry = make_entry()
+
+    assert await async_setup_entry(hass, entry) is True
+    await asyncio.gather(*entry.background_tasks)
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    await coordinator.async_shutdown()
+    assert coordinator.api._session is not None
+
+    close_session = listener(hass, EVENT_HOMEASSISTANT_CLOSE)
+    entry.async_on_unload.assert_any_call(hass.bus.async_listen_once.return_value)
+    await close_session(None)
+    assert coordinator.api._session is None
+
+
+@pytest.mark.asyncio
+async def test_last_success_is_saved_on_final_write(hass, cloud, store):
+    entry = make_entry()
+
+    assert await async_setup_entry(hass, entry) is True
+    await asyncio.gather(*entry.background_tasks)
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    await coordinator.async_shutdown()
+
+    await listener(hass, EVENT_HOMEASSISTANT_FINAL_WRITE)(None)
+    saved = store.async_save.call_args.args[0]
+    assert saved["last_success"] == coordinator.last_successful_update.isoformat()
+
+
+@pytest.mark.asyncio
+async def test_setup_reuses_the_login_of_the_config_flow(hass, cloud, store):
+    entry = make_entry(**{CONF_USERID: str(USER_ID)})
+
+    assert await async_setup_entry(hass, entry) is True
+    await asyncio.gather(*entry.background_tasks)
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    await coordinator.async_shutdown()
+    await coordinator.api.async_close()
+
+    assert cloud.requests == {"login": 0, "status": 1, "update": 0}
+    # The first poll validated it, it is stored for the next runs
+    saved = store.async_delay_save.call_args.args[0]()
+    assert saved["userid"] == str(USER_ID)
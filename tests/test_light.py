@@ -0,0 +1,124 @@
+import asyncio
+import dataclasses
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from homeassistant.core import HomeAssistant
+import pytest
+
+from custom_components.aerogarden.api import AerogardenAPI
+from custom_components.aerogarden.coordinator import AerogardenDataUpdateCoordinator
+from custom_components.aerogarden.light import AerogardenLight
+from custom_components.aerogarden.models import GardenState
+
+GARDEN = "AA:BB:CC:DD:EE:FF-1"
+
+
+@pytest.fixture
+async def coordinator():
+    hass = MagicMock(spec=HomeAssistant)
+    hass.loop = asyncio.get_running_loop()
+    hass.is_stopping = False
+    hass.data = {}
+    api = AerogardenAPI(hass, "test@example.com", "password", "http://example.com")
+    api._userid = "123"  # Simulate successful login
+    api._data = {
+        GARDEN: GardenState(
+            key=GARDEN, plantedName="Basil", chooseGarden=0, lightStat=0
+        )
+    }
+    coordinator = AerogardenDataUpdateCoordinator(hass, api)
+    coordinator.data = api.data
+    return coordinator
+
+
+@pytest.fixture
+def light(coordinator):
+    light = AerogardenLight(coordinator, GARDEN)
+    light.hass = coordinator.hass
+    light.async_write_ha_state = MagicMock()
+    light._toggle_debouncer = MagicMock(async_call=AsyncMock())
+    with patch("custom_components.aerogarden.light.async_call_later"):
+        yield light
+
+
+def report_light(coordinator, light_stat):
+    coordinator.api._data = {
+        GARDEN: dataclasses.replace(coordinator.api.data[GARDEN], lightStat=light_stat)
+    }
+    coordinator.async_set_updated_data(coordinator.api.data)
+
+
+@pytest.mark.asyncio
+async def test_turn_on_is_optimistic(light):
+    await light.async_turn_on()
+    assert light.is_on is True
+    assert light.async_write_ha_state.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_burst_sends_single_toggle(coordinator, light):
+    with patch.object(
+        AerogardenAPI, "light_toggle", AsyncMock(return_value=True)
+    ) as mock_toggle:
+        await light.async_turn_on()
+        await light.async_turn_off()
+        await light.async_turn_on()
+        await light._async_apply_target()
+
+    assert mock_toggle.call_count == 1
+    assert light.is_on is True
+
+
+@pytest.mark.asyncio
+async def test_burst_back_to_current_state_sends_nothing(light):
+    with patch.object(
+        AerogardenAPI, "light_toggle", AsyncMock(return_value=True)
+    ) as mock_toggle:
+        await light.async_turn_on()
+        await light.async_turn_off()
+        await light._async_apply_target()
+
+    assert mock_toggle.call_count == 0
+    assert light.is_on is False
+    assert light._target is None
+
+
+@pytest.mark.asyncio
+async def test_second_burst_before_confirmation_toggles_back(coordinator, light):
+    with patch.object(
+        AerogardenAPI, "light_toggle", AsyncMock(return_value=True)
+    ) as mock_toggle:
+        await light.async_turn_on()
+        await light._async_apply_target()
+        # The cloud has not reported the light on yet
+        await light.async_turn_off()
+        await light._async_apply_target()
+
+    assert mock_toggle.call_count == 2
+    assert light.is_on is False
+
+
+@pytest.mark.asyncio
+async def test_confirmation_clears_optimistic_state(coordinator, light):
+    coordinator.async_add_listener(
+        light._handle_coordinator_update, (GARDEN, "lightStat")
+    )
+    with patch.object(AerogardenAPI, "light_toggle", AsyncMock(return_value=True)):
+        await light.async_turn_on()
+        await light._async_apply_target()
+
+    assert coordinator.poll_policy.mode == "fast"
+    report_light(coordinator, 1)
+
+    assert light._target is None
+    assert light._expected is None
+    assert light.is_on is True
+
+
+@pytest.mark.asyncio
+async def test_failed_toggle_reverts(light):
+    with patch.object(AerogardenAPI, "light_toggle", AsyncMock(return_value=False)):
+        await light.async_turn_on()
+        await light._async_apply_target()
+
+    assert light.is_on is False
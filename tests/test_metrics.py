@@ -0,0 +1,50 @@
+from custom_components.aerogarden.metrics import (
+    EndpointMetrics,
+    LatencyHistogram,
+    RequestMetrics,
+)
+
+
+def test_histogram_buckets_and_percentiles():
+    histogram = LatencyHistogram(buckets=(0.1, 1.0))
+    for latency in (0.05, 0.05, 0.5, 0.5, 0.5, 0.5, 0.5, 0.5, 0.5, 3.0):
+        histogram.record(latency)
+
+    assert histogram.counts == [2, 7, 1]
+    assert histogram.percentile(10) == 0.1
+    assert histogram.percentile(50) == 1.0
+    assert histogram.percentile(95) == 3.0
+    assert histogram.as_dict()["buckets"] == {"le_0.1": 2, "le_1": 7, "le_inf": 1}
+    assert histogram.as_dict()["mean"] == 0.66
+
+
+def test_empty_histogram():
+    assert LatencyHistogram().percentile(95) is None
+    assert LatencyHistogram().as_dict()["mean"] is None
+
+
+def test_endpoint_metrics():
+    metrics = EndpointMetrics()
+    metrics.record(0.2, 100)
+    metrics.record(None, 0, "circuit_open")
+    metrics.record(0.3, 50, "http_500")
+    metrics.record(0.1, 0, "cancelled")
+    metrics.record(5.0, 0, "timeout")
+
+    assert metrics.requests == 5
+    assert metrics.failed == 3
+    # A timed out attempt took its time, a cancelled one was cut short
+    assert metrics.latency.count == 3
+    assert metrics.latency.max == 5.0
+    # Hedges are timed from the answered attempts only
+    assert metrics.answered_latency.count == 2
+    assert metrics.answered_latency.max == 0.3
+    assert metrics.response_bytes == 150
+    assert metrics.last_response_bytes == 50
+    assert metrics.max_response_bytes == 100
+
+
+def test_unknown_urls_are_grouped():
+    metrics = RequestMetrics({"http://example.com/status": "status"})
+    assert metrics.endpoint("http://example.com/status") is metrics.endpoints["status"]
+    assert metrics.endpoint("http://example.com/other") is metrics.endpoints["other"]
@@ -0,0 +1,88 @@
+import base64
+import timeit
+from unittest.mock import patch
+
+import orjson
+import pytest
+
+from custom_components.aerogarden.const import DOMAIN
+from custom_components.aerogarden.models import GardenState, fingerprint
+
+from .fake_cloud import make_garden
+
+
+def raw_garden(**overrides):
+    return {
+        "airGuid": "AA:BB:CC:DD:EE:FF",
+        "configID": 1,
+        "plantedName": base64.b64encode(b"Basil").decode(),
+        "chooseGarden": 1,
+        "lightStat": 1,
+        **overrides,
+    }
+
+
+def test_from_cloud_parses_record():
+    raw = raw_garden(userID=123)
+    garden = GardenState.from_cloud(raw)
+
+    assert garden.key == "AA:BB:CC:DD:EE:FF-1"
+    assert garden.plantedName == "Basil"
+    assert garden.name == "Basil_right"
+    assert garden.get("lightStat") == 1
+    assert garden.get("userID") == 123
+    assert garden.get("pumpStat") is None
+    assert garden.as_dict()["userID"] == 123
+    # The raw record may be shared with other callers
+    assert raw["plantedName"] == base64.b64encode(b"Basil").decode()
+
+
+def test_name_without_choose_garden():
+    raw = raw_garden()
+    del raw["chooseGarden"]
+    assert GardenState.from_cloud(raw).name == "Basil"
+
+
+def test_device_info_is_memoized_across_polls():
+    first = GardenState.from_cloud(raw_garden())
+    device_info = first.device_info
+    assert device_info["identifiers"] == {(DOMAIN, "AA:BB:CC:DD:EE:FF-1")}
+    assert device_info["name"] == "Basil_right"
+
+    second = GardenState.from_cloud(raw_garden(lightStat=0), first)
+    assert second != first
+    assert second.device_info is device_info
+
+    renamed = GardenState.from_cloud(
+        raw_garden(plantedName=base64.b64encode(b"Thyme").decode()), second
+    )
+    assert renamed.device_info is not device_info
+    assert renamed.device_info["name"] == "Thyme_right"
+
+
+@pytest.mark.parametrize("json_module", [orjson, None], ids=["orjson", "no_orjson"])
+def test_fingerprint_tells_apart_values_that_hash_alike(json_module):
+    with patch("custom_components.aerogarden.models.orjson", json_module):
+        keys = [
+            fingerprint(raw_garden(pumpLevel=value)) for value in (-1, -2, 1, 1.0, True)
+        ]
+        assert len(set(keys)) == 5
+        assert fingerprint(raw_garden(pumpLevel=-1)) == keys[0]
+        assert fingerprint(raw_garden(extra={"unhashable"})) is None
+
+
+def test_reusing_by_fingerprint_is_cheaper_than_parsing():
+    raw_gardens = [make_garden(index) for index in range(1000)]
+    by_fingerprint = {
+        fingerprint(raw): GardenState.from_cloud(raw) for raw in raw_gardens
+    }
+
+    def reuse():
+        return [by_fingerprint[fingerprint(raw)] for raw in raw_gardens]
+
+    def parse():
+        return [GardenState.from_cloud(raw) for raw in raw_gardens]
+
+    assert min(timeit.repeat(reuse, number=5, repeat=3)) < min(
+        timeit.repeat(parse, number=5, repeat=3)
+    )
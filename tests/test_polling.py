@@ -0,0 +1,77 @@
+import pytest
+
+from custom_components.aerogarden.polling import (
+    MODE_BACKOFF,
+    MODE_FAST,
+    MODE_IDLE,
+    MODE_NORMAL,
+    AdaptivePollPolicy,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def policy(clock):
+    return AdaptivePollPolicy(
+        base=30,
+        fast=5,
+        idle=120,
+        fast_window=60,
+        idle_after=600,
+        max_backoff=900,
+        jitter=0,
+        clock=clock,
+    )
+
+
+def test_fast_after_command(policy, clock):
+    assert policy.note_command() == 5
+    assert policy.mode == MODE_FAST
+
+    clock.now += 30
+    assert policy.record_success(changed=True) == 5
+
+    clock.now += 31
+    assert policy.record_success(changed=False) == 30
+    assert policy.mode == MODE_NORMAL
+
+
+def test_slow_when_idle(policy, clock):
+    clock.now += 599
+    assert policy.record_success(changed=False) == 30
+
+    clock.now += 1
+    assert policy.record_success(changed=False) == 120
+    assert policy.mode == MODE_IDLE
+
+    assert policy.record_success(changed=True) == 30
+
+
+def test_backoff_on_failures(policy):
+    intervals = [policy.record_failure() for _ in range(7)]
+    assert intervals == [30, 60, 120, 240, 480, 900, 900]
+    assert policy.mode == MODE_BACKOFF
+    assert policy.as_dict()["consecutive_failures"] == 7
+
+    assert policy.record_success(changed=False) == 30
+    assert policy.as_dict()["poll_count"] == 8
+    assert policy.as_dict()["failed_polls"] == 7
+
+
+def test_backoff_jitter_stays_in_bounds(clock):
+    policy = AdaptivePollPolicy(base=30, jitter=0.2, clock=clock)
+    for _ in range(3):
+        policy.record_failure()
+    assert 120 * 0.8 <= policy.interval <= 120 * 1.2
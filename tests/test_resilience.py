@@ -0,0 +1,92 @@
+import pytest
+
+from custom_components.aerogarden.resilience import (
+    BREAKER_CLOSED,
+    BREAKER_HALF_OPEN,
+    BREAKER_OPEN,
+    CircuitBreaker,
+    RetryPolicy,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def breaker(clock):
+    return CircuitBreaker(failure_threshold=3, reset_timeout=60, clock=clock)
+
+
+def test_retry_delay_is_capped_with_jitter():
+    policy = RetryPolicy(attempts=6, base_delay=1, max_delay=10, jitter=0.5)
+    for attempt, full_delay in enumerate([1, 2, 4, 8, 10, 10], start=1):
+        assert full_delay * 0.5 <= policy.delay(attempt) <= full_delay
+
+
+def test_breaker_opens_after_threshold(breaker):
+    for _ in range(2):
+        breaker.record_failure()
+        assert breaker.allow_request() is True
+    breaker.record_failure()
+
+    assert breaker.state == BREAKER_OPEN
+    assert breaker.allow_request() is False
+    assert breaker.as_dict()["rejected_requests"] == 1
+
+
+def test_success_resets_failure_count(breaker):
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == BREAKER_CLOSED
+
+
+def test_half_open_allows_a_single_probe(breaker, clock):
+    for _ in range(3):
+        breaker.record_failure()
+
+    clock.now += 60
+    assert breaker.allow_request() is True
+    assert breaker.state == BREAKER_HALF_OPEN
+    assert breaker.probing is True
+    assert breaker.allow_request() is False
+
+    breaker.record_success()
+    assert breaker.state == BREAKER_CLOSED
+    assert breaker.allow_request() is True
+
+
+def test_failed_probe_reopens(breaker, clock):
+    for _ in range(3):
+        breaker.record_failure()
+    clock.now += 60
+    assert breaker.allow_request() is True
+
+    breaker.record_failure()
+    assert breaker.state == BREAKER_OPEN
+    assert breaker.allow_request() is False
+    assert breaker.times_opened == 2
+
+    clock.now += 60
+    assert breaker.allow_request() is True
+
+
+def test_abandoned_probe_is_released(breaker, clock):
+    for _ in range(3):
+        breaker.record_failure()
+    clock.now += 60
+    assert breaker.allow_request() is True
+
+    breaker.release_probe()
+    assert breaker.allow_request() is True
@@ -0,0 +1,115 @@
+import asyncio
+from unittest.mock import patch
+
+import pytest
+
+from custom_components.aerogarden.scheduler import (
+    PRIORITY_COMMAND,
+    PRIORITY_POLL,
+    RequestScheduler,
+)
+
+
+async def run_request(scheduler, priority, log, name, hold=0.01):
+    async with scheduler.slot(priority):
+        log.append(name)
+        await asyncio.sleep(hold)
+
+
+@pytest.mark.asyncio
+async def test_concurrency_cap():
+    scheduler = RequestScheduler(
+        rate=1000, burst=100, max_concurrent=2, startup_jitter=0
+    )
+    active = 0
+    peak = 0
+
+    async def request():
+        nonlocal active, peak
+        async with scheduler.slot():
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+
+    await asyncio.gather(*(request() for _ in range(10)))
+    assert peak == 2
+    assert scheduler.requests == 10
+    assert scheduler.queue_depth == 0
+
+
+@pytest.mark.asyncio
+async def test_commands_jump_ahead_of_polls():
+    scheduler = RequestScheduler(
+        rate=1000, burst=100, max_concurrent=1, startup_jitter=0
+    )
+    log = []
+    blocker = asyncio.create_task(run_request(scheduler, PRIORITY_POLL, log, "first"))
+    await asyncio.sleep(0)
+    polls = [
+        asyncio.create_task(run_request(scheduler, PRIORITY_POLL, log, f"poll{i}"))
+        for i in range(3)
+    ]
+    await asyncio.sleep(0)
+    command = asyncio.create_task(
+        run_request(scheduler, PRIORITY_COMMAND, log, "command")
+    )
+    await asyncio.gather(blocker, command, *polls)
+    assert log == ["first", "command", "poll0", "poll1", "poll2"]
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_limits_rate():
+    scheduler = RequestScheduler(rate=50, burst=1, max_concurrent=10, startup_jitter=0)
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    await asyncio.gather(
+        *(run_request(scheduler, PRIORITY_POLL, [], i, hold=0) for i in range(5))
+    )
+    # One token is available up front, the other four refill at 50 per second
+    assert loop.time() - started >= 0.07
+    assert scheduler.max_wait > 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_leaves_queue():
+    scheduler = RequestScheduler(
+        rate=1000, burst=100, max_concurrent=1, startup_jitter=0
+    )
+    blocker = asyncio.create_task(run_request(scheduler, PRIORITY_POLL, [], "a", 0.05))
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(run_request(scheduler, PRIORITY_POLL, [], "b"))
+    await asyncio.sleep(0)
+    assert scheduler.queue_depth == 1
+
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    assert scheduler.queue_depth == 0
+
+    await blocker
+    await run_request(scheduler, PRIORITY_POLL, [], "c")
+    assert scheduler.as_dict()["active_requests"] == 0
+
+
+@pytest.mark.asyncio
+async def test_startup_polls_are_jittered_when_busy():
+    scheduler = RequestScheduler(
+        rate=1000, burst=100, max_concurrent=5, startup_jitter=0.05
+    )
+    log = []
+    loop = asyncio.get_running_loop()
+    blocker = asyncio.create_task(run_request(scheduler, PRIORITY_POLL, log, "a", 0.1))
+    await asyncio.sleep(0)
+    started = loop.time()
+    await run_request(scheduler, PRIORITY_COMMAND, log, "command", hold=0)
+    assert loop.time() - started < 0.05
+
+    # Polls wait a random delay, up to the jitter, before queueing
+    with patch(
+        "custom_components.aerogarden.scheduler.random.uniform", return_value=0.05
+    ):
+        started = loop.time()
+        await run_request(scheduler, PRIORITY_POLL, log, "poll", hold=0)
+        assert loop.time() - started >= 0.05
+    await blocker
@@ -0,0 +1,177 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import aiohttp
+from aioresponses import aioresponses
+from homeassistant.core import HomeAssistant, ServiceCall
+from homeassistant.exceptions import HomeAssistantError
+import pytest
+import voluptuous as vol
+
+from custom_components.aerogarden.api import AerogardenAPI
+from custom_components.aerogarden.const import DOMAIN
+from custom_components.aerogarden.coordinator import AerogardenDataUpdateCoordinator
+from custom_components.aerogarden.models import GardenState
+from custom_components.aerogarden.services import (
+    APPLY_CONFIG_SCHEMA,
+    PROFILE_SCHEMA,
+    SERVICE_APPLY_CONFIG,
+    SERVICE_PROFILE,
+    _async_apply_config,
+    _async_profile,
+)
+
+from .fake_cloud import make_garden
+
+HOST = "http://example.com"
+STATUS_URL = f"{HOST}/api/CustomData/QueryUserDevice"
+
+
+@pytest.fixture
+async def hass(tmp_path):
+    hass = MagicMock(spec=HomeAssistant)
+    hass.loop = asyncio.get_running_loop()
+    hass.is_stopping = False
+    hass.data = {}
+    hass.config = MagicMock()
+    hass.config.path = lambda name: str(tmp_path / name)
+
+    async def run_in_executor(target, *args):
+        return target(*args)
+
+    hass.async_add_executor_job = run_in_executor
+    return hass
+
+
+@pytest.fixture
+async def session():
+    session = aiohttp.ClientSession()
+    with patch(
+        "custom_components.aerogarden.api.async_get_clientsession",
+        return_value=session,
+    ):
+        yield session
+    await session.close()
+
+
+@pytest.fixture
+def coordinator(hass):
+    api = AerogardenAPI(hass, "test@example.com", "password", HOST)
+    api._userid = "123"
+    coordinator = AerogardenDataUpdateCoordinator(hass, api)
+    hass.data[DOMAIN] = {"entry-id": coordinator}
+    return coordinator
+
+
+def make_call(**data):
+    return ServiceCall(DOMAIN, SERVICE_PROFILE, PROFILE_SCHEMA(data))
+
+
+def make_apply_call(**data):
+    return ServiceCall(DOMAIN, SERVICE_APPLY_CONFIG, APPLY_CONFIG_SCHEMA(data))
+
+
+@pytest.mark.asyncio
+async def test_profile_writes_a_report(hass, session, coordinator):
+    with aioresponses() as mocked:
+        mocked.post(
+            STATUS_URL, payload=[make_garden(index) for index in range(5)], repeat=True
+        )
+        response = await _async_profile(hass, make_call(polls=2))
+
+    assert len(response["refreshes"]) == 2
+    with open(response["path"], encoding="utf-8") as file:
+        report = file.read()
+    assert "2 refreshes" in report
+    assert "cumulative time" in report
+    assert "allocation sites" in report
+    await coordinator.async_shutdown()
+
+
+@pytest.mark.asyncio
+async def test_profile_rejects_unknown_entry(hass, coordinator):
+    with pytest.raises(HomeAssistantError):
+        await _async_profile(hass, make_call(config_entry_id="unknown"))
+
+
+@pytest.mark.asyncio
+async def test_apply_config_refreshes_once(hass, coordinator):
+    coordinator.api._data = {
+        key: GardenState(key=key, plantedName=name, chooseGarden=0)
+        for key, name in (("AA-0", "Kitchen"), ("BB-0", "Office"), ("CC-0", "Den"))
+    }
+    coordinator.async_request_refresh = AsyncMock()
+    with patch.object(
+        coordinator.api, "_post_request", AsyncMock(return_value={"code": 1})
+    ) as mock_post:
+        response = await _async_apply_config(
+            hass,
+            make_apply_call(gardens=["AA-0", "Office_left"], config={"pumpStat": 1}),
+        )
+
+    assert response["results"] == {
+        "AA-0": {"success": True, "error": None},
+        "BB-0": {"success": True, "error": None},
+    }
+    assert mock_post.call_count == 2
+    coordinator.async_request_refresh.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_apply_config_rejects_unknown_gardens(hass, coordinator):
+    with pytest.raises(HomeAssistantError):
+        await _async_apply_config(
+            hass, make_apply_call(gardens=["missing"], config={"pumpStat": 1})
+        )
+
+
+@pytest.mark.asyncio
+async def test_apply_config_toggles_only_lights_in_the_other_state(hass, coordinator):
+    coordinator.api._data = {
+        key: GardenState(key=key, chooseGarden=0, lightStat=stat, lightTemp=temp)
+        for key, stat, temp in (("AA-0", 1, 1), ("BB-0", 0, 2), ("CC-0", 0, 0))
+    }
+    coordinator.async_request_refresh = AsyncMock()
+    with patch.object(
+        coordinator.api, "_post_request", AsyncMock(return_value={"code": 1})
+    ) as mock_post:
+        response = await _async_apply_config(hass, make_apply_call(light=True))
+
+    assert response["results"] == {
+        key: {"success": True, "error": None} for key in ("AA-0", "BB-0", "CC-0")
+    }
+    configs = {
+        call.args[1]["airGuid"]: call.args[1]["plantConfig"]
+        for call in mock_post.await_args_list
+    }
+    assert configs == {"BB-0": '{"lightTemp": 2}', "CC-0": '{"lightTemp": 0}'}
+    coordinator.async_request_refresh.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_apply_config_sends_nothing_when_lights_are_in_the_state(
+    hass, coordinator
+):
+    coordinator.api._data = {
+        "AA-0": GardenState(key="AA-0", chooseGarden=0, lightStat=0, lightTemp=1)
+    }
+    coordinator.async_request_refresh = AsyncMock()
+    with patch.object(coordinator.api, "_post_request", AsyncMock()) as mock_post:
+        response = await _async_apply_config(hass, make_apply_call(light=False))
+
+    assert response["results"] == {"AA-0": {"success": True, "error": None}}
+    mock_post.assert_not_awaited()
+    coordinator.async_request_refresh.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_apply_config_rejects_light_toggle_field_with_light(hass, coordinator):
+    with pytest.raises(HomeAssistantError):
+        await _async_apply_config(
+            hass, make_apply_call(config={"lightTemp": 1}, light=True)
+        )
+
+
+def test_apply_config_needs_config_or_light():
+    with pytest.raises(vol.Invalid):
+        APPLY_CONFIG_SCHEMA({"gardens": ["AA-0"]})
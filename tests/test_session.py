@@ -0,0 +1,30 @@
+import pytest
+
+from custom_components.aerogarden.session import ConnectionStats, async_create_session
+
+from .fake_cloud import FakeAerogardenCloud
+
+
+@pytest.mark.asyncio
+async def test_session_reuses_connections_and_counts_them():
+    cloud = FakeAerogardenCloud()
+    host = await cloud.start()
+    stats = ConnectionStats()
+    session = async_create_session(stats)
+    try:
+        for _ in range(5):
+            async with session.post(f"{host}/api/Admin/Login", data={}) as response:
+                await response.read()
+    finally:
+        await session.close()
+        await cloud.stop()
+
+    # The stand-in listens on an IP address, nothing is resolved
+    assert stats.as_dict() == {
+        "requests": 5,
+        "connections_created": 1,
+        "connections_reused": 4,
+        "reuse_rate": 0.8,
+        "dns_lookups": 0,
+        "dns_cache_hits": 0,
+    }
@@ -0,0 +1,102 @@
+from datetime import timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from homeassistant.util import dt as dt_util
+import pytest
+
+from custom_components.aerogarden.models import GardenState
+from custom_components.aerogarden.storage import AerogardenStore
+
+
+@pytest.fixture
+def store():
+    with patch("custom_components.aerogarden.storage.Store") as mock_store:
+        mock_store.return_value.async_load = AsyncMock(return_value={"userid": "7"})
+        yield AerogardenStore(MagicMock(), "entry-id")
+
+
+@pytest.mark.asyncio
+async def test_userid_is_loaded(store):
+    assert store.userid is None
+    await store.async_load()
+    assert store.userid == "7"
+
+
+@pytest.mark.asyncio
+async def test_userid_is_only_saved_when_changed(store):
+    await store.async_load()
+    store.async_set_userid("7")
+    store.async_set_userid(None)
+    assert store._store.async_delay_save.call_count == 0
+
+    store.async_set_userid("8")
+    assert store._store.async_delay_save.call_count == 1
+    assert store._store.async_delay_save.call_args.args[0]() == {"userid": "8"}
+
+
+@pytest.mark.asyncio
+async def test_gardens_are_serialized_when_written(store):
+    await store.async_load()
+    garden = GardenState(key="AA:BB:CC:DD:EE:FF-1", plantedName="Basil", pumpStat=1)
+    store.async_set_gardens({garden.key: garden})
+    assert store._store.async_delay_save.call_count == 1
+
+    saved = store._store.async_delay_save.call_args.args[0]()
+    assert saved["userid"] == "7"
+    snapshot = saved["gardens"]["AA:BB:CC:DD:EE:FF-1"]
+    assert snapshot["plantedName"] == "Basil"
+    assert GardenState.from_snapshot(garden.key, snapshot) == garden
+
+
+@pytest.mark.asyncio
+async def test_snapshot_time_is_saved(store):
+    await store.async_load()
+    assert store.updated is None
+    before = dt_util.utcnow()
+    store.async_set_gardens({})
+
+    saved = store._store.async_delay_save.call_args.args[0]()
+    assert dt_util.parse_datetime(saved["updated"]) == store.updated
+    assert store.updated >= before
+
+
+@pytest.mark.asyncio
+async def test_last_success_is_not_saved_on_every_poll(store):
+    await store.async_load()
+    assert store.last_success is None
+    first = dt_util.utcnow()
+    for poll in range(10):
+        store.async_set_last_success(first + timedelta(seconds=30 * poll))
+    assert store._store.async_delay_save.call_count == 0
+    assert store.last_success == first + timedelta(seconds=270)
+
+
+@pytest.mark.asyncio
+async def test_last_success_is_saved_with_the_snapshot(store):
+    await store.async_load()
+    first = dt_util.utcnow()
+    store.async_set_last_success(first)
+    store.async_set_gardens({})
+
+    saved = store._store.async_delay_save.call_args.args[0]()
+    assert saved["last_success"] == first.isoformat()
+    # Nothing is left to save on shutdown
+    store._store.async_save = AsyncMock()
+    await store.async_save_last_success()
+    assert store._store.async_save.call_count == 0
+
+
+@pytest.mark.asyncio
+async def test_last_success_is_saved_on_shutdown(store):
+    await store.async_load()
+    store._store.async_save = AsyncMock()
+    await store.async_save_last_success()
+    assert store._store.async_save.call_count == 0
+
+    first = dt_util.utcnow()
+    store.async_set_last_success(first)
+    await store.async_save_last_success()
+    saved = store._store.async_save.call_args.args[0]
+    assert saved["last_success"] == first.isoformat()
+    # The snapshot did not change
+    assert "updated" not in saved
@@ -0,0 +1,162 @@
+import tracemalloc
+
+import pytest
+
+from custom_components.aerogarden.models import GardenState
+from custom_components.aerogarden.telemetry import (
+    METRIC_LIGHT_HOURS,
+    METRIC_NUTRIENT_DAYS_LEFT,
+    METRIC_PUMP_DUTY_CYCLE,
+    METRIC_PUMP_LEVEL_TREND,
+    RollingTimeFraction,
+    RollingTrend,
+    TelemetryEngine,
+)
+
+HOUR = 3600.0
+DAY = 86400.0
+
+
+def test_time_fraction():
+    fraction = RollingTimeFraction(window=DAY)
+    for minute in range(0, 4 * 60 + 1):
+        fraction.add(minute * 60, minute < 60)
+
+    assert fraction.observed == 4 * HOUR
+    assert fraction.on_time == HOUR
+    assert fraction.fraction == pytest.approx(0.25)
+    assert len(fraction) == 2
+
+
+def test_time_fraction_forgets_old_samples():
+    fraction = RollingTimeFraction(window=DAY)
+    fraction.add(0, True)
+    fraction.add(12 * HOUR, False)
+    fraction.add(30 * HOUR, False)
+
+    # The window now starts 6 hours into the on period
+    assert fraction.observed == DAY
+    assert fraction.on_time == 6 * HOUR
+
+    fraction.add(60 * HOUR, False)
+    assert fraction.on_time == 0
+    assert len(fraction) == 1
+
+
+def test_time_fraction_restarts_after_a_gap():
+    fraction = RollingTimeFraction(window=HOUR)
+    fraction.add(0, True)
+    fraction.add(HOUR / 2, True)
+    fraction.add(3 * HOUR, False)
+    assert fraction.observed == 0
+    assert fraction.fraction is None
+
+
+def test_trend_slope():
+    trend = RollingTrend(window=DAY, min_interval=600)
+    for minute in range(0, 12 * 60, 5):
+        trend.add(minute * 60, 10 - minute / 60)
+
+    assert trend.slope == pytest.approx(-1 / HOUR)
+    # One sample every 10 minutes is kept
+    assert len(trend) == 72
+    assert trend.last == 10 - 715 / 60
+
+
+def test_trend_stays_accurate_over_many_windows():
+    trend = RollingTrend(window=DAY, min_interval=600)
+    start = 1e9
+    for step in range(0, 144 * 200):
+        trend.add(start + step * 600, 5 + 0.5 * (step % 144) / 144)
+
+    assert trend.slope is not None
+    assert len(trend) <= 145
+
+
+def test_trend_needs_two_samples():
+    trend = RollingTrend()
+    trend.add(0, None)
+    trend.add(0, 1)
+    assert trend.slope is None
+
+
+def garden(**fields):
+    return GardenState(key="AA:BB:CC:DD:EE:FF-1", **fields)
+
+
+def test_engine_metrics():
+    now = [0.0]
+    engine = TelemetryEngine(clock=lambda: now[0])
+    for hour in range(0, 8 * 24 + 1):
+        now[0] = hour * HOUR
+        engine.update(
+            {
+                "AA:BB:CC:DD:EE:FF-1": garden(
+                    pumpStat=int(hour % 4 == 0),
+                    lightStat=int(hour % 24 < 16),
+                    pumpLevel=1,
+                    nutriRemindDay=14 - hour // 24,
+                )
+            }
+        )
+
+    key = "AA:BB:CC:DD:EE:FF-1"
+    assert engine.value(key, METRIC_PUMP_DUTY_CYCLE) == 25.0
+    assert engine.value(key, METRIC_LIGHT_HOURS) == 16.0
+    assert engine.value(key, METRIC_PUMP_LEVEL_TREND) == 0
+    # nutriRemindDay counted down from 14 to 6, one per day
+    assert engine.value(key, METRIC_NUTRIENT_DAYS_LEFT) == pytest.approx(6, abs=0.5)
+
+
+def test_engine_reports_changed_metrics_only():
+    now = [0.0]
+    engine = TelemetryEngine(clock=lambda: now[0])
+    key = "AA:BB:CC:DD:EE:FF-1"
+
+    changed = engine.update({key: garden(pumpStat=1)})
+    assert changed == set()  # No metric can be computed from a single sample
+
+    now[0] = HOUR
+    changed = engine.update({key: garden(pumpStat=1)})
+    assert changed == {(key, METRIC_PUMP_DUTY_CYCLE)}
+
+    now[0] = 2 * HOUR
+    assert engine.update({key: garden(pumpStat=1)}) == set()
+
+    engine.update({})
+    assert engine.value(key, METRIC_PUMP_DUTY_CYCLE) is None
+
+
+def test_engine_memory_is_constant():
+    now = [0.0]
+    engine = TelemetryEngine(clock=lambda: now[0])
+    gardens = [f"AA:BB:CC:DD:EE:{index:02X}-1" for index in range(3)]
+
+    def feed(days):
+        for _ in range(int(days * DAY / 30)):
+            now[0] += 30
+            state = int(now[0] // 30) % 2
+            engine.update(
+                {
+                    key: garden(
+                        pumpStat=state,
+                        lightStat=1 - state,
+                        pumpLevel=int(now[0] // HOUR) % 4,
+                        nutriRemindDay=int(now[0] // DAY) % 14,
+                    )
+                    for key in gardens
+                }
+            )
+
+    tracemalloc.start()
+    feed(1)
+    before = tracemalloc.get_traced_memory()[0]
+    feed(2)
+    growth = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    telemetry = engine._gardens[gardens[0]]
+    assert len(telemetry.pump) <= 1440
+    assert len(telemetry.pump_level) <= 145
+    # Samples replace older ones: a few KB of churn, not one entry per sample
+    assert growth < 64 * 1024